@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import re
+import sys
+from collections import Counter
+from cards import CARDS_IDS, CARDS_RANKS, SUITS, RANKS, encode
+
+try:
+    import pygame
+except ImportError: # pygame is only needed by the graphic client
+    pygame = None
+
+PHOTOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "photos")
+ATLAS_FILE = os.path.join(PHOTOS_DIR, "cards_atlas.png")
+INDEX_FILE = os.path.join(PHOTOS_DIR, "cards_atlas.json")
+
+# Rank and suit words used in the photo file names, e.g. "queen_hearts.png".
+# The files aren't named consistently: Aces are "ace_*" or "one_*", and some suits are singular ("two_club.png").
+RANK_WORDS = {"two": "2", "three": "3", "four": "4", "five": "5", "six": "6", "seven": "7", "eight": "8",
+              "nine": "9", "ten": "10", "jack": "Jack", "queen": "Queen", "king": "King", "ace": "Ace", "one": "Ace"}
+SUIT_WORDS = {"heart": "Hearts", "diamond": "Diamonds", "club": "Clubs", "spade": "Spades"}
+PHOTO_NAME = re.compile(r"^([a-z]+)_([a-z]+?)s?\.png$")
+
+# Suit shown for rank-only cards (CARDS_RANKS), which have none; rank 10 is shown as a ten
+RANK_SUIT = "Spades"
+
+
+def _require_pygame():
+    if pygame is None:
+        raise ImportError("The card atlas needs pygame (pip install pygame).")
+
+
+def card_from_photo_name(file_name):
+
+    """Returns the [rank, suit] card a photo file is named after, or None if it isn't a card photo."""
+
+    match = PHOTO_NAME.match(file_name.lower())
+    if match is None or match.group(1) not in RANK_WORDS or match.group(2) not in SUIT_WORDS:
+        return None
+    return [RANK_WORDS[match.group(1)], SUIT_WORDS[match.group(2)]]
+
+
+def find_photos(photos_dir=PHOTOS_DIR):
+
+    """Maps every card id (0-51, see cards.py) to its photo file. Raises ValueError if a card has none or two."""
+
+    photos = {}
+    for file_name in sorted(os.listdir(photos_dir)):
+        card = card_from_photo_name(file_name)
+        if card is None:
+            continue
+        card_id = encode(card)
+        if card_id in photos:
+            raise ValueError(f"Two photos for the {card[0]} of {card[1]}: {photos[card_id]} and {file_name}.")
+        photos[card_id] = file_name
+
+    missing = [f"{rank} of {suit}" for suit in SUITS for rank in RANKS if encode([rank, suit]) not in photos]
+    if missing:
+        raise ValueError(f"No photo in {photos_dir} for: {', '.join(missing)}.")
+    return {card_id: os.path.join(photos_dir, file_name) for card_id, file_name in photos.items()}
+
+
+def build_atlas(photos_dir=PHOTOS_DIR, atlas_file=ATLAS_FILE, index_file=INDEX_FILE):
+
+    """
+    Packs the 52 card photos into one atlas image, a 13 x 4 grid with a card id's
+    sprite at column id % 13 and row id // 13, and writes its index:
+    {"image", "card_size", "sprites": {card id: [x, y, width, height]}}.
+    Odd-sized photos are scaled to the size most photos have. Returns the index.
+    """
+
+    _require_pygame()
+    photos = find_photos(photos_dir)
+    images = {card_id: pygame.image.load(path) for card_id, path in photos.items()}
+    width, height = Counter(image.get_size() for image in images.values()).most_common(1)[0][0]
+
+    atlas = pygame.Surface((13 * width, 4 * height), pygame.SRCALPHA)
+    sprites = {}
+    for card_id, image in images.items():
+        if image.get_size() != (width, height):
+            full_color = pygame.Surface(image.get_size(), pygame.SRCALPHA) # smoothscale needs 32-bit pixels
+            full_color.blit(image, (0, 0))
+            image = pygame.transform.smoothscale(full_color, (width, height))
+        x, y = card_id % 13 * width, card_id // 13 * height
+        atlas.blit(image, (x, y))
+        sprites[str(card_id)] = [x, y, width, height]
+
+    pygame.image.save(atlas, atlas_file)
+    index = {"image": os.path.basename(atlas_file), "card_size": [width, height], "sprites": sprites}
+    with open(index_file, "w") as file:
+        json.dump(index, file, indent=1)
+    return index
+
+
+class CardAtlas:
+
+    """
+    Card sprites for the graphic client, from the atlas built by build_atlas.
+
+    The atlas is read from disk once; it is built from the photos first if it
+    doesn't exist yet (or is older than the photos). Every size passed to
+    prepare (or to the constructor) gets its own set of 52 pre-scaled surfaces,
+    so drawing a card is a list lookup: no disk reads and no transform.scale
+    while dealing. Asking for a size that wasn't prepared raises KeyError
+    rather than scaling mid-frame.
+
+    Cards are looked up in the game's `card_encoding` (whatever create_deck and
+    deal_card return). Rank-only cards are drawn as Spades, and rank 10 as a ten.
+    A plain card back is drawn for each size too, for the dealer's hole card.
+
+    Call after pygame.display.set_mode when possible, so the surfaces are
+    converted to the display format for fast blits.
+    """
+
+    def __init__(self, card_encoding=CARDS_IDS, sizes=(), atlas_file=ATLAS_FILE, index_file=INDEX_FILE,
+                 photos_dir=PHOTOS_DIR):
+        _require_pygame()
+        self.card_encoding = card_encoding
+        if not os.path.exists(atlas_file) or not os.path.exists(index_file) or \
+                os.path.getmtime(atlas_file) < max(os.path.getmtime(path) for path in find_photos(photos_dir).values()):
+            build_atlas(photos_dir, atlas_file, index_file)
+        with open(index_file, "r") as file:
+            self.index = json.load(file)
+
+        self.image = pygame.image.load(atlas_file)
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            self.image = self.image.convert_alpha()
+        self.card_size = tuple(self.index["card_size"])
+        self.rects = [pygame.Rect(self.index["sprites"][str(card_id)]) for card_id in range(52)]
+        self._sprites = {} # (width, height) -> 52 surfaces by card id
+        self._backs = {}
+        self.prepare(self.card_size)
+        for size in sizes:
+            self.prepare(size)
+
+    def prepare(self, size):
+
+        """Scales every sprite (and the card back) to `size` = (width, height), once per size."""
+
+        size = tuple(size)
+        if size in self._sprites:
+            return
+        if size == self.card_size:
+            sprites = [self.image.subsurface(rect) for rect in self.rects]
+        else:
+            sprites = [pygame.transform.smoothscale(self.image.subsurface(rect), size) for rect in self.rects]
+        self._sprites[size] = sprites
+        self._backs[size] = self._draw_back(size)
+
+    def scaled_size(self, width):
+
+        """Returns the (width, height) of a card `width` pixels wide, keeping the photos' aspect ratio."""
+
+        return width, round(width * self.card_size[1] / self.card_size[0])
+
+    def _draw_back(self, size):
+        back = pygame.Surface(size, pygame.SRCALPHA)
+        radius = max(2, size[0] // 12)
+        pygame.draw.rect(back, (245, 245, 245), back.get_rect(), border_radius=radius)
+        inner = back.get_rect().inflate(-max(4, size[0] // 10), -max(4, size[0] // 10))
+        pygame.draw.rect(back, (150, 25, 35), inner, border_radius=radius)
+        return back
+
+    def card_id(self, card):
+
+        """Returns the 0-51 sprite id of a card in this atlas's encoding."""
+
+        if self.card_encoding == CARDS_IDS:
+            return card
+        if self.card_encoding == CARDS_RANKS:
+            return encode(["Ace" if card == 1 else str(card), RANK_SUIT])
+        return encode(card)
+
+    def sprite(self, card, size=None):
+
+        """Returns the surface of a card at a prepared size (default: the photos' size)."""
+
+        return self._sprites[size or self.card_size][self.card_id(card)]
+
+    def back(self, size=None):
+
+        """Returns the card back surface at a prepared size."""
+
+        return self._backs[size or self.card_size]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack the card photos into one atlas with an index.")
+    parser.add_argument("--photos", default=PHOTOS_DIR)
+    parser.add_argument("--atlas", default=ATLAS_FILE)
+    parser.add_argument("--index", default=INDEX_FILE)
+    args = parser.parse_args(argv)
+
+    index = build_atlas(args.photos, args.atlas, args.index)
+    width, height = index["card_size"]
+    print(f"Packed {len(index['sprites'])} cards of {width}x{height} into {args.atlas} (index: {args.index})")
+    return 0
+
+
+# --- python assets.py [--photos DIR] [--atlas FILE] [--index FILE] ---
+if __name__ == "__main__":
+    sys.exit(main())
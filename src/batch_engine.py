@@ -0,0 +1,298 @@
+import array
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from cards import CARDS_RANKS, new_cards
+from shoe import MIN_DECKS, MAX_DECKS
+from simulator import BlackjackSimulator, stand_on
+from parallel import worker_seeds, split_rounds
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; only the batch engine needs it
+    np = None
+
+DEALER_STANDS_ON = 17
+MAX_HAND_CARDS = 22 # 21 Aces and one more card
+TOTAL_FIELDS = ["rounds", "hands", "wins", "losses", "pushes", "naturals_won", "net"]
+
+
+class BatchEngine:
+
+    """
+    Vectorized simulator for fixed-threshold policies ("hit below `threshold`, never
+    split"), resolving a whole batch of shoes at once with NumPy array operations.
+
+    Shoes are the columns of an int8 matrix of ranks (1 = Ace, 10 = any ten-valued
+    card), card position by shoe, so each dealing step reads one contiguous row.
+    Every shoe is played like BlackjackSimulator with stand_on(threshold) plays a
+    Shoe: rounds are dealt in lockstep across the shoes (each seat two cards, then the
+    dealer two), naturals settle first, each seat hits while below the threshold,
+    the dealer stands on 17 (soft 17 included) and only draws if someone is still
+    standing, and hands settle as in BlackjackLogic.get_game_results (1 / 0 / 0.5),
+    with player naturals winning outright unless the dealer also has one.
+    A shoe stops at the cut card (`penetration`), as it would be reshuffled.
+
+    Only the cards that can be dealt before the last round ends are shuffled (a
+    partial Fisher-Yates pass, vectorized across the shoes). If a round could run
+    past the end of a shoe, spare positions are appended holding the first cards of
+    the neighbouring shoe, like BlackjackLogic reshuffling on the spot.
+
+    cross_check() replays the same shoes through BlackjackSimulator to verify that
+    both paths produce identical outcomes.
+
+    Throughput: one process plays about 2.5-4 million hands per second (one seat,
+    threshold 17, 6 decks), short of 10^7. That target takes run(workers=4) or more
+    on at least four free cores: shards share nothing but their totals, so the rate
+    grows with the number of cores, not with workers beyond them.
+    """
+
+    def __init__(self, threshold=17, num_players=1, num_decks=6, penetration=0.75, blackjack_payout=1.5, seed=None):
+        if np is None:
+            raise ImportError("BatchEngine needs NumPy (pip install numpy).")
+        if not MIN_DECKS <= num_decks <= MAX_DECKS:
+            raise ValueError(f"Number of decks must be between {MIN_DECKS} and {MAX_DECKS}, got {num_decks}.")
+        if not 0 < penetration <= 1:
+            raise ValueError(f"Penetration must be in (0, 1], got {penetration}.")
+
+        self.threshold = threshold
+        self.num_players = num_players
+        self.num_decks = num_decks
+        self.penetration = penetration
+        self.blackjack_payout = blackjack_payout
+        self.rng = np.random.default_rng(seed)
+        self.size = 52 * num_decks
+        # Same cut card position as Shoe: a round starts only while more than `size - cut` cards are left
+        self.cut = int(self.size * penetration)
+        self._base_shoe = np.frombuffer(new_cards(CARDS_RANKS, num_decks), dtype=np.int8)
+        # Deepest position a round starting before the cut card can reach
+        self.reach = self.cut + MAX_HAND_CARDS * (num_players + 1)
+
+    def new_shoes(self, batch):
+
+        """Returns `batch` independently shuffled shoes as the columns of a (positions, batch) int8 matrix."""
+
+        size = self.size
+        shuffled = min(size, self.reach)
+        shoes = np.tile(self._base_shoe[:, None], (1, batch))
+        flat = shoes.reshape(-1)
+        columns = np.arange(batch)
+        keys = self.rng.integers(0, 1 << 30, size=(shuffled, batch))
+        for i in range(shuffled):
+            # Swap position i of every shoe with a random position at or after it
+            swap = (i + keys[i] % (size - i)) * batch + columns
+            cards = flat[swap]
+            flat[swap] = shoes[i]
+            shoes[i] = cards
+
+        spare = self.reach - size
+        if spare > 0:
+            shoes = np.concatenate([shoes, np.roll(shoes[:spare], 1, axis=1)])
+        return shoes
+
+    def play_shoes(self, shoes, record=False):
+
+        """
+        Plays every shoe (column) to the cut card. Returns a dict of totals (rounds, hands,
+        wins, losses, pushes, naturals_won, net). With `record`, it also holds "rounds_played"
+        (rounds per shoe) and "outcomes": one (rows, outcomes by seat) pair per round.
+        """
+
+        threshold = self.threshold
+        width, batch = shoes.shape
+        flat = shoes.reshape(-1)
+        position = np.zeros(batch, dtype=np.int64)
+        rounds_played = np.zeros(batch, dtype=np.int64)
+        totals = {"rounds": 0, "hands": 0, "wins": 0, "losses": 0, "pushes": 0, "naturals_won": 0, "net": 0.0}
+        recorded = []
+
+        live = np.arange(batch)
+        while live.size:
+            offsets = position[live] * batch + live # Flat index of each live shoe's next card
+            count = live.size
+
+            def draw(rows=None):
+                # Deals the next card of each given live shoe (all of them by default)
+                if rows is None:
+                    cards = flat[offsets]
+                    offsets[:] += batch
+                else:
+                    cards = flat[offsets[rows]]
+                    offsets[rows] += batch
+                return cards.astype(np.int16)
+
+            # Initial deal: two cards per seat, then two for the dealer
+            hard = np.empty((self.num_players, count), dtype=np.int16)
+            aces = np.empty((self.num_players, count), dtype=bool)
+            for seat in range(self.num_players):
+                first, second = draw(), draw()
+                hard[seat] = first + second
+                aces[seat] = (first == 1) | (second == 1)
+            up, hole = draw(), draw()
+            dealer_hard = up + hole
+            dealer_aces = (up == 1) | (hole == 1)
+
+            score = hard + 10 * (aces & (hard <= 11))
+            dealer_score = dealer_hard + 10 * (dealer_aces & (dealer_hard <= 11))
+            naturals = score == 21
+            dealer_natural = dealer_score == 21
+
+            # Player turns, seat by seat (the order cards come out of the shoe)
+            playing = ~dealer_natural
+            for seat in range(self.num_players):
+                seat_hard, seat_aces, seat_score = hard[seat], aces[seat], score[seat]
+                hitting = np.flatnonzero(playing & ~naturals[seat] & (seat_score < threshold))
+                while hitting.size:
+                    card = draw(hitting)
+                    seat_hard[hitting] += card
+                    seat_aces[hitting] |= card == 1
+                    new_hard = seat_hard[hitting]
+                    new_score = new_hard + 10 * (seat_aces[hitting] & (new_hard <= 11))
+                    seat_score[hitting] = new_score
+                    hitting = hitting[(new_score < threshold) & (new_score <= 21)]
+
+            # The dealer only draws if someone without a natural is still standing
+            busted = score > 21
+            standing = (~naturals & ~busted).any(axis=0) & ~dealer_natural
+            drawing = np.flatnonzero(standing & (dealer_score < DEALER_STANDS_ON))
+            while drawing.size:
+                card = draw(drawing)
+                dealer_hard[drawing] += card
+                dealer_aces[drawing] |= card == 1
+                new_hard = dealer_hard[drawing]
+                new_score = new_hard + 10 * (dealer_aces[drawing] & (new_hard <= 11))
+                dealer_score[drawing] = new_score
+                drawing = drawing[new_score < DEALER_STANDS_ON]
+
+            # Settle like get_game_results, then player naturals win unless the dealer has one too
+            dealer_bust = dealer_score > 21
+            outcomes = np.where(busted, 0.0,
+                       np.where(dealer_bust, 1.0,
+                       np.where(score > dealer_score, 1.0,
+                       np.where(score < dealer_score, 0.0, 0.5))))
+            natural_wins = naturals & ~dealer_natural
+            outcomes[natural_wins] = 1.0
+
+            wins = outcomes == 1.0
+            losses = outcomes == 0.0
+            naturals_won = int(natural_wins.sum())
+            totals["rounds"] += count
+            totals["hands"] += outcomes.size
+            totals["wins"] += int(wins.sum())
+            totals["losses"] += int(losses.sum())
+            totals["pushes"] += outcomes.size - int(wins.sum()) - int(losses.sum())
+            totals["naturals_won"] += naturals_won
+            totals["net"] += (int(wins.sum()) - naturals_won + naturals_won * self.blackjack_payout) - int(losses.sum())
+            if record:
+                recorded.append((live, outcomes.T))
+
+            position[live] = offsets // batch
+            rounds_played[live] += 1
+            live = live[position[live] < self.cut]
+
+        if record:
+            totals["rounds_played"] = rounds_played
+            totals["outcomes"] = recorded
+        return totals
+
+    def _play(self, num_shoes, batch):
+
+        """Plays `num_shoes` shoes in batches of `batch` and returns the summed totals."""
+
+        totals = dict.fromkeys(TOTAL_FIELDS, 0)
+        remaining = num_shoes
+        while remaining > 0:
+            shoes = self.new_shoes(min(batch, remaining))
+            remaining -= shoes.shape[1]
+            for key, value in self.play_shoes(shoes).items():
+                totals[key] += value
+        return totals
+
+    def run(self, num_shoes, batch=8192, workers=1):
+
+        """
+        Plays `num_shoes` shoes and returns a report like BlackjackSimulator.run.
+        Shoes are generated and played `batch` at a time (small enough to stay in cache);
+        with `workers` > 1 they are split across processes with seeds drawn from this engine.
+        """
+
+        start = time.perf_counter()
+        if workers == 1:
+            totals = self._play(num_shoes, batch)
+        else:
+            seeds = worker_seeds(int(self.rng.integers(1 << 62)), workers)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_run_shard, self.threshold, self.num_players, self.num_decks, self.penetration,
+                                           self.blackjack_payout, shard_seed, shard_shoes, batch)
+                           for shard_shoes, shard_seed in zip(split_rounds(num_shoes, workers), seeds)]
+                totals = dict.fromkeys(TOTAL_FIELDS, 0)
+                for future in futures:
+                    for key, value in future.result().items():
+                        totals[key] += value
+        elapsed = time.perf_counter() - start
+
+        rounds, hands = totals["rounds"], totals["hands"]
+        totals.update({
+            "shoes": num_shoes,
+            "ev_per_round": totals["net"] / rounds if rounds else 0.0,
+            "ev_per_hand": totals["net"] / hands if hands else 0.0,
+            "seconds": elapsed,
+            "hands_per_sec": hands / elapsed if elapsed else 0.0
+        })
+        return totals
+
+    def cross_check(self, shoes):
+
+        """
+        Replays every shoe through BlackjackSimulator (the scalar BlackjackLogic path) and
+        compares the outcome of every hand of every round with play_shoes. Returns the
+        number of hands compared; raises AssertionError on the first mismatch.
+        """
+
+        batch_results = self.play_shoes(shoes, record=True)
+        expected = [[] for _ in range(shoes.shape[1])] # Per shoe: outcomes by seat, round after round
+        for columns, outcomes in batch_results["outcomes"]:
+            for column, seat_outcomes in zip(columns.tolist(), outcomes.tolist()):
+                expected[column].append(seat_outcomes)
+
+        compared = 0
+        for column, shoe_rounds in enumerate(expected):
+            simulator = BlackjackSimulator(num_players=self.num_players, decide=stand_on(self.threshold),
+                                           blackjack_payout=self.blackjack_payout, card_encoding=CARDS_RANKS,
+                                           num_decks=self.num_decks, penetration=self.penetration)
+            # Shoe deals from the end, so the column goes in reversed
+            simulator.logic.shoe.cards = array.array("b", shoes[::-1, column].tobytes())
+            for round_number, seat_outcomes in enumerate(shoe_rounds):
+                results, _, _ = simulator.play_round()
+                actual = [results[f"player{seat}"][1] for seat in range(1, self.num_players + 1)]
+                if actual != seat_outcomes:
+                    raise AssertionError(f"Shoe {column}, round {round_number + 1}: scalar {actual} != batch {seat_outcomes}")
+                compared += len(actual)
+            if shoes.shape[0] - simulator.logic.shoe.remaining() < self.cut:
+                raise AssertionError(f"Shoe {column}: the batch engine stopped before the cut card")
+        return compared
+
+
+def _run_shard(threshold, num_players, num_decks, penetration, blackjack_payout, seed, num_shoes, batch):
+
+    """Plays one shard of shoes in a worker process and returns its totals."""
+
+    engine = BatchEngine(threshold, num_players, num_decks, penetration, blackjack_payout, seed)
+    return engine._play(num_shoes, batch)
+
+
+# --- To run a batch simulation: python batch_engine.py [shoes] [players] [threshold] [workers] ---
+if __name__ == "__main__":
+    num_shoes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    num_players = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    stand_threshold = int(sys.argv[3]) if len(sys.argv) > 3 else 17
+    num_workers = int(sys.argv[4]) if len(sys.argv) > 4 else os.cpu_count() or 1
+
+    engine = BatchEngine(stand_threshold, num_players, seed=0)
+    checked = engine.cross_check(engine.new_shoes(200))
+    print(f"cross-check: {checked} hands identical to the scalar path")
+
+    report = engine.run(num_shoes, workers=num_workers)
+    for key, value in report.items():
+        print(f"{key}: {value}")
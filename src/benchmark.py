@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from logic import BlackjackLogic, PERSIST_NONE, PERSIST_ROUND
+from common import percentile
+from simulator import BlackjackSimulator, mimic_dealer, stand_on
+
+# Measured runs per metric (after one warmup run); the metric is their median
+REPEATS = 5
+# compare flags a metric that got worse by more than NOISE_FACTOR times its run-to-run spread...
+NOISE_FACTOR = 2.0
+# ...and by at least this much (0.03 = 3%)
+MIN_THRESHOLD = 0.03
+# Threshold for results without a spread (written before runs were repeated)
+DEFAULT_THRESHOLD = 0.10
+
+LATENCY_BENCHMARKS = ["add_player", "calculate_score", "player_hit", "initial_deal", "dealer_turn", "get_game_results"]
+
+
+def repeated(measure, repeats=REPEATS):
+
+    """
+    Calls `measure()` once as a warmup (caches, allocator and file system settle),
+    then `repeats` times, and combines the metrics it returns: "value" is the
+    median of the runs' values, "runs" lists them and "spread" is their range
+    relative to the median, which compare uses as the metric's noise level.
+    """
+
+    measure()
+    runs = [measure() for _ in range(repeats)]
+    values = sorted(run["value"] for run in runs)
+    metric = dict(runs[0])
+    metric["value"] = percentile(values, 0.5)
+    metric["runs"] = values
+    metric["spread"] = (values[-1] - values[0]) / metric["value"] if metric["value"] else 0.0
+    if "p95" in metric:
+        metric["p95"] = percentile(sorted(run["p95"] for run in runs), 0.5)
+    return metric
+
+
+def time_call(setup, iterations):
+
+    """
+    Times a call `iterations` times. `setup(i)` prepares the state and returns the
+    zero-argument callable to time, so only the call itself is measured.
+    Returns a latency metric (median and p95 in nanoseconds).
+    """
+
+    samples = []
+    for i in range(iterations):
+        call = setup(i)
+        start = time.perf_counter_ns()
+        call()
+        samples.append(time.perf_counter_ns() - start)
+
+    samples.sort()
+    return {
+        "value": percentile(samples, 0.5),
+        "p95": percentile(samples, 0.95),
+        "unit": "ns",
+        "better": "lower"
+    }
+
+
+def bench_latencies(data_file, persistence, iterations, repeats=REPEATS):
+
+    """
+    Measures per-call latency of the BlackjackLogic hot paths for one persistence
+    policy. Every run starts from a fresh table dealing from an identically seeded
+    shoe, so the runs of a metric do the same work and differ only by noise.
+    """
+
+    def measure(name):
+        logic = BlackjackLogic(data_file, persistence=persistence, num_decks=6, rng=random.Random(0))
+        logic.reset_game_data()
+        if name != "add_player": # Every other benchmark plays one seated player
+            logic.add_player("player1")
+
+        def dealt_round():
+            logic.new_round()
+            logic.initial_deal()
+
+        def add_player(i):
+            if i % 7 == 0:
+                logic.reset_game_data() # Tables seat at most seven players
+            return lambda: logic.add_player(f"player{i}")
+
+        def calculate_score(i):
+            dealt_round()
+            return lambda: logic.calculate_score("player1", 1)
+
+        def player_hit(i):
+            dealt_round()
+            return lambda: logic.player_hit("player1", 1)
+
+        def initial_deal(i):
+            logic.new_round()
+            return logic.initial_deal
+
+        def dealer_turn(i):
+            dealt_round()
+            return logic.dealer_turn
+
+        def get_game_results(i):
+            dealt_round()
+            logic.dealer_turn()
+            return logic.get_game_results
+
+        setups = {"add_player": add_player, "calculate_score": calculate_score, "player_hit": player_hit,
+                  "initial_deal": initial_deal, "dealer_turn": dealer_turn, "get_game_results": get_game_results}
+        metric = time_call(setups[name], iterations)
+        logic.close()
+        return metric
+
+    return {f"latency.{persistence}.{name}": repeated(lambda: measure(name), repeats)
+            for name in LATENCY_BENCHMARKS}
+
+
+def bench_rounds(rounds, repeats=REPEATS):
+
+    """Measures end-to-end simulated rounds/sec for 1 and 7 players, with and without splits."""
+
+    def throughput(num_players, decide):
+        report = BlackjackSimulator(num_players=num_players, decide=decide, seed=0).run(rounds)
+        return {"value": report["rounds_per_sec"], "unit": "rounds/s", "better": "higher"}
+
+    metrics = {}
+    for num_players in (1, 7):
+        for label, decide in [("no_splits", mimic_dealer), ("splits", stand_on(17, split=True))]:
+            metrics[f"rounds_per_sec.{num_players}p.{label}"] = repeated(lambda: throughput(num_players, decide), repeats)
+    return metrics
+
+
+def run_benchmarks(iterations=2000, rounds=20000, repeats=REPEATS):
+
+    """Runs the whole suite and returns the results as a dictionary."""
+
+    metrics = {}
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = os.path.join(directory, "data.json")
+        for persistence in (PERSIST_NONE, PERSIST_ROUND):
+            metrics.update(bench_latencies(data_file, persistence, iterations, repeats))
+    metrics.update(bench_rounds(rounds, repeats))
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "iterations": iterations,
+            "rounds": rounds,
+            "repeats": repeats
+        },
+        "metrics": metrics
+    }
+
+
+def regression_threshold(old, new):
+
+    """
+    Returns how much worse (0.10 = 10%) a metric may get before it counts as a
+    regression: NOISE_FACTOR times the larger spread of its two measurements, at
+    least MIN_THRESHOLD. Results without a spread use DEFAULT_THRESHOLD.
+    """
+
+    if "spread" not in old or "spread" not in new:
+        return DEFAULT_THRESHOLD
+    return max(MIN_THRESHOLD, NOISE_FACTOR * max(old["spread"], new["spread"]))
+
+
+def compare(baseline, current, threshold=None):
+
+    """
+    Compares two result dictionaries. Returns a list of (metric, baseline value,
+    current value, relative change, threshold, regressed) for every metric found
+    in both. A metric regresses if it got worse by more than its threshold: the
+    fixed `threshold` if given, else regression_threshold for that metric.
+    """
+
+    rows = []
+    for name, old in baseline["metrics"].items():
+        new = current["metrics"].get(name)
+        if new is None or not old["value"]:
+            continue
+
+        change = (new["value"] - old["value"]) / old["value"]
+        worse = change if old["better"] == "lower" else -change
+        allowed = threshold if threshold is not None else regression_threshold(old, new)
+        rows.append((name, old["value"], new["value"], change, allowed, worse > allowed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the BlackjackLogic hot paths.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and write the results as JSON")
+    run_parser.add_argument("--output", default="bench_results.json")
+    run_parser.add_argument("--iterations", type=int, default=2000, help="calls per latency benchmark")
+    run_parser.add_argument("--rounds", type=int, default=20000, help="rounds per throughput benchmark")
+    run_parser.add_argument("--repeats", type=int, default=REPEATS, help="measured runs per metric, after a warmup")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files and flag regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=None,
+                                help="fixed allowed slowdown (0.10 = 10%%); by default derived from each metric's spread")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        if args.repeats < 1:
+            raise ValueError(f"Repeats must be at least 1, got {args.repeats}.")
+        results = run_benchmarks(args.iterations, args.rounds, args.repeats)
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+        for name, metric in results["metrics"].items():
+            print(f"{name}: {metric['value']:.0f} {metric['unit']} (spread {metric['spread']:.1%})")
+        print(f"Results written to {args.output}")
+        return 0
+
+    with open(args.baseline, "r") as file:
+        baseline = json.load(file)
+    with open(args.current, "r") as file:
+        current = json.load(file)
+
+    regressions = 0
+    for name, old, new, change, allowed, regressed in compare(baseline, current, args.threshold):
+        flag = "REGRESSION" if regressed else "ok"
+        print(f"{name}: {old:.0f} -> {new:.0f} ({change:+.1%}, allowed {allowed:.1%}) {flag}")
+        regressions += regressed
+
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+# --- python benchmark.py run [--output FILE] [--repeats 5] | python benchmark.py compare BASELINE CURRENT [--threshold 0.1] ---
+if __name__ == "__main__":
+    sys.exit(main())
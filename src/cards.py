@@ -0,0 +1,65 @@
+from array import array
+
+# Card encodings understood by BlackjackLogic
+CARDS_STRINGS = "strings"  # [rank, suit] lists, e.g. ['Queen', 'Hearts'] (original format)
+CARDS_IDS = "ids"          # ints 0-51: suit_index * 13 + rank_index
+CARDS_RANKS = "ranks"      # rank-only ints 1-10 (1 = Ace, 10 = any ten-valued card), for simulation
+CARD_ENCODINGS = (CARDS_STRINGS, CARDS_IDS, CARDS_RANKS)
+
+# Same order as BlackjackLogic.create_deck
+SUITS = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'Jack', 'Queen', 'King', 'Ace']
+
+# Hard value of each rank (Ace counted as 1; scoring counts one Ace as 11 when it fits)
+_RANK_POINTS = [2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10, 1]
+
+# Hard value lookup tables, indexed by the encoded card, used for running hand totals
+ID_HARD_VALUES = bytes(_RANK_POINTS[card % 13] for card in range(52))
+RANK_HARD_VALUES = bytes(range(11))
+STRING_HARD_VALUES = dict(zip(RANKS, _RANK_POINTS))
+
+# Split-matching key lookup tables: two cards can be split if their keys are equal
+ID_RANK_KEYS = bytes(card % 13 for card in range(52))
+RANK_RANK_KEYS = bytes(range(11))
+
+
+def encode(card):
+
+    """Converts a [rank, suit] card to its 0-51 id."""
+
+    return SUITS.index(card[1]) * 13 + RANKS.index(card[0])
+
+
+def decode(card):
+
+    """Converts a 0-51 card id back to its [rank, suit] form (for display only)."""
+
+    return [RANKS[card % 13], SUITS[card // 13]]
+
+
+def decode_rank(card):
+
+    """Converts a rank-only card (1-10) to a display name."""
+
+    return "Ace" if card == 1 else str(card)
+
+
+def new_cards(encoding, num_decks=1):
+
+    """Returns `num_decks` unshuffled decks in the given encoding (an array('b') for compact encodings)."""
+
+    if encoding == CARDS_IDS:
+        return array('b', range(52)) * num_decks
+    if encoding == CARDS_RANKS:
+        deck = [rank for rank in range(1, 10) for _ in range(4)] + [10] * 16
+        return array('b', deck) * num_decks
+    return [[rank, suit] for _ in range(num_decks) for suit in SUITS for rank in RANKS]
+
+
+def new_deck(encoding, rng, num_decks=1):
+
+    """Returns `num_decks` decks shuffled together in a single Fisher-Yates pass."""
+
+    deck = new_cards(encoding, num_decks)
+    rng.shuffle(deck) # random.shuffle is Fisher-Yates and works in place on arrays too
+    return deck
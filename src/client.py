@@ -0,0 +1,174 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from server import PORT
+from common import HIT, STAND, SPLIT, percentile
+
+
+def bot_decide(message):
+
+    """Decision function for bots: split when allowed, hit below 17."""
+
+    if SPLIT in message["legal"]:
+        return SPLIT
+    return HIT if message["score"] < 17 else STAND
+
+
+def ask_decide(message):
+
+    """Decision function that asks at the terminal (blocking; fine for a single interactive client)."""
+
+    choices = "/".join(message["legal"])
+    while True:
+        action = input(f"Hand {message['hand']} ({message['score']}). Hit, stand or split? [{choices}]: ").strip().lower()
+        if action in message["legal"]:
+            return action
+        print("Invalid choice!")
+
+
+def card_text(card):
+
+    """Formats a [rank, suit] card from a "state" message; None (the dealer's hole card) is shown as "??"."""
+
+    if card is None:
+        return "??"
+    rank, suit = card
+    return f"{rank} of {suit}"
+
+
+def print_message(message):
+
+    """Prints the table state and results for an interactive player."""
+
+    if message["type"] == "state":
+        dealer = message["dealer"]
+        cards = ", ".join(card_text(card) for card in dealer["cards"])
+        print(f"\nDealer: {cards}" + (f" ({dealer['score']})" if dealer["score"] is not None else ""))
+        for name, hands in message["players"].items():
+            for hand_number, hand in enumerate(hands, 1):
+                if hand["cards"]:
+                    cards = ", ".join(card_text(card) for card in hand["cards"])
+                    print(f"{name} hand {hand_number}: {cards} ({hand['score']})")
+    elif message["type"] == "results":
+        for name, outcomes in message["results"].items():
+            for hand_number, outcome in outcomes.items():
+                label = {1: "wins", 0: "loses", 0.5: "pushes"}[outcome]
+                print(f"{name} hand {hand_number} {label}")
+    elif message["type"] in ("timeout", "error"):
+        print(message)
+
+
+class BlackjackClient:
+
+    """
+    Client for TableServer. Joins one table and answers every "your_turn" with
+    decide(message), which returns "h", "s" or "p".
+
+    Records the time from sending each action to the next message from the server,
+    so a group of bot clients doubles as a latency load test.
+    """
+
+    def __init__(self, host, port, table, name, decide=bot_decide, on_message=None):
+        self.host = host
+        self.port = port
+        self.table = table
+        self.name = name
+        self.decide = decide
+        self.on_message = on_message
+        self.latencies = [] # Seconds from each action to the server's reply
+        self.rounds = 0
+
+    async def play(self, rounds=None):
+
+        """Plays until `rounds` rounds have been settled (or forever), then leaves."""
+
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        writer.write(json.dumps({"type": "join", "table": self.table, "name": self.name}).encode() + b"\n")
+
+        joined = False
+        sent_at = None
+        try:
+            async for line in reader:
+                message = json.loads(line)
+                if sent_at is not None:
+                    self.latencies.append(time.perf_counter() - sent_at)
+                    sent_at = None
+                if self.on_message is not None:
+                    self.on_message(message)
+
+                kind = message["type"]
+                if kind == "joined":
+                    joined = True
+                elif kind == "your_turn":
+                    action = self.decide(message)
+                    writer.write(json.dumps({"type": "action", "action": action}).encode() + b"\n")
+                    sent_at = time.perf_counter()
+                elif kind == "results":
+                    self.rounds += 1
+                    if rounds is not None and self.rounds >= rounds:
+                        break
+                elif kind == "error" and not joined:
+                    raise ValueError(message["message"]) # Could not join
+        finally:
+            writer.write(b'{"type": "leave"}\n')
+            writer.close()
+
+
+async def load_test(host, port, tables, players, rounds):
+
+    """Runs `players` bot clients on each of `tables` tables for `rounds` rounds and returns latency stats."""
+
+    clients = [BlackjackClient(host, port, f"table{t}", f"bot{p}")
+               for t in range(tables) for p in range(players)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client.play(rounds) for client in clients))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for client in clients for latency in client.latencies)
+    return {
+        "clients": len(clients),
+        "rounds": sum(client.rounds for client in clients) // players,
+        "actions": len(latencies),
+        "seconds": elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000 if latencies else 0.0,
+        "p99_ms": percentile(latencies, 0.99) * 1000 if latencies else 0.0,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play on or load-test a Blackjack table server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    play_parser = commands.add_parser("play", help="join a table and play at the terminal")
+    play_parser.add_argument("name")
+    play_parser.add_argument("--table", default="main")
+
+    load_parser = commands.add_parser("load", help="run bot clients across many tables and report latency")
+    load_parser.add_argument("--tables", type=int, default=100)
+    load_parser.add_argument("--players", type=int, default=3, help="bots per table")
+    load_parser.add_argument("--rounds", type=int, default=20)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "play":
+        client = BlackjackClient(args.host, args.port, args.table, args.name, decide=ask_decide, on_message=print_message)
+        try:
+            asyncio.run(client.play())
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    report = asyncio.run(load_test(args.host, args.port, args.tables, args.players, args.rounds))
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    return 0
+
+
+# --- python client.py play NAME [--table T] | python client.py load [--tables 100 --players 3 --rounds 20] ---
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,16 @@
+# Shared constants and helpers. This module imports nothing, so the solvers, the
+# state machine, the benchmarks and the display code can use it without loading
+# BlackjackLogic.
+
+# Player actions returned by a decision function
+HIT = "h"
+STAND = "s"
+SPLIT = "p"
+
+
+def percentile(sorted_values, fraction):
+
+    """Returns the value below which `fraction` (0.95 = 95%) of `sorted_values` fall (nearest rank)."""
+
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
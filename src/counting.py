@@ -0,0 +1,148 @@
+from functools import partial
+from cards import CARDS_IDS, CARDS_RANKS, ID_HARD_VALUES, STRING_HARD_VALUES
+
+# Card counting systems
+SYSTEM_HI_LO = "hi-lo"
+SYSTEM_KO = "ko"
+SYSTEM_OMEGA_II = "omega-ii"
+
+# Tag of each rank (index 1 = Ace ... 10 = any ten-valued card; index 0 unused)
+SYSTEM_TAGS = {
+    SYSTEM_HI_LO: (0, -1, 1, 1, 1, 1, 1, 0, 0, 0, -1),
+    SYSTEM_KO: (0, -1, 1, 1, 1, 1, 1, 1, 0, 0, -1),
+    SYSTEM_OMEGA_II: (0, 0, 1, 1, 2, 2, 2, 1, 0, -1, -2)
+}
+
+# Systems whose tags don't sum to zero over a deck; they are played off the running count
+UNBALANCED_SYSTEMS = (SYSTEM_KO,)
+
+
+def initial_running_count(system, num_decks):
+
+    """Running count at the start of a shoe: 0 for balanced systems, 4 - 4 * decks for KO (unbalanced)."""
+
+    return 4 - 4 * num_decks if system in UNBALANCED_SYSTEMS else 0
+
+
+def _bet_ramp(max_units, true_count):
+    return min(max_units, max(1, int(true_count)))
+
+
+def bet_ramp(max_units=8):
+
+    """
+    Returns a bet spread for BlackjackSimulator(bet_spread=...): one unit up to a true
+    count of 1, then one unit per true count, capped at `max_units`. Under KO the
+    "true count" is the running count (see CardCounter.true_count). Picklable.
+    """
+
+    return partial(_bet_ramp, max_units)
+
+
+class CardCounter:
+
+    """
+    Running count of the cards dealt from a Shoe under a tag system (Hi-Lo, KO or Omega II).
+
+    BlackjackLogic(count_system=...) feeds it every card in deal_card, so each card
+    costs one table lookup. The dealer's hole card is held back by hide() until
+    reveal(), as a player at the table would only see it then. The count restarts
+    whenever the shoe is reshuffled.
+
+    Without a `shoe` (a player who only sees the cards, like strategies.CountingStrategy),
+    pass `num_decks` and `card_encoding` instead: the decks left are worked out from
+    the cards counted, and reset() must be called when the shoe is reshuffled.
+
+    The true count is the running count per deck still unseen (the shoe plus a hidden
+    hole card). For KO, an unbalanced count, the running count itself is what's used.
+    """
+
+    __slots__ = ("shoe", "system", "num_decks", "tags", "running_count", "cards_seen", "hidden", "shuffles", "_rank_of")
+
+    def __init__(self, shoe=None, system=SYSTEM_HI_LO, num_decks=None, card_encoding=None):
+        if system not in SYSTEM_TAGS:
+            raise ValueError(f"Unknown counting system: {system!r}. Use one of: {', '.join(SYSTEM_TAGS)}.")
+        if shoe is None and (num_decks is None or card_encoding is None):
+            raise ValueError("A card counter without a shoe needs num_decks and card_encoding.")
+        self.shoe = shoe
+        self.system = system
+        self.num_decks = shoe.num_decks if shoe is not None else num_decks
+        card_encoding = shoe.card_encoding if shoe is not None else card_encoding
+        rank_tags = SYSTEM_TAGS[system]
+
+        # Tags indexed (or keyed) by the encoded card, so counting needs no decoding
+        if card_encoding == CARDS_IDS:
+            self.tags = tuple(rank_tags[ID_HARD_VALUES[card]] for card in range(52))
+            self._rank_of = None
+        elif card_encoding == CARDS_RANKS:
+            self.tags = rank_tags
+            self._rank_of = None
+        else:
+            self.tags = {rank: rank_tags[value] for rank, value in STRING_HARD_VALUES.items()}
+            self._rank_of = True # String cards are keyed by their rank name
+        self.reset()
+
+    def reset(self):
+
+        """Starts counting a fresh shoe."""
+
+        self.running_count = initial_running_count(self.system, self.num_decks)
+        self.cards_seen = 0
+        self.hidden = []
+        self.shuffles = self.shoe.shuffles if self.shoe is not None else 0
+
+    def sync(self):
+
+        """Restarts the count if the shoe was reshuffled since the last card counted."""
+
+        if self.shoe is not None and self.shoe.shuffles != self.shuffles:
+            self.reset()
+
+    def count(self, card):
+
+        """Counts a card that was just dealt face up."""
+
+        shoe = self.shoe
+        if shoe is not None and shoe.shuffles != self.shuffles:
+            self.reset() # Reshuffled since the last card
+        self.running_count += self.tags[card[0]] if self._rank_of else self.tags[card]
+        self.cards_seen += 1
+
+    def hide(self, card):
+
+        """Takes back a card that was dealt face down (the dealer's hole card) until reveal()."""
+
+        self.running_count -= self.tags[card[0]] if self._rank_of else self.tags[card]
+        self.cards_seen -= 1
+        self.hidden.append(card)
+
+    def reveal(self):
+
+        """Counts the hidden cards now that they are face up."""
+
+        hidden, self.hidden = self.hidden, []
+        if self.shoe is not None and self.shoe.shuffles != self.shuffles:
+            return # They belong to a shoe that is gone
+        for card in hidden:
+            self.count(card)
+
+    def decks_remaining(self):
+
+        """Decks not yet seen: the cards left in the shoe plus hidden ones (at least half a deck)."""
+
+        if self.shoe is None:
+            return max(0.5, (52 * self.num_decks - self.cards_seen) / 52)
+        return max(0.5, (self.shoe.remaining() + len(self.hidden)) / 52)
+
+    def true_count(self):
+
+        """
+        Running count per unseen deck. Unbalanced systems (KO) are used without the
+        conversion: their initial count already accounts for the shoe size, so this
+        returns the running count itself.
+        """
+
+        self.sync()
+        if self.system in UNBALANCED_SYSTEMS:
+            return self.running_count
+        return self.running_count / self.decks_remaining()
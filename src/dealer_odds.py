@@ -0,0 +1,253 @@
+import json
+import logging
+import os
+from collections import OrderedDict
+import cards
+from cards import CARDS_STRINGS, CARDS_IDS, CARDS_RANKS
+from storage import replace_file
+
+logger = logging.getLogger("blackjack.dealer_odds")
+
+# Path to the precomputed dealer tables (JSON file), in the user's cache directory so that
+# read-only installs can still save them
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+                         or os.path.join(os.path.expanduser("~"), ".cache"), "blackjack")
+TABLE_FILE = os.path.join(CACHE_DIR, "dealer_tables.json")
+
+# Dealer rule variants
+RULE_S17 = "S17"  # Dealer stands on all 17s (what BlackjackLogic.dealer_turn does)
+RULE_H17 = "H17"  # Dealer hits soft 17
+RULES = (RULE_S17, RULE_H17)
+
+# Order of the final outcomes in every probability tuple
+OUTCOMES = (17, 18, 19, 20, 21, "bust")
+BUST = 5
+
+# Infinite-deck draw probabilities for ranks 1 (Ace) to 10
+INFINITE_PROBS = tuple(4 / 13 if rank == 10 else 1 / 13 for rank in range(1, 11))
+
+_BUST_ONLY = (0.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+_FINAL = {score: tuple(1.0 if i == score - 17 else 0.0 for i in range(6)) for score in range(17, 22)}
+
+
+def fresh_composition(num_decks):
+
+    """Returns the rank composition of `num_decks` full decks: counts of ranks 1 (Ace) to 10."""
+
+    return tuple(16 * num_decks if rank == 10 else 4 * num_decks for rank in range(1, 11))
+
+
+def card_rank(card, card_encoding=CARDS_STRINGS):
+
+    """Returns the blackjack rank (1 = Ace, 10 = any ten-valued card) of an encoded card."""
+
+    if card_encoding == CARDS_IDS:
+        return cards.ID_HARD_VALUES[card]
+    if card_encoding == CARDS_RANKS:
+        return card
+    return cards.STRING_HARD_VALUES[card[0]]
+
+
+def composition_of(remaining_cards, card_encoding=CARDS_STRINGS):
+
+    """Counts the ranks of a list of cards (e.g. what is left in a Shoe) into a composition tuple."""
+
+    counts = [0] * 10
+    for card in remaining_cards:
+        counts[card_rank(card, card_encoding) - 1] += 1
+    return tuple(counts)
+
+
+def remove_card(composition, rank):
+
+    """Returns the composition with one card of `rank` taken out."""
+
+    index = rank - 1
+    if composition[index] == 0:
+        raise ValueError(f"No card of rank {rank} left in the composition.")
+    return composition[:index] + (composition[index] - 1,) + composition[index + 1:]
+
+
+def _stands(hard, has_ace, stand_soft_17):
+
+    """Returns the final score if the dealer stands on this hand, None if the dealer must hit."""
+
+    soft = has_ace and hard <= 11
+    score = hard + 10 if soft else hard
+    if score > 17 or (score == 17 and (stand_soft_17 or not soft)):
+        return score
+    return None
+
+
+def _dealer_distribution(hard, has_ace, composition, stand_soft_17, memo, skip_rank=None):
+
+    """
+    Exact distribution of the dealer's final result from a hand (hard total, Ace seen)
+    drawing from `composition` (None for an infinite deck). `skip_rank` excludes one rank
+    from the next draw only (used for the hole card after a peek).
+    """
+
+    if hard > 21:
+        return _BUST_ONLY
+    score = _stands(hard, has_ace, stand_soft_17)
+    if score is not None:
+        return _FINAL[score]
+
+    key = (hard, has_ace, composition, skip_rank)
+    cached = memo.get(key)
+    if cached is not None:
+        return cached
+
+    dist = [0.0] * 6
+    if composition is None:
+        probs = INFINITE_PROBS
+        total = 1.0 - (probs[skip_rank - 1] if skip_rank else 0.0)
+        for index, p in enumerate(probs):
+            rank = index + 1
+            if rank == skip_rank:
+                continue
+            sub = _dealer_distribution(hard + rank, has_ace or rank == 1, None, stand_soft_17, memo)
+            weight = p / total
+            for i in range(6):
+                dist[i] += weight * sub[i]
+    else:
+        total = sum(composition) - (composition[skip_rank - 1] if skip_rank else 0)
+        if total <= 0:
+            raise ValueError("The composition ran out of cards before the dealer finished drawing.")
+        for index, count in enumerate(composition):
+            rank = index + 1
+            if count == 0 or rank == skip_rank:
+                continue
+            rest = composition[:index] + (count - 1,) + composition[index + 1:]
+            sub = _dealer_distribution(hard + rank, has_ace or rank == 1, rest, stand_soft_17, memo)
+            weight = count / total
+            for i in range(6):
+                dist[i] += weight * sub[i]
+
+    result = tuple(dist)
+    memo[key] = result
+    return result
+
+
+def compute_dealer_outcomes(upcard, composition=None, rules=RULE_S17, peeked=False):
+
+    """
+    Computes (uncached) the probabilities of the dealer finishing on 17, 18, 19, 20, 21
+    or busting, given the upcard rank (1-10) and the remaining composition (the upcard
+    already removed; None for an infinite deck).
+
+    With `peeked`, the result is conditioned on the dealer not having a natural, which
+    is the situation every player decision is made in (naturals end the round first).
+    """
+
+    if rules not in RULES:
+        raise ValueError(f"Unknown dealer rules: {rules!r}. Use one of: {', '.join(RULES)}.")
+
+    skip_rank = None
+    if peeked:
+        skip_rank = {1: 10, 10: 1}.get(upcard)
+    return _dealer_distribution(upcard, upcard == 1, composition, rules == RULE_S17, {}, skip_rank)
+
+
+class DealerOutcomeEngine:
+
+    """
+    Cached dealer final-outcome probabilities.
+
+    Results are memoized on (upcard, composition, rules, peeked) in a bounded LRU cache.
+    The infinite-deck and fresh 1-8 deck tables are loaded from `table_file` (default
+    TABLE_FILE; "" for none) at startup, or computed once and saved there if the file is
+    missing or doesn't cover `rules`. If they can't be saved, the engine keeps them in memory.
+    """
+
+    def __init__(self, rules=RULE_S17, cache_size=4096, table_file=None):
+        if rules not in RULES:
+            raise ValueError(f"Unknown dealer rules: {rules!r}. Use one of: {', '.join(RULES)}.")
+
+        self.rules = rules
+        self.cache_size = cache_size
+        self.table_file = TABLE_FILE if table_file is None else table_file
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._tables = self._load_tables()
+
+    def _load_tables(self):
+
+        """Loads the precomputed tables for these rules, computing and saving them if needed."""
+
+        stored = {}
+        if self.table_file and os.path.exists(self.table_file):
+            try:
+                with open(self.table_file, "r") as file:
+                    stored = json.load(file)
+            except (OSError, ValueError):
+                stored = {} # Corrupt table file, rebuild it
+
+        if self.rules not in stored:
+            stored[self.rules] = self._build_tables()
+            if self.table_file:
+                try:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.table_file)), exist_ok=True)
+                    replace_file(self.table_file, json.dumps(stored)) # A crash mid-write can't leave truncated JSON
+                except OSError as error:
+                    logger.warning("Can't save the dealer tables to %s (%s); keeping them in memory.",
+                                   self.table_file, error)
+
+        # Stored as {shoe: {peeked: {upcard: probabilities}}} with string keys
+        tables = {}
+        for shoe, by_peek in stored[self.rules].items():
+            composition_key = None if shoe == "infinite" else int(shoe)
+            for peeked, by_upcard in by_peek.items():
+                for upcard, probabilities in by_upcard.items():
+                    tables[(composition_key, peeked == "peeked", int(upcard))] = tuple(probabilities)
+        return tables
+
+    def _build_tables(self):
+
+        """Computes the infinite-deck and fresh 1-8 deck tables for every upcard."""
+
+        built = {}
+        for shoe in ["infinite"] + [str(n) for n in range(1, 9)]:
+            built[shoe] = {}
+            for peeked in (False, True):
+                by_upcard = {}
+                for upcard in range(1, 11):
+                    composition = None if shoe == "infinite" else remove_card(fresh_composition(int(shoe)), upcard)
+                    by_upcard[str(upcard)] = compute_dealer_outcomes(upcard, composition, self.rules, peeked)
+                built[shoe]["peeked" if peeked else "unpeeked"] = by_upcard
+        return built
+
+    def outcome_probabilities(self, upcard, composition=None, peeked=False):
+
+        """
+        Returns the (17, 18, 19, 20, 21, bust) probabilities for an upcard rank (1-10)
+        and the remaining composition (upcard removed; None for an infinite deck).
+        """
+
+        # Infinite deck or a fresh shoe with only the upcard out: precomputed table
+        if composition is None:
+            return self._tables[(None, peeked, upcard)]
+        decks = (sum(composition) + 1) // 52
+        if 1 <= decks <= 8 and (sum(composition) + 1) % 52 == 0 and composition == remove_card(fresh_composition(decks), upcard):
+            return self._tables[(decks, peeked, upcard)]
+
+        key = (upcard, composition, self.rules, peeked)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return cached
+
+        self.misses += 1
+        result = compute_dealer_outcomes(upcard, composition, self.rules, peeked)
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False) # Evict the least recently used entry
+        return result
+
+    def bust_probability(self, upcard, composition=None, peeked=False):
+
+        """Returns the probability that the dealer busts."""
+
+        return self.outcome_probabilities(upcard, composition, peeked)[BUST]
@@ -0,0 +1,204 @@
+import sys
+import time
+from dealer_odds import DealerOutcomeEngine, INFINITE_PROBS, BUST, fresh_composition, remove_card, card_rank
+from cards import CARDS_STRINGS
+from common import HIT, STAND, SPLIT # The actions the solver evaluates
+from table_state import MAX_HANDS
+
+
+def stand_ev(score, dealer_probabilities):
+
+    """EV of standing on `score` against a dealer final-outcome distribution (17, 18, 19, 20, 21, bust)."""
+
+    ev = dealer_probabilities[BUST]
+    for index in range(5):
+        dealer_score = 17 + index
+        if dealer_score < score:
+            ev += dealer_probabilities[index]
+        elif dealer_score > score:
+            ev -= dealer_probabilities[index]
+    return ev
+
+
+class EVSolver:
+
+    """
+    Expectimax EV solver for hit / stand / split decisions.
+
+    Hands are given as lists of ranks (1 = Ace, 10 = any ten-valued card) and the dealer
+    upcard as a rank; use dealer_odds.card_rank to convert encoded cards. With a remaining
+    shoe composition the player's draws are exact (composition-dependent). The dealer's
+    distribution is taken for the composition at the moment of the decision (the player's
+    later hits don't feed back into it), and it's conditioned on the dealer not having a
+    natural, since naturals settle the round before anyone acts.
+
+    Splits follow BlackjackLogic: the pair becomes two one-card hands that are played on
+    (a one-card hand may hit or stand) and may be split again while fewer than four hands
+    are in play. The two split hands are valued independently.
+
+    Values are memoized in a transposition table keyed on the decision context (upcard and
+    dealer distribution) and the hand state, shared across calls.
+    """
+
+    def __init__(self, dealer_engine=None):
+        self.dealer_engine = dealer_engine if dealer_engine is not None else DealerOutcomeEngine()
+        self._table = {} # Transposition table: (context, hard, has_ace, lone, hands, composition) -> value
+
+    def _dealer_probabilities(self, upcard, composition):
+        return self.dealer_engine.outcome_probabilities(upcard, composition, peeked=True)
+
+    def _draws(self, composition):
+
+        """Yields (rank, probability, composition after the draw)."""
+
+        if composition is None:
+            for index, p in enumerate(INFINITE_PROBS):
+                yield index + 1, p, None
+            return
+
+        total = sum(composition)
+        for index, count in enumerate(composition):
+            if count:
+                yield index + 1, count / total, composition[:index] + (count - 1,) + composition[index + 1:]
+
+    def _hit_ev(self, context, dealer_probabilities, hard, has_ace, lone, hands, composition):
+
+        """EV of taking one card and then playing on optimally."""
+
+        ev = 0.0
+        for rank, p, rest in self._draws(composition):
+            new_hard = hard + rank
+            if new_hard > 21:
+                ev -= p
+                continue
+            # A one-card hand that draws its own rank becomes a splittable pair
+            pair = lone if lone == rank else 0
+            ev += p * self._value(context, dealer_probabilities, new_hard, has_ace or rank == 1, 0, pair, hands, rest)
+        return ev
+
+    def _split_ev(self, context, dealer_probabilities, rank, hands, composition):
+
+        """EV of splitting a pair of `rank`: two one-card hands, valued independently."""
+
+        one_hand = self._value(context, dealer_probabilities, rank, rank == 1, rank, 0, hands + 1, composition)
+        return 2 * one_hand
+
+    def _value(self, context, dealer_probabilities, hard, has_ace, lone, pair, hands, composition):
+
+        """Value of a hand under optimal play: max over the legal actions."""
+
+        key = (context, hard, has_ace, lone, pair, hands, composition)
+        cached = self._table.get(key)
+        if cached is not None:
+            return cached
+
+        score = hard + 10 if has_ace and hard <= 11 else hard
+        best = stand_ev(score, dealer_probabilities)
+        if score < 21:
+            best = max(best, self._hit_ev(context, dealer_probabilities, hard, has_ace, lone, hands, composition))
+        if pair and hands < MAX_HANDS:
+            best = max(best, self._split_ev(context, dealer_probabilities, pair, hands, composition))
+
+        self._table[key] = best
+        return best
+
+    def action_evs(self, hand, upcard, composition=None, hands=1):
+
+        """
+        Returns {action: EV} for every legal action on `hand` (ranks) against `upcard` (rank).
+
+        `composition` is the remaining shoe as counts of ranks 1-10 (player cards and the
+        upcard already removed), or None for an infinite deck. `hands` is how many hands the
+        player already has in play (splits are legal while it is below four).
+        """
+
+        dealer_probabilities = self._dealer_probabilities(upcard, composition)
+        context = (upcard, dealer_probabilities)
+
+        hard = sum(hand)
+        has_ace = 1 in hand
+        score = hard + 10 if has_ace and hard <= 11 else hard
+        if hard > 21:
+            return {STAND: -1.0}
+
+        lone = hand[0] if len(hand) == 1 else 0
+        evs = {STAND: stand_ev(score, dealer_probabilities)}
+        if score < 21:
+            evs[HIT] = self._hit_ev(context, dealer_probabilities, hard, has_ace, lone, hands, composition)
+        if len(hand) == 2 and hand[0] == hand[1] and hands < MAX_HANDS:
+            evs[SPLIT] = self._split_ev(context, dealer_probabilities, hand[0], hands, composition)
+        return evs
+
+    def best_action(self, hand, upcard, composition=None, hands=1):
+
+        """Returns (action, EV) of the best action."""
+
+        evs = self.action_evs(hand, upcard, composition, hands)
+        action = max(evs, key=evs.get)
+        return action, evs[action]
+
+    def action_evs_for_cards(self, hand, upcard, composition=None, hands=1, card_encoding=CARDS_STRINGS):
+
+        """Same as action_evs, but takes encoded cards (e.g. straight from BlackjackLogic)."""
+
+        ranks = [card_rank(card, card_encoding) for card in hand]
+        return self.action_evs(ranks, card_rank(upcard, card_encoding), composition, hands)
+
+    def basic_strategy_chart(self, num_decks=None):
+
+        """
+        Builds a basic-strategy chart for a fresh shoe of `num_decks` decks (None for an
+        infinite deck). Returns {"hard": {total: {upcard: action}}, "soft": ..., "pairs": ...}.
+        """
+
+        rows = {"hard": {}, "soft": {}, "pairs": {}}
+        for total in range(5, 20):
+            # Two-card non-pair hands that make each hard total
+            rows["hard"][total] = [2, total - 2] if total < 12 else [total - 10, 10]
+        for total in range(13, 21):
+            rows["soft"][total] = [1, total - 11]
+        for rank in range(1, 11):
+            rows["pairs"][rank] = [rank, rank]
+
+        chart = {}
+        for section, hands in rows.items():
+            chart[section] = {}
+            for label, hand in hands.items():
+                chart[section][label] = {}
+                for upcard in range(1, 11):
+                    composition = None
+                    if num_decks is not None:
+                        composition = fresh_composition(num_decks)
+                        for rank in hand + [upcard]:
+                            composition = remove_card(composition, rank)
+                    action, _ = self.best_action(hand, upcard, composition)
+                    chart[section][label][upcard] = action.upper()
+        return chart
+
+
+def format_chart(chart):
+
+    """Formats a basic-strategy chart as text, one row per hand and one column per upcard."""
+
+    upcards = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "A"]
+    lines = []
+    for section, rows in chart.items():
+        lines.append(f"{section.upper():>6} | " + " ".join(f"{upcard:>2}" for upcard in upcards))
+        for label, by_upcard in rows.items():
+            ordered = [by_upcard[rank] for rank in range(2, 11)] + [by_upcard[1]]
+            name = "A" if section == "pairs" and label == 1 else str(label)
+            lines.append(f"{name:>6} | " + " ".join(f"{action:>2}" for action in ordered))
+        lines.append("")
+    return "\n".join(lines)
+
+
+# --- To print a basic-strategy chart: python ev_solver.py [decks] ---
+if __name__ == "__main__":
+    decks = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    start = time.perf_counter()
+    strategy = EVSolver().basic_strategy_chart(decks)
+    elapsed = time.perf_counter() - start
+
+    print(format_chart(strategy))
+    print(f"Generated in {elapsed:.2f}s")
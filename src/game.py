@@ -3,17 +3,22 @@ import json
 import time
 import os
 from logic import BlackjackLogic
+from cards import CARDS_IDS, decode
+from state_machine import RoundStateMachine, PHASE_PLAYER, PHASE_DEALER, NEXT, HIT, SPLIT
 
 
 class BlackjackGame:
 
     """
     Text-based interface for the Blackjack game.
-    Uses the BlackjackLogic class to manage game.
+    Uses the BlackjackLogic class to manage game, stepped by a RoundStateMachine.
+    The game plays its own table (`table_id`), apart from other BlackjackLogic users.
     """
 
-    def __init__(self):
-        self.logic = BlackjackLogic()
+    def __init__(self, instrumentation=None, history=None, table_id="game"):
+        self.logic = BlackjackLogic(card_encoding=CARDS_IDS, instrumentation=instrumentation, history=history,
+                                    table_id=table_id)
+        self.machine = RoundStateMachine(self.logic)
 
     def _get_player_input(self, prompt, valid_options=None):
 
@@ -50,10 +55,17 @@ class BlackjackGame:
                 print(f"Player {added_count + 1} ({player_name}) has been added to the game.")
                 added_count += 1
 
+    def card_names(self, hand):
+
+        """Turns a hand of compact card ids into [rank, suit] lists for display."""
+
+        return [decode(card) for card in hand]
+
     def display_hand(self, name, hand, score):
 
         """Prints a hand and score."""
 
+        hand = self.card_names(hand)
         if name == "dealer" and len(hand) == 2:
             print(f"Dealer's hand: {hand[0]} + ? | Score: ?")
         else:
@@ -61,64 +73,36 @@ class BlackjackGame:
 
     def player_turn(self, player_name):
 
-        """Manages a single player's turn, including potential splits."""
+        """Prompts a player for every hand the state machine hands them, including split hands."""
 
         print(f"\n--- {player_name}'s Turn ---")
-        player_status = self.logic.get_overall_player_status(player_name)
-
-        if player_status == "busted":
-            print(f"{player_name} already busted.")
-            return
-        if player_status == "stood":
-            print(f"{player_name} already stood.")
-            return
-
-        num_hands = self.logic.get_num_hands(player_name)
-
-        for i in range(1, num_hands + 1):
-            if self.logic.is_turn_played(player_name, i):
-                continue
-
-            hand, score = self.logic.get_hand_details(player_name, i)
-            self.display_hand(player_name, hand, score)
-            dealer_hand, _ = self.logic.get_hand_details("dealer")
-            self.display_hand("dealer", dealer_hand, 0)
+        machine = self.machine
 
-            if self.logic.is_player_busted(player_name, i):
-                print(f"{player_name}, Hand {i} busted with score {score}.")
-                self.logic.set_turn_played(player_name, i)
-                continue
+        while machine.phase == PHASE_PLAYER and machine.player == player_name:
+            i = machine.hand
+            table = self.logic.snapshot()
+            hand = table.hand(player_name, i)
+            self.display_hand(player_name, hand.cards, hand.score)
+            self.display_hand("dealer", table.dealer.cards, 0)
 
-            if self.logic.can_split(player_name, i):
+            if SPLIT in machine.legal_actions():
                 split_choice = self._get_player_input("You have a pair! Do you want to split this hand? (y/n): ", ['y', 'n'])
                 if split_choice == 'y':
-                    if self.logic.split_hand(player_name, i):
-                        print(f"Hand {i} split. You now have {self.logic.get_num_hands(player_name)} hands.")
-                        self.player_turn(player_name)
-                        return
-
-            turn_over = False
-            while not turn_over:
-                action = self._get_player_input(f"Hand {i}: Do you want to hit or stand? (h/s): ", ['h', 's'])
-
-                if action == 'h':
-                    if self.logic.player_hit(player_name, i):
-                        hand, score = self.logic.get_hand_details(player_name, i)
-                        self.display_hand(player_name, hand, score)
-                        if self.logic.is_player_busted(player_name, i):
-                            self.logic.get_hand_details(player_name, i) # Mark this hand's turn as played
-                            print(f"{player_name}, busted with Hand {i}: {hand} with score {score}.")
-                            turn_over = True
-                    else:
-                        print(f"Error occurred.")
-                        turn_over = True
-                elif action == 's':
-                    hand, score = self.logic.get_hand_details(player_name, i)
-
-                    print(f"You chose to stand on Hand {i}. Your final hand: {hand} | Score: {score}")
-                    turn_over = True # End turn for this hand
-
-            self.logic.set_turn_played(player_name, i) # Mark this hand's turn as played
+                    machine.apply(SPLIT)
+                    print(f"Hand {i} split. You now have {len(self.logic.snapshot().players[player_name].hands)} hands.")
+                    continue
+
+            action = self._get_player_input(f"Hand {i}: Do you want to hit or stand? (h/s): ", ['h', 's'])
+            machine.apply(action)
+            hand = self.logic.snapshot().hand(player_name, i)
+
+            if action == HIT:
+                if hand.bust:
+                    print(f"{player_name}, busted with Hand {i}: {self.card_names(hand.cards)} with score {hand.score}.")
+                elif hand.score == 21:
+                    print(f"{player_name}, Hand {i} reached 21: {self.card_names(hand.cards)}")
+            else:
+                print(f"You chose to stand on Hand {i}. Your final hand: {self.card_names(hand.cards)} | Score: {hand.score}")
 
 
     def play_game(self):
@@ -126,43 +110,47 @@ class BlackjackGame:
         """Main game loop for the text-based Blackjack."""
 
         self.setup_players()
-        self.logic.initial_deal()
+        machine = self.machine
 
         print("\n--- Initial Deal ---")
+        machine.apply(NEXT)
 
-        natural_winners = self.logic.check_natural_winners()
-        if natural_winners:
+        if machine.naturals:
             print("\n--- Natural Blackjacks! ---")
-            for winner in natural_winners:
-                hand, score = self.logic.get_hand_details(winner)
-                print(f"{winner} wins with a natural blackjack! Hand: {hand} | Score: {score}")
-
-            print("Game ends due to natural blackjacks.")
-            self.logic.reset_game_data() # Reset for a new game
-            return
+            table = self.logic.snapshot()
+            for winner in machine.naturals:
+                hand = table.hand(winner)
+                print(f"{winner} has a natural blackjack! Hand: {self.card_names(hand.cards)} | Score: {hand.score}")
+            if "dealer" in machine.naturals:
+                print("The dealer's natural ends the round.")
 
         # Player turns
-        for player_name in self.logic.get_all_player_names():
-            if self.logic.get_overall_player_status(player_name) not in ["busted", "stood"]:
-                self.player_turn(player_name)
+        while machine.phase == PHASE_PLAYER:
+            if self.logic.instrumentation is not None:
+                with self.logic.instrumentation.phase("player_turn"):
+                    self.player_turn(machine.player)
+            else:
+                self.player_turn(machine.player)
 
         # Dealer's turn
-        print("\n--- Dealer's Turn ---")
-        self.logic.dealer_turn()
-        final_dealer_hand, final_dealer_score = self.logic.get_hand_details("dealer")
-        self.display_hand("dealer", final_dealer_hand, final_dealer_score)
-        if self.logic.is_dealer_busted():
-            print("Dealer busted!")
+        if machine.phase == PHASE_DEALER:
+            print("\n--- Dealer's Turn ---")
+            machine.apply(NEXT)
+            dealer = self.logic.snapshot().dealer
+            self.display_hand("dealer", dealer.cards, dealer.score)
+            if dealer.bust:
+                print("Dealer busted!")
 
         # Determine and display results
         print("\n--- Game Results ---")
-        results = self.logic.get_game_results()
-        dealer_final_hand, dealer_final_score = self.logic.get_hand_details("dealer")
-        print(f"Dealer's final hand: {dealer_final_hand} | Score: {dealer_final_score}")
+        machine.apply(NEXT)
+        results = machine.results
+        table = self.logic.snapshot()
+        print(f"Dealer's final hand: {self.card_names(table.dealer.cards)} | Score: {table.dealer.score}")
 
         for player, hand_outcomes in results.items():
             for hand_num, outcome in hand_outcomes.items():
-                player_hand, player_score = self.logic.get_hand_details(player, hand_num)
+                hand = table.hand(player, hand_num)
                 status_text = ""
                 if outcome == 1:
                     status_text = "wins"
@@ -170,7 +158,7 @@ class BlackjackGame:
                     status_text = "loses"
                 else: # 0.5
                     status_text = "ties"
-                print(f"{player} (Hand {hand_num}): {player_hand} | Score: {player_score} - {status_text}!")
+                print(f"{player} (Hand {hand_num}): {self.card_names(hand.cards)} | Score: {hand.score} - {status_text}!")
 
         print("\nGame Over!")
         self.logic.reset_game_data() # Reset for a new game
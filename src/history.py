@@ -0,0 +1,391 @@
+import argparse
+import glob
+import json
+import os
+import struct
+import sys
+from cards import CARDS_STRINGS, encode, decode
+from journal import EVENT_ROUND, EVENT_HIT, EVENT_SPLIT, EVENT_TURN, EVENT_NATURALS, EVENT_SETTLE
+
+# Hand-history file formats
+FORMAT_BINARY = "binary" # Length-prefixed binary records (see HandHistory)
+FORMAT_JSONL = "jsonl"   # One compact JSON record per line
+FORMATS = (FORMAT_BINARY, FORMAT_JSONL)
+EXTENSIONS = {FORMAT_BINARY: ".bjh", FORMAT_JSONL: ".jsonl"}
+
+MAGIC = b"BJH1"
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_ROUND = struct.Struct("<QIH") # round, shoe number, shoe position
+_READ_SIZE = 1 << 16 # Read buffer when scanning files
+
+# Outcomes (0 loss, 0.5 push, 1 win) are stored as 0, 1, 2
+_OUTCOME_CODES = {0: 0, 0.5: 1, 1: 2}
+_OUTCOMES = (0, 0.5, 1)
+
+
+def history_files(path, fmt=FORMAT_BINARY):
+
+    """Returns the rotated files of a hand history, oldest first: <path>.00000.bjh, <path>.00001.bjh, ..."""
+
+    return sorted(glob.glob(f"{glob.escape(path)}.[0-9][0-9][0-9][0-9][0-9]{EXTENSIONS[fmt]}"))
+
+
+class HandHistory:
+
+    """
+    Append-only sink for settled rounds, written to rotating files.
+
+    Pass it to BlackjackLogic(history=...) and every round that reaches
+    get_game_results is appended as a record:
+    {"round", "table", "shoe", "position", "dealer", "dealer_natural",
+     "players": [{"name", "natural", "hands": [{"cards", "actions", "outcome"}]}]}
+    `shoe` counts the shoe's reshuffles and `position` is how many cards had been
+    dealt from it when the round started, so with the seed kept in `metadata` a
+    round can be dealt again. `actions` is a string of HIT / SPLIT / STAND codes
+    ("h", "p", "s") and `outcome` is the final one, with natural blackjacks
+    already paid as wins. Cards are in the table's encoding.
+
+    Files are named <path>.NNNNN.bjh (or .jsonl) and a new one is started once a
+    file reaches `max_bytes`; a writer never appends to an existing file, so
+    restarting continues with the next number. Records go through a fixed-size
+    write buffer, so memory stays bounded however long the run.
+
+    Every file starts with a JSON header (`metadata` plus the card encoding): the
+    first line of a JSONL file, or MAGIC and a length-prefixed header in a binary
+    file, which is followed by length-prefixed records. Cards take one
+    byte (string cards are stored as 0-51 ids); names are UTF-8 with a 2-byte length prefix.
+    A record cut short by a crash is dropped on reading.
+    """
+
+    def __init__(self, path, fmt=FORMAT_BINARY, max_bytes=64 * 1024 * 1024, metadata=None, buffer_size=1 << 16):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown hand-history format: {fmt!r}. Use one of: {', '.join(FORMATS)}.")
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive.")
+        self.path = path
+        self.fmt = fmt
+        self.max_bytes = max_bytes
+        self.metadata = dict(metadata or {})
+        self.buffer_size = buffer_size
+        self.records = 0
+        self.files = []
+        self._file = None
+        self._size = 0
+        self._card_encoding = None
+        existing = history_files(path, fmt)
+        self._index = int(existing[-1][len(path) + 1:len(path) + 6]) + 1 if existing else 0
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        name = f"{self.path}.{self._index:05d}{EXTENSIONS[self.fmt]}"
+        self._index += 1
+        self._file = open(name, "xb", buffering=self.buffer_size)
+        self.files.append(name)
+        self._size = 0
+        header = json.dumps(dict(self.metadata, card_encoding=self._card_encoding), separators=(",", ":")).encode()
+        if self.fmt == FORMAT_BINARY:
+            header = MAGIC + _U32.pack(len(header)) + header
+        else:
+            header += b"\n"
+        self._file.write(header)
+        self._size = len(header)
+
+    def write(self, record, card_encoding):
+
+        """Appends one round record, starting a new file first if the current one is full."""
+
+        if self._card_encoding is None:
+            self._card_encoding = card_encoding
+        if self._file is None:
+            self._open()
+
+        if self.fmt == FORMAT_BINARY:
+            body = self._pack(record, card_encoding)
+            data = _U32.pack(len(body)) + body
+        else:
+            data = json.dumps(record, separators=(",", ":")).encode() + b"\n"
+        self._file.write(data)
+        self._size += len(data)
+        self.records += 1
+
+        if self._size >= self.max_bytes:
+            self._file.close()
+            self._file = None
+
+    def _pack(self, record, card_encoding):
+
+        """Encodes a record as a binary body."""
+
+        strings = card_encoding == CARDS_STRINGS
+
+        def pack_cards(hand):
+            return bytes([len(hand)]) + bytes(encode(card) for card in hand) if strings else bytes([len(hand)]) + bytes(hand)
+
+        def pack_text(text):
+            text = (text or "").encode()
+            return _U16.pack(len(text)) + text
+
+        parts = [_ROUND.pack(record["round"], record["shoe"], record["position"]), pack_text(record["table"]),
+                 bytes([record["dealer_natural"]]), pack_cards(record["dealer"]), bytes([len(record["players"])])]
+        for player in record["players"]:
+            parts.append(pack_text(player["name"]))
+            parts.append(bytes([player["natural"], len(player["hands"])]))
+            for hand in player["hands"]:
+                parts.append(pack_cards(hand["cards"]))
+                parts.append(pack_text(hand["actions"]))
+                parts.append(bytes([_OUTCOME_CODES[hand["outcome"]]]))
+        return b"".join(parts)
+
+    def flush(self):
+
+        """Pushes buffered records to the operating system."""
+
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RoundRecorder:
+
+    """
+    Collects one table's round as BlackjackLogic records its events and hands the
+    settled round to a HandHistory. Each BlackjackLogic has its own recorder, so
+    several tables can share a HandHistory.
+    """
+
+    def __init__(self, history):
+        self.history = history
+        self.round = 0
+        self.shoe = 0
+        self.position = 0
+        self.actions = {}
+        self.naturals = ()
+
+    def observe(self, logic, event, arguments):
+        if event == EVENT_ROUND:
+            self.round += 1
+            self.shoe = logic.shoe.shuffles
+            self.position = logic.shoe.size - logic.shoe.remaining()
+            self.actions = {}
+            self.naturals = ()
+        elif event == EVENT_HIT or event == EVENT_SPLIT:
+            key = (arguments[0], arguments[1])
+            self.actions[key] = self.actions.get(key, "") + ("h" if event == EVENT_HIT else "p")
+        elif event == EVENT_TURN:
+            player_name, hand_number, stood = arguments
+            if stood: # Not for hands that ended on a bust or a 21
+                key = (player_name, hand_number)
+                self.actions[key] = self.actions.get(key, "") + "s"
+        elif event == EVENT_NATURALS:
+            # Right after the deal, only naturals have stood
+            players = logic.get_state().players
+            self.naturals = tuple(name for name in logic.players if players[name].stood == 1)
+        elif event == EVENT_SETTLE:
+            self.history.write(self._record(logic, arguments[0]), logic.card_encoding)
+
+    def _record(self, logic, results):
+        data = logic.get_state()
+        dealer = data.dealer
+        dealer_natural = dealer.score == 21 and len(dealer.cards) == 2
+        players = []
+        for player_name, outcomes in results.items():
+            player_hands = data.players[player_name].hands
+            natural = player_name in self.naturals
+            hands = []
+            for hand_number, outcome in outcomes.items():
+                if natural and not dealer_natural:
+                    outcome = 1 # A player natural wins outright unless the dealer also has one
+                hands.append({"cards": list(player_hands[hand_number - 1].cards),
+                              "actions": self.actions.get((player_name, hand_number), ""),
+                              "outcome": outcome})
+            players.append({"name": player_name, "natural": natural, "hands": hands})
+
+        return {
+            "round": self.round,
+            "table": logic.table_id,
+            "shoe": self.shoe,
+            "position": self.position,
+            "dealer": list(dealer.cards),
+            "dealer_natural": dealer_natural,
+            "players": players
+        }
+
+
+def _unpack(body, strings):
+
+    """Decodes a binary record body."""
+
+    round_number, shoe, position = _ROUND.unpack_from(body)
+    offset = _ROUND.size
+
+    def take_cards():
+        nonlocal offset
+        end = offset + 1 + body[offset]
+        hand = body[offset + 1:end]
+        offset = end
+        return [decode(card) for card in hand] if strings else list(hand)
+
+    def take_text():
+        nonlocal offset
+        start = offset + _U16.size
+        end = start + _U16.unpack_from(body, offset)[0]
+        text = body[start:end].decode()
+        offset = end
+        return text
+
+    table = take_text() or None
+    dealer_natural = bool(body[offset])
+    offset += 1
+    dealer = take_cards()
+    num_players = body[offset]
+    offset += 1
+
+    players = []
+    for _ in range(num_players):
+        name = take_text()
+        natural, num_hands = body[offset], body[offset + 1]
+        offset += 2
+        hands = []
+        for _ in range(num_hands):
+            hand = take_cards()
+            actions = take_text()
+            hands.append({"cards": hand, "actions": actions, "outcome": _OUTCOMES[body[offset]]})
+            offset += 1
+        players.append({"name": name, "natural": bool(natural), "hands": hands})
+
+    return {
+        "round": round_number,
+        "table": table,
+        "shoe": shoe,
+        "position": position,
+        "dealer": dealer,
+        "dealer_natural": dealer_natural,
+        "players": players
+    }
+
+
+def _read_header(file, file_name):
+    if file_name.endswith(EXTENSIONS[FORMAT_JSONL]):
+        return json.loads(file.readline())
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{file_name} is not a binary hand-history file.")
+    (length,) = _U32.unpack(file.read(_U32.size))
+    return json.loads(file.read(length))
+
+
+def read_header(file_name):
+
+    """Returns the JSON header (metadata and card encoding) of a hand-history file."""
+
+    with open(file_name, "rb") as file:
+        return _read_header(file, file_name)
+
+
+def _read_binary(file_name):
+    with open(file_name, "rb", buffering=_READ_SIZE) as file:
+        strings = _read_header(file, file_name).get("card_encoding") == CARDS_STRINGS
+        while True:
+            prefix = file.read(_U32.size)
+            if len(prefix) < _U32.size:
+                return # End of file, or a length cut short by a crash
+            (length,) = _U32.unpack(prefix)
+            body = file.read(length)
+            if len(body) < length:
+                return # Record cut short by a crash
+            yield _unpack(body, strings)
+
+
+def _read_jsonl(file_name):
+    with open(file_name, "rb", buffering=_READ_SIZE) as file:
+        _read_header(file, file_name)
+        for line in file:
+            if not line.endswith(b"\n"):
+                return # Line cut short by a crash
+            yield json.loads(line)
+
+
+def read_history(path, fmt=FORMAT_BINARY):
+
+    """
+    Yields the records of a hand history one at a time, across all its rotated
+    files in order, so a scan keeps only one record in memory. Outcomes of split
+    hands and naturals are as described in HandHistory.
+    """
+
+    read = _read_binary if fmt == FORMAT_BINARY else _read_jsonl
+    for file_name in history_files(path, fmt):
+        yield from read(file_name)
+
+
+def iter_hands(path, fmt=FORMAT_BINARY):
+
+    """Yields one (record, player, hand) per player hand in a hand history."""
+
+    for record in read_history(path, fmt):
+        for player in record["players"]:
+            for hand in player["hands"]:
+                yield record, player, hand
+
+
+def summarize(path, fmt=FORMAT_BINARY, blackjack_payout=1.5):
+
+    """Scans a hand history and returns round / hand counts, outcome counts and the net win in initial bets."""
+
+    rounds = hands = wins = losses = pushes = 0
+    net = 0.0
+    for record in read_history(path, fmt):
+        rounds += 1
+        for player in record["players"]:
+            for hand in player["hands"]:
+                hands += 1
+                if hand["outcome"] == 1:
+                    wins += 1
+                    net += blackjack_payout if player["natural"] and not record["dealer_natural"] else 1
+                elif hand["outcome"] == 0:
+                    losses += 1
+                    net -= 1
+                else:
+                    pushes += 1
+    return {
+        "rounds": rounds,
+        "hands": hands,
+        "wins": wins,
+        "losses": losses,
+        "pushes": pushes,
+        "net": net,
+        "ev_per_hand": net / hands if hands else 0.0
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a hand history.")
+    parser.add_argument("path", help="history path prefix (files are <path>.NNNNN.bjh / .jsonl)")
+    parser.add_argument("--format", choices=FORMATS, default=FORMAT_BINARY)
+    parser.add_argument("--payout", type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    files = history_files(args.path, args.format)
+    if not files:
+        print(f"No {args.format} hand-history files at {args.path}")
+        return 1
+    for key, value in summarize(args.path, args.format, args.payout).items():
+        print(f"{key}: {value}")
+    return 0
+
+
+# --- python history.py PATH [--format binary|jsonl] ---
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("blackjack.instrumentation")
+
+# Methods of BlackjackLogic timed as round phases
+TIMED_PHASES = ["initial_deal", "dealer_turn", "get_game_results"]
+
+
+class Instrumentation:
+
+    """
+    Opt-in counters and timers for BlackjackLogic.
+
+    Pass an instance as BlackjackLogic(instrumentation=...). It counts get_data /
+    _save_data calls and bytes read from / written to the data file, and times
+    initial_deal, dealer_turn, get_game_results and shoe shuffles. Player turns
+    are timed by the driver (game, simulator) through phase("player_turn").
+
+    Snapshots also include the compare-and-swap and lock contention counters of
+    the instance's store (see StateStore.contention).
+
+    Everything is hooked in by wrapping the methods of that one BlackjackLogic
+    instance, so an uninstrumented instance runs exactly the original code.
+
+    If `log_every` is set, a snapshot is logged every `log_every` rounds (a round
+    ends at get_game_results).
+    """
+
+    def __init__(self, log_every=None):
+        self.log_every = log_every
+        self.store = None
+        self.reset()
+
+    def reset(self):
+
+        """Zeroes every counter and timer."""
+
+        self.rounds = 0
+        self.counters = {
+            "get_data_calls": 0,
+            "save_data_calls": 0,
+            "bytes_read": 0,
+            "bytes_written": 0
+        }
+        self.timers = {} # name -> [count, total seconds, max seconds]
+
+    def add_time(self, name, seconds):
+
+        """Records one timed run of `name`."""
+
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [1, seconds, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+            if seconds > timer[2]:
+                timer[2] = seconds
+
+    @contextmanager
+    def phase(self, name):
+
+        """Context manager that times a block as phase `name`."""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def timed(self, name, method):
+
+        """Returns `method` wrapped so every call is timed as `name`."""
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.add_time(name, time.perf_counter() - start)
+        return timed
+
+    def _counted(self, counter, method):
+        counters = self.counters
+        def counted(*args, **kwargs):
+            counters[counter] += 1
+            return method(*args, **kwargs)
+        return counted
+
+    def attach(self, logic):
+
+        """Wraps the methods of one BlackjackLogic instance (called by BlackjackLogic.__init__)."""
+
+        self.store = logic.store
+        logic.get_data = self._counted("get_data_calls", logic.get_data)
+        logic._save_data = self._counted("save_data_calls", logic._save_data)
+        for name in TIMED_PHASES:
+            setattr(logic, name, self.timed(name, getattr(logic, name)))
+        logic.shoe.reshuffle = self.timed("shuffle", logic.shoe.reshuffle)
+
+        get_game_results = logic.get_game_results
+        def end_of_round(*args, **kwargs):
+            results = get_game_results(*args, **kwargs)
+            self.end_round()
+            return results
+        logic.get_game_results = end_of_round
+
+    def end_round(self):
+
+        """Counts a finished round and logs a snapshot every `log_every` rounds."""
+
+        self.rounds += 1
+        if self.log_every and self.rounds % self.log_every == 0:
+            logger.info(self.format_line())
+
+    def snapshot(self):
+
+        """Returns the counters and timers as a plain dictionary."""
+
+        timers = {}
+        for name, (count, total, longest) in self.timers.items():
+            timers[name] = {
+                "count": count,
+                "total_ms": total * 1000,
+                "mean_us": total / count * 1e6,
+                "max_us": longest * 1e6
+            }
+        contention = dict(self.store.contention) if self.store is not None else {}
+        return {"rounds": self.rounds, "counters": dict(self.counters), "timers": timers, "contention": contention}
+
+    def format_line(self):
+
+        """Formats a snapshot as a single log line."""
+
+        snapshot = self.snapshot()
+        parts = [f"rounds={snapshot['rounds']}"]
+        parts += [f"{name}={value}" for name, value in snapshot["counters"].items()]
+        parts += [f"{name}.mean_us={timer['mean_us']:.1f}" for name, timer in snapshot["timers"].items()]
+        return " ".join(parts)
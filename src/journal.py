@@ -0,0 +1,145 @@
+import json
+import os
+from storage import replace_file
+
+# Event types written to the journal
+EVENT_RESET = "reset"
+EVENT_PLAYER = "player"
+EVENT_LEAVE = "leave"
+EVENT_ROUND = "round"
+EVENT_DEAL = "deal"
+EVENT_HIT = "hit"
+EVENT_STAND = "stand"
+EVENT_SPLIT = "split"
+EVENT_TURN = "turn"
+EVENT_NATURALS = "naturals"
+EVENT_DEALER_DRAW = "dealer_draw"
+EVENT_SETTLE = "settle"
+
+
+class GameJournal:
+
+    """
+    Append-only journal of game events with periodic snapshots.
+
+    Every event is one compact JSON line, [sequence number, event, *arguments], so
+    appending is cheap and a crash can at worst leave a partial last line, which
+    recovery drops. Lines are fsynced in batches of `fsync_every` events (and on
+    sync()).
+
+    A snapshot of the whole state is written atomically (temp file + rename) to
+    `<path>.snapshot` and then the journal is truncated. The snapshot records the
+    last sequence number it covers, so events left over from a crash between the
+    two steps are skipped instead of applied twice.
+    """
+
+    def __init__(self, path, fsync_every=64, snapshot_every=1000):
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.fsync_every = fsync_every
+        self.snapshot_every = snapshot_every
+        self.sequence = 0
+        self._unsynced = 0
+        self._since_snapshot = 0
+        self._file = None
+
+    def recover(self):
+
+        """
+        Reads the last snapshot and the journal tail. Returns (snapshot state or None,
+        list of (event, arguments) to replay on top of it), and opens the journal for appending.
+        """
+
+        snapshot = None
+        covered = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r") as file:
+                stored = json.load(file)
+            snapshot = stored["state"]
+            covered = stored["sequence"]
+        self.sequence = covered
+
+        events = []
+        valid_bytes = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as file:
+                for line in file:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("unterminated line")
+                        sequence, event, *arguments = json.loads(line)
+                    except ValueError:
+                        break # Partial line from a crash mid-append; nothing after it is valid
+                    valid_bytes += len(line)
+                    if sequence <= covered:
+                        continue # Already part of the snapshot
+                    events.append((event, arguments))
+                    self.sequence = sequence
+
+            # Cut off the partial line so later appends start on a clean line
+            if valid_bytes < os.path.getsize(self.path):
+                os.truncate(self.path, valid_bytes)
+        self._since_snapshot = len(events)
+
+        self._file = open(self.path, "a")
+        return snapshot, events
+
+    def _write(self, sequence, event, arguments):
+        self._file.write(json.dumps([sequence, event, *arguments], separators=(",", ":")) + "\n")
+
+    def append(self, event, arguments):
+
+        """Appends one event. It is fsynced once `fsync_every` events are pending."""
+
+        self.sequence += 1
+        self._write(self.sequence, event, arguments)
+        self._unsynced += 1
+        self._since_snapshot += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+
+        """Flushes and fsyncs every pending event."""
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def snapshot_due(self):
+
+        """True once `snapshot_every` events have been appended since the last snapshot."""
+
+        return self._since_snapshot >= self.snapshot_every
+
+    def write_snapshot(self, state):
+
+        """Atomically writes a snapshot of `state` covering every event so far, then truncates the journal."""
+
+        self.sync()
+        replace_file(self.snapshot_path, json.dumps({"sequence": self.sequence, "state": state}, separators=(",", ":")),
+                     durable=True)
+
+        self._file.close()
+        self._file = open(self.path, "w")
+        self._since_snapshot = 0
+
+    def close(self):
+
+        """Syncs and closes the journal."""
+
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def delete(self):
+
+        """Closes the journal and deletes it along with its snapshot."""
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for path in (self.path, self.snapshot_path):
+            if os.path.exists(path):
+                os.remove(path)
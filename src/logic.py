@@ -1,213 +1,702 @@
-import json
+import copy
+import logging
 import random
 import os
+import re
+import threading
+import time
+from contextlib import nullcontext
+import cards
+from shoe import Shoe
+from counting import CardCounter
+from history import RoundRecorder
+from storage import JsonFileStore, StateConflictError
+from table_state import TableState, TableSnapshot, PlayerState, Hand, MAX_HANDS
+from collections import deque
+from journal import (GameJournal, EVENT_RESET, EVENT_PLAYER, EVENT_LEAVE, EVENT_ROUND, EVENT_DEAL, EVENT_HIT, EVENT_STAND,
+                     EVENT_SPLIT, EVENT_TURN, EVENT_NATURALS, EVENT_DEALER_DRAW, EVENT_SETTLE)
+from cards import CARDS_STRINGS, CARDS_IDS, CARDS_RANKS, CARD_ENCODINGS
+
+logger = logging.getLogger("blackjack.logic")
 
 # Path To Database (JSON file)
 # Using a relative path for better portability
 FILE = "data.json"
 
+# Table ids name files (and rows), so they are restricted to safe characters
+TABLE_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+DEFAULT_TABLE_ID = "main" # Same default as SqliteStore
+
+# Persistence policies for the in-memory game state
+PERSIST_NONE = "none"          # Never touch the disk (simulation, tests)
+PERSIST_ROUND = "round"        # Flush once at the end of every round
+PERSIST_INTERVAL = "interval"  # Flush every `flush_interval_ms` if changed, written by a background thread
+PERSIST_JOURNAL = "journal"    # Append every event to `<data_file>.journal`, with periodic snapshots
+PERSIST_SHARED = "shared"      # Every change is a compare-and-swap against the store (several processes, one state)
+PERSIST_POLICIES = (PERSIST_NONE, PERSIST_ROUND, PERSIST_INTERVAL, PERSIST_JOURNAL, PERSIST_SHARED)
+
+# Methods that change the state; under PERSIST_SHARED each call is one compare-and-swap transaction,
+# under PERSIST_INTERVAL each call holds the lock the background writer serializes under
+SHARED_METHODS = ["reset_game_data", "add_player", "remove_player", "new_round", "add_card_to_hand",
+                  "remove_card_from_hand", "calculate_score", "initial_deal", "check_natural_winners", "player_hit",
+                  "player_stand", "dealer_turn", "split_hand", "set_turn_played", "get_game_results"]
+
+# Stored keys of the dealer's hand: (cards, score, bust flag, running hard total, ace count)
+DEALER_HAND_KEYS = ("dhand", "dscore", "dbust", "dhard", "daces")
+
+
+def table_file(table_id, data_file=FILE):
+
+    """Returns the data file of table `table_id`, next to `data_file` (data.json -> data.<table_id>.json)."""
+
+    if not isinstance(table_id, str) or not TABLE_ID_PATTERN.fullmatch(table_id):
+        raise ValueError(f"Invalid table id: {table_id!r}. Use 1-64 letters, digits, '_' or '-'.")
+    root, extension = os.path.splitext(data_file)
+    return f"{root}.{table_id}{extension}"
+
+
 class BlackjackLogic:
 
     """
     Purely logic class for Blackjack game.
     Manages game state, rules, and core mechanics.
+
+    The game state lives in memory, as a table_state.TableState, and is the source
+    of truth; it is converted to the stored dict layout only when it is written or
+    read. get_data returns a copy in that layout, get_state the live object and
+    snapshot an immutable view for display code. `store` (see storage.py) decides
+    where the state is written; by default that is the JSON file `data_file`.
+    `persistence` decides when it is written:
+    - PERSIST_NONE: never
+    - PERSIST_ROUND: at the end of every round (get_game_results / reset_game_data)
+    - PERSIST_INTERVAL: by a background thread that wakes every `flush_interval_ms` and
+      writes the state if it changed (even while the game waits for input), plus at
+      the end of every round; at most one interval of changes can be lost
+    - PERSIST_JOURNAL: every event (deal, hit, stand, split, dealer draw, settle...) is
+      appended to a journal (see journal.py) and fsynced in batches of `journal_fsync_every`,
+      with a snapshot every `journal_snapshot_every` events; on startup the state is
+      rebuilt by replaying the snapshot and the journal tail
+    - PERSIST_SHARED: for state shared by several processes. Every state-changing
+      call loads the latest stored state, applies the change and writes it with
+      compare_and_write; if another process wrote first, the call is retried on the
+      new state (up to `cas_retries` times, then StateConflictError). Reads see the
+      state as of the last change or refresh(). Each process deals from its own
+      shoe, so cards dealt by a retried call are burned. Contention is counted in
+      `store.contention`.
+
+    `rng` is the random source used for shuffling (anything with a `shuffle`
+    method, e.g. a `random.Random`); it defaults to the global `random` module.
+
+    `card_encoding` picks how cards are stored (see cards.py): CARDS_STRINGS keeps
+    the original [rank, suit] lists, CARDS_IDS and CARDS_RANKS use small ints in
+    an array('b') deck and score through a lookup table. Use cards.decode /
+    cards.decode_rank to turn encoded cards back into strings for display.
+
+    Cards are dealt from a Shoe of `num_decks` decks, reshuffled at the cut card
+    (`penetration`) between rounds; `buffered_shoe` pre-shuffles the next shoe.
+
+    `instrumentation` is an optional instrumentation.Instrumentation that counts
+    state I/O and times the round phases of this instance.
+
+    Every instance plays one table, named by `table_id` (DEFAULT_TABLE_ID unless
+    given): its state goes to the table's own file (see table_file) and journal,
+    never to `data_file` itself, so any number of tables can run side by side in
+    one or many processes; instances with the same id share one table. A custom
+    `store` that holds a table id (e.g. SqliteStore(path, table_id)) names the
+    table if `table_id` isn't given, and must match it if it is.
+    delete_table tears a table down and removes what it stored.
+
+    `count_system` (see counting.py) keeps a running and true count of the cards
+    dealt; `history` is a history.HandHistory that every settled round is streamed to.
     """
 
-    def __init__(self, data_file=FILE):
+    def __init__(self, data_file=FILE, persistence=PERSIST_ROUND, flush_interval_ms=500, rng=None, card_encoding=CARDS_STRINGS,
+                 num_decks=1, penetration=0.75, buffered_shoe=False, instrumentation=None,
+                 journal_fsync_every=64, journal_snapshot_every=1000, store=None, table_id=None, cas_retries=20,
+                 count_system=None, history=None):
+        if persistence not in PERSIST_POLICIES:
+            raise ValueError(f"Unknown persistence policy: {persistence!r}. Use one of: {', '.join(PERSIST_POLICIES)}.")
+        if card_encoding not in CARD_ENCODINGS:
+            raise ValueError(f"Unknown card encoding: {card_encoding!r}. Use one of: {', '.join(CARD_ENCODINGS)}.")
+
+        store_table_id = getattr(store, "table_id", None)
+        if table_id is None:
+            table_id = store_table_id if store_table_id is not None else DEFAULT_TABLE_ID
+        elif store_table_id is not None and store_table_id != table_id:
+            raise ValueError(f"Table id {table_id!r} doesn't match the store's table id {store_table_id!r}.")
+        data_file = table_file(table_id, data_file)
+        self.table_id = table_id
         self.data_file = data_file
-        self.deck = self.create_deck()
+        self.store = store if store is not None else JsonFileStore(data_file)
+        self.persistence = persistence
+        self.flush_interval = flush_interval_ms / 1000
+        self.rng = rng if rng is not None else random
+        self.card_encoding = card_encoding
+        # Lookup tables for the compact encodings (None for string cards)
+        self._hard_values = {CARDS_IDS: cards.ID_HARD_VALUES, CARDS_RANKS: cards.RANK_HARD_VALUES}.get(card_encoding)
+        self._rank_keys = {CARDS_IDS: cards.ID_RANK_KEYS, CARDS_RANKS: cards.RANK_RANK_KEYS}.get(card_encoding)
+        self.shoe = Shoe(num_decks, penetration, card_encoding, self.rng, buffered_shoe)
+        # Running / true count of the cards dealt, under a counting.SYSTEM_* tag system (None: not counted)
+        self.counter = CardCounter(self.shoe, count_system) if count_system is not None else None
         self.players = []  # List of player names
-        self._initialize_game_data() # Ensure data.json exists and is initialized
+        self._state = None # In-memory game state (a TableState)
+        self._revision = 0    # Bumped by every change to the state
+        self._snapshot = None # TableSnapshot of the current revision, built on demand
+        self._dirty = False # True if the in-memory state has changes not yet on disk
+        self._writer = None
+        self._lock = nullcontext() # An RLock under interval persistence, shared with the writer thread
+        if persistence == PERSIST_INTERVAL:
+            self._lock = threading.RLock()
+            for name in SHARED_METHODS:
+                setattr(self, name, self._locked(getattr(self, name)))
+            self._writer = _BackgroundWriter(self.store.write, self.flush_interval, self._serialize_if_dirty)
+        self._journal = None
+        self._replaying = False # True while journal events are being re-applied
+        self._replay_cards = None # Recorded cards deal_card hands out instead of the shoe's while replaying
+        if persistence == PERSIST_JOURNAL:
+            self._journal = GameJournal(f"{self.data_file}.journal", journal_fsync_every, journal_snapshot_every)
+        # Settled rounds go to a history.HandHistory sink, if given
+        self._recorder = RoundRecorder(history) if history is not None else None
+        self.cas_retries = cas_retries
+        self._version = 0 # Stored version the in-memory state is based on (shared persistence)
+        self._in_transaction = False
+        self._transaction_events = [] # Events of the current transaction attempt, recorded once it commits
+        if persistence == PERSIST_SHARED:
+            for name in SHARED_METHODS:
+                setattr(self, name, self._transactional(getattr(self, name)))
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.attach(self)
+        self._initialize_game_data() # Ensure the game state exists and is initialized
 
     def _initialize_game_data(self):
 
-        """Initializes the data.json file if it doesn't exist or is empty."""
+        """Loads the game state from the store, or initializes it if missing, empty or invalid."""
+
+        if self.persistence == PERSIST_NONE:
+            self.reset_game_data() # Purely in-memory, never read from disk
+        elif self.persistence == PERSIST_JOURNAL:
+            self._recover_from_journal()
+        elif self.persistence == PERSIST_SHARED:
+            self.refresh()
+            # A missing or invalid state is created only if no other process created one first
+            if self._dirty and self.store.compare_and_write(self.store.serialize(self._state.to_dict()), self._version) is None:
+                self.refresh()
+            self._dirty = False
+        else:
+            problem = None # Why a stored state can't be used (a missing one just starts a new table)
+            try:
+                data = self.store.load()
+                state = TableState.from_dict(data) if self._is_valid_state(data) else None
+                if state is None and data is not None:
+                    problem = "missing keys"
+            except (ValueError, KeyError, TypeError) as error: # Corrupt JSON, or fields of the wrong type
+                state, problem = None, error
+            if self.instrumentation is not None:
+                self.instrumentation.counters["bytes_read"] += self.store.bytes_read
+
+            if state is not None:
+                self._state = state
+                self.players = list(state.players) # Seat order is preserved by the store
+                self._changed()
+            else:
+                if problem is not None:
+                    logger.warning("Stored state of table %s is invalid (%s); starting an empty table.", self.table_id, problem)
+                self.reset_game_data()
+
+    def _is_valid_state(self, data):
+
+        """Basic validation of a loaded state: ensure essential keys exist."""
 
-        if not os.path.exists(self.data_file) or os.path.getsize(self.data_file) == 0:
-            self.reset_game_data() # Use a dedicated reset method for clarity
+        return (data is not None and "num_players" in data and "players_data" in data
+                and all(key in data for key in DEALER_HAND_KEYS))
+
+    def refresh(self):
+
+        """
+        Replaces the in-memory state with the latest stored one (shared persistence).
+        A missing or invalid stored state is replaced by a fresh one, marked unsaved.
+        """
+
+        bytes_read = self.store.bytes_read
+        try:
+            data, self._version = self.store.load_versioned()
+        except ValueError as error: # Corrupt JSON
+            logger.warning("Stored state of table %s is invalid (%s); starting an empty table.", self.table_id, error)
+            data = None
+        if self.instrumentation is not None:
+            self.instrumentation.counters["bytes_read"] += self.store.bytes_read - bytes_read
+
+        if self._is_valid_state(data):
+            self._state = TableState.from_dict(data)
+            self.players = list(self._state.players)
         else:
-            # Validate existing data
+            if data is not None:
+                logger.warning("Stored state of table %s is invalid (missing keys); starting an empty table.", self.table_id)
+            self._state = TableState()
+            self.players = []
+            self._dirty = True
+        self._changed()
+
+    def _transactional(self, method):
+
+        """
+        Returns `method` wrapped as a compare-and-swap transaction: refresh, apply,
+        compare_and_write, and retry with backoff on a conflict. Calls made by a
+        method that is already inside a transaction are part of it. Events are
+        recorded (see _record) once, after the attempt that commits.
+        """
+
+        def transaction(*args, **kwargs):
+            if self._in_transaction:
+                return method(*args, **kwargs)
+
+            store = self.store
+            self._in_transaction = True
             try:
-                data = self.get_data()
-                # Basic validation: ensure essential keys exist
-                if "num_players" not in data or "dhand" not in data or "dscore" not in data or "dbust" not in data or "players_data" not in data:
-                    self.reset_game_data()
-            except:
-                # If file is corrupt or invalid, reset it
+                for attempt in range(self.cas_retries + 1):
+                    self.refresh()
+                    self._transaction_events = []
+                    result = method(*args, **kwargs)
+                    if self._dirty:
+                        payload = store.serialize(self._state.to_dict())
+                        if self.instrumentation is not None:
+                            self.instrumentation.counters["bytes_written"] += store.payload_size(payload)
+                        version = store.compare_and_write(payload, self._version)
+                        if version is None:
+                            # Randomized exponential backoff so conflicting processes stop colliding
+                            time.sleep(random.random() * min(0.05, 0.0005 * 2 ** attempt))
+                            continue
+                        self._version = version
+                        self._dirty = False
+
+                    for event, arguments in self._transaction_events:
+                        self._emit(event, arguments)
+                    return result
+            finally:
+                self._in_transaction = False
+                self._transaction_events = []
+
+            store.contention["aborts"] += 1
+            raise StateConflictError(f"{method.__name__} conflicted with other writers {self.cas_retries + 1} times in a row.")
+        return transaction
+
+    def _locked(self, method):
+
+        """Returns `method` wrapped to hold the state lock, so the interval writer never serializes a half-made change."""
+
+        def locked(*args, **kwargs):
+            with self._lock:
+                return method(*args, **kwargs)
+        return locked
+
+    def _recover_from_journal(self):
+
+        """Rebuilds the game state from the journal's last snapshot plus the events after it."""
+
+        snapshot, events = self._journal.recover()
+        self._replaying = True
+        try:
+            if snapshot is None:
                 self.reset_game_data()
+            else:
+                self._state = TableState.from_dict(snapshot["game"])
+                self.players = snapshot["players"]
+                self._changed()
+
+            # Replayed events that deal cards get exactly the recorded cards
+            self._replay_cards = deque()
+            for event, arguments in events:
+                self._replay(event, arguments)
+        finally:
+            self._replay_cards = None
+            self._replaying = False
+
+    def _replay(self, event, arguments):
+
+        """Re-applies one journal event through the same method that recorded it."""
+
+        if event == EVENT_RESET:
+            self.reset_game_data()
+        elif event == EVENT_PLAYER:
+            self.add_player(*arguments)
+        elif event == EVENT_LEAVE:
+            self.remove_player(*arguments)
+        elif event == EVENT_ROUND:
+            self.new_round()
+        elif event == EVENT_DEAL:
+            self._replay_cards.extend(arguments[0])
+            self.initial_deal()
+        elif event == EVENT_HIT:
+            player_name, hand_number, card = arguments
+            self._replay_cards.append(card)
+            self.player_hit(player_name, hand_number)
+        elif event == EVENT_STAND:
+            self.player_stand(*arguments)
+        elif event == EVENT_SPLIT:
+            self.split_hand(*arguments)
+        elif event == EVENT_TURN:
+            self.set_turn_played(*arguments)
+        elif event == EVENT_NATURALS:
+            self.check_natural_winners()
+        elif event == EVENT_DEALER_DRAW:
+            self.add_card_to_hand("dealer", 1, arguments[0])
+        # EVENT_SETTLE only records the results; settling doesn't change the state
+
+    def _record(self, event, *arguments):
+
+        """
+        Appends an event to the journal (journal persistence only) and passes it to
+        the hand-history recorder. Inside a shared-persistence transaction the event
+        waits for the commit, so a retried attempt doesn't record it twice.
+        """
+
+        if self._replaying:
+            return
+        if self._in_transaction:
+            self._transaction_events.append((event, arguments))
+            return
+        self._emit(event, arguments)
+
+    def _emit(self, event, arguments):
+        if self._journal is not None:
+            self._journal.append(event, arguments)
+        if self._recorder is not None:
+            self._recorder.observe(self, event, arguments)
 
     def reset_game_data(self):
-        """Resets the game data in the JSON file to its initial state."""
-        initial_data = {
-            "num_players": 0,
-            "dhand": [],
-            "dscore": 0,
-            "dbust": 0,
-            "players_data": {} # Store player-specific data here
-        }
-        with open(self.data_file, "w") as file:
-            json.dump(initial_data, file, indent=4)
+        """Resets the game state to its initial state (end of round, so it is flushed)."""
+        self._state = TableState() # No players, no dealer cards
+        self._dirty = True
         self.players = [] # Clear internal players list as well
+        self._changed()
+        self._record(EVENT_RESET)
+        self.flush()
 
     def get_data(self):
-        """Retrieves the game data from the JSON file."""
-        with open(self.data_file, "r") as file:
-            return json.load(file)
+        """Returns a copy of the game state in the stored dict layout (see TableState.to_dict); changing it doesn't change the table."""
+        return copy.deepcopy(self._state.to_dict())
+
+    def get_state(self):
+
+        """
+        Returns the live table_state.TableState (not a copy), for code that walks the
+        hands every round (simulator, hand-history recorder). The cached snapshot is
+        dropped, as the caller may change the state; changes made through a reference
+        kept after a later snapshot() call are not seen by it, nor are they persisted
+        until the next change made through BlackjackLogic.
+        """
+
+        self._changed()
+        return self._state
+
+    def _changed(self):
+        """Starts a new revision of the state: the cached snapshot no longer matches it."""
+        self._revision += 1
+        self._snapshot = None
+
+    def snapshot(self):
+
+        """
+        Returns an immutable table_state.TableSnapshot of the current state, for
+        display code (text UI, graphic client, spectators, broadcasts). Reads are
+        side-effect free: the snapshot is built on the first call after a change
+        and the same object is returned until the next one, so it can be polled
+        every frame without copying the state or touching the store. Every change
+        made through BlackjackLogic, and every get_state() call, starts a new one.
+        """
+
+        if self._snapshot is None:
+            self._snapshot = TableSnapshot(self._state, self._revision)
+        return self._snapshot
 
     def _save_data(self, data):
-        """Saves the current game data to the JSON file."""
-        with open(self.data_file, "w") as file:
-            json.dump(data, file, indent=4)
+        """Records a change to the game state; writes it out according to the persistence policy."""
+        self._state = data
+        self._dirty = True
+        self._changed() # Interval persistence is written by the writer thread's timer
+
+    def _serialize_if_dirty(self):
+
+        """Returns the serialized state if it has unsaved changes (marking it saved), else None."""
+
+        with self._lock:
+            if not self._dirty:
+                return None
+            # Serialize here so the state can't change under the writer, then hand off the disk write
+            payload = self.store.serialize(self._state.to_dict())
+            if self.instrumentation is not None:
+                self.instrumentation.counters["bytes_written"] += self.store.payload_size(payload)
+            self._dirty = False
+        return payload
+
+    def flush(self):
+        """Writes the in-memory game state to the store if it has unsaved changes."""
+        if self._journal is not None:
+            self._journal.sync() # Events are already in the journal, just make them durable
+            return
+        if self.persistence in (PERSIST_NONE, PERSIST_SHARED): # Shared changes are written by their transaction
+            return
+
+        payload = self._serialize_if_dirty()
+        if payload is None:
+            return
+        if self._writer is not None:
+            self._writer.submit(payload)
+        else:
+            self.store.write(payload)
+
+    def close(self):
+        """Flushes any pending changes, stops the background writer and closes the store."""
+        self.flush()
+        if self._writer is not None:
+            self._writer.stop()
+            self._writer = None
+        self.store.close()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def delete_table(self):
+        """Tears the table down: stops writing and deletes its stored state, journal and snapshot."""
+        if self._writer is not None:
+            self._writer.stop()
+            self._writer = None
+        self._dirty = False
+        if self.persistence != PERSIST_NONE: # Nothing was stored, so there is nothing (not even a lock) to delete
+            self.store.delete()
+        self.store.close()
+        if self._journal is not None:
+            self._journal.delete()
+            self._journal = None
 
     def create_deck(self):
         """Creates a standard deck of 52 playing cards and shuffles it."""
-        suits = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
-        ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'Jack', 'Queen', 'King', 'Ace']
-        deck = [[rank, suit] for suit in suits for rank in ranks]
-        random.shuffle(deck)
-        random.shuffle(deck)
-        random.shuffle(deck)
-        return deck
+        return cards.new_deck(self.card_encoding, self.rng)
 
     def deal_card(self):
-        """Deals a card from the deck."""
-        return self.deck.pop()
+        """Deals a card from the shoe (the recorded one while replaying the journal), counting it if the table keeps a count."""
+        if self._replay_cards is not None:
+            return self._replay_cards.popleft()
+        card = self.shoe.deal()
+        if self.counter is not None:
+            self.counter.count(card)
+        return card
+
+    def reveal_hole_card(self):
+        """Counts the dealer's hole card once it is face up (no-op without a counter or if already shown)."""
+        if self.counter is not None and self.counter.hidden:
+            self.counter.reveal()
+
+    def running_count(self):
+        """Returns the running count of the cards seen in the current shoe (None if the table keeps no count)."""
+        if self.counter is None:
+            return None
+        self.counter.sync() # A reshuffle since the last card starts a new count
+        return self.counter.running_count
+
+    def true_count(self):
+        """Returns the running count per unseen deck, or the running count under KO (None if the table keeps no count)."""
+        return self.counter.true_count() if self.counter is not None else None
 
     def add_player(self, player_name):
         """Adds a new player to the game data."""
-        data = self.get_data()
-
-        data["players_data"][player_name] = {
-            "hand1": [],
-            "hand2": [],
-            "hand3": [],
-            "hand4": [],
-            "score1": 0,
-            "score2": 0,
-            "score3": 0,
-            "score4": 0,
-            "turn1": 0, # Tracks if turn for hand 1 is played
-            "turn2": 0,
-            "turn3": 0,
-            "turn4": 0,
-            "stood1": 0,
-            "stood2": 0,
-            "stood3": 0,
-            "stood4": 0,
-            "bust1": 0,
-            "bust2": 0, 
-            "bust3": 0,
-            "bust4": 0,
-            "hands": 1, # Number of active hands for this player
-            "bust": 0,  # 1 if busted, 0 otherwise
-            "stood": 0  # 1 if stood, 0 otherwise
-        }
-        data["num_players"] += 1
+        data = self._state
+
+        data.players[player_name] = PlayerState()
         self.players.append(player_name)
+        self._record(EVENT_PLAYER, player_name)
         self._save_data(data)
 
-    def calculate_score(self, name, hand_number=1):
+    def remove_player(self, player_name):
+        """Removes a player from the game data (between rounds)."""
+        data = self._state
+
+        del data.players[player_name]
+        self.players.remove(player_name)
+        self._record(EVENT_LEAVE, player_name)
+        self._save_data(data)
+
+    def new_round(self):
 
         """
-        Calculates the score for a given entity (player or dealer) and hand.
-        `hand_number` is only relevant for players with split hands.
+        Clears every hand for a new round, keeping the seated players, and
+        reshuffles the shoe if the cut card came out during the last round.
+        Unlike reset_game_data, players stay seated and nothing is flushed.
         """
 
-        data = self.get_data()
-        score_list = []
-        aces = 0
-        current_hand = []
+        self.shoe.reshuffle_if_due()
+        self._record(EVENT_ROUND)
+        data = self._state
+        data.dealer = Hand()
+        for player_name in self.players:
+            data.players[player_name] = PlayerState()
+        self._save_data(data)
+
+    def _hand(self, name, hand_number=1):
+
+        """Returns the Hand of the dealer or of a player's hand number."""
 
         if name == "dealer":
-            current_hand = data["dhand"]
-        else:
-            hand_key = f"hand{hand_number}"
-            current_hand = data["players_data"][name][hand_key]
-
-        for card in current_hand:
-            rank = card[0]
-            if rank in ['Jack', 'Queen', 'King']:
-                score_list.append(10)
-            elif rank == 'Ace':
-                score_list.append(11)
-                aces += 1
-            else:
-                score_list.append(int(rank))
+            return self._state.dealer
+        return self._state.players[name].hands[hand_number - 1]
 
-        total_score = sum(score_list)
+    def _hard_value(self, card):
 
-        # Adjust for Aces if total exceeds 21
-        while total_score > 21 and aces > 0:
-            total_score -= 10
-            aces -= 1
+        """Returns a card's hard value (Ace counts as 1)."""
 
-        # Update the score in the data
-        if name == "dealer":
-            data["dscore"] = total_score
-        else:
-            data["players_data"][name][f"score{hand_number}"] = total_score
+        if self._hard_values is not None:
+            return self._hard_values[card]
+        return cards.STRING_HARD_VALUES[card[0]]
 
+    def _update_score(self, hand):
 
+        """Derives the score and bust flag of a hand from its running totals."""
 
+        hard = hand.hard
+        # One Ace can count as 11 if that doesn't bust the hand
+        score = hard + 10 if hand.aces and hard <= 11 else hard
+        hand.score = score
+        if score > 21:
+            hand.bust = 1
+        return score
 
-        self._save_data(data)
+    def add_card_to_hand(self, name, hand_number=1, card=None):
+
+        """
+        Adds a card to a hand (dealt from the shoe unless given) and updates its
+        running total, score and bust flag in O(1). Returns the card.
+        """
+
+        hand = self._hand(name, hand_number)
+        if card is None:
+            card = self.deal_card()
+
+        value = self._hard_value(card)
+        hand.cards.append(card)
+        hand.hard += value
+        if value == 1:
+            hand.aces += 1
+        self._update_score(hand)
+
+        self._save_data(self._state)
+        return card
+
+    def remove_card_from_hand(self, name, hand_number=1):
+
+        """Removes the last card of a hand, updating its running totals. Returns the card."""
+
+        hand = self._hand(name, hand_number)
+        card = hand.cards.pop()
+
+        value = self._hard_value(card)
+        hand.hard -= value
+        if value == 1:
+            hand.aces -= 1
+        self._update_score(hand)
+
+        self._save_data(self._state)
+        return card
+
+    def hand_score(self, name, hand_number=1):
+
+        """Returns the current score of a hand (O(1) read)."""
+
+        return self._hand(name, hand_number).score
+
+    def is_hand_soft(self, name, hand_number=1):
+
+        """Returns True if the hand counts an Ace as 11 (O(1) read)."""
+
+        hand = self._hand(name, hand_number)
+        return hand.aces > 0 and hand.hard <= 11
+
+    def is_hand_bust(self, name, hand_number=1):
+
+        """Returns True if the hand's total is over 21 (O(1) read)."""
+
+        return self._hand(name, hand_number).hard > 21
+
+    def calculate_score(self, name, hand_number=1):
+
+        """
+        Calculates the score for a given entity (player or dealer) and hand.
+        `hand_number` is only relevant for players with split hands.
+
+        Scores are kept up to date as cards are added, so this is only needed if
+        a hand was changed directly; it rebuilds the running totals from the cards.
+        """
+
+        hand = self._hand(name, hand_number)
+        hard = 0
+        aces = 0
+
+        for card in hand.cards:
+            value = self._hard_value(card)
+            hard += value
+            if value == 1:
+                aces += 1
+
+        hand.hard = hard
+        hand.aces = aces
+        total_score = self._update_score(hand)
+
+        self._save_data(self._state)
         return total_score
 
     def initial_deal(self):
 
         """Deals initial two cards to all players and the dealer."""
 
-        data = self.get_data()
+        data = self._state
+        dealt = []
         for player in self.players:
-            player_data = data["players_data"][player]
-            player_data['hand1'] = [self.deal_card(), self.deal_card()]
-            data["players_data"][player] = player_data # Update player data
-            self._save_data(data) 
-            player_data["score1"] = self.calculate_score(player, 1)
+            data.players[player].hands[0] = Hand()
+            dealt.append(self.add_card_to_hand(player, 1))
+            dealt.append(self.add_card_to_hand(player, 1))
 
-        data["dhand"] = [self.deal_card(), self.deal_card()]
-        self._save_data(data)
-        self.calculate_score("dealer")
+        data.dealer = Hand()
+        dealt.append(self.add_card_to_hand("dealer"))
+        dealt.append(self.add_card_to_hand("dealer"))
+        if self.counter is not None and not self._replaying:
+            self.counter.hide(dealt[-1]) # The hole card is counted once it is turned over
+        self._record(EVENT_DEAL, dealt)
 
     def get_hand_details(self, name, hand_number=1):
 
-        """Returns the hand and score for a given entity and hand number."""
+        """Returns the hand (the live card list) and score for a given entity and hand number. Display code should read snapshot()."""
 
-        data = self.get_data()
-        if name == "dealer":
-            return data["dhand"], data["dscore"]
-        else:
-            player_data = data["players_data"][name]
-            self.calculate_score(name, hand_number) # Ensure score is up-to-date
-            hand_key = f"hand{hand_number}"
-            score_key = f"score{hand_number}"
-            return player_data[hand_key], player_data[score_key]
+        hand = self._hand(name, hand_number) # Scores are always up-to-date
+        return hand.cards, hand.score
 
     def check_natural_winners(self):
 
         """Checks for natural blackjacks at the start of the game."""
 
-        data = self.get_data()
+        data = self._state
         nat_winners = []
 
         for player_name in self.players:
-            player_data = data["players_data"][player_name]
+            player = data.players[player_name]
+            hand = player.hands[0]
 
-            if player_data["score1"] == 21 and len(player_data["hand1"]) == 2:
+            if hand.score == 21 and len(hand.cards) == 2:
                 nat_winners.append(player_name)
-                player_data["stood"] = 1 # Player with natural blackjack stands
-                player_data["bust"] = 0 # Cannot bust with natural blackjack
-                data["players_data"][player_name] = player_data # Update player data
+                player.stood = 1 # Player with natural blackjack stands
+                player.bust = 0 # Cannot bust with natural blackjack
 
         # Dealer natural blackjack trumps player natural blackjack in many rulesets
-        if data["dscore"] == 21 and len(data["dhand"]) == 2:
+        dealer = data.dealer
+        if dealer.score == 21 and len(dealer.cards) == 2:
             nat_winners.append("dealer")
             # If dealer has natural, all players with natural tie, others lose
             # For simplicity here, we just report dealer as winner
             # More complex rules would involve comparing player naturals to dealer natural
-            data["dbust"] = 0 # Dealer cannot bust with natural
-            data["dscore"] = 21 # Ensure score is correctly set (was set to 0 in original code if dealer nat)
+            dealer.bust = 0 # Dealer cannot bust with natural
+            dealer.score = 21 # Ensure score is correctly set (was set to 0 in original code if dealer nat)
+            self.reveal_hole_card() # The dealer checks for blackjack and shows it
 
+        self._record(EVENT_NATURALS)
         self._save_data(data) # Save stood/bust status for players
         return nat_winners
 
@@ -215,18 +704,13 @@ class BlackjackLogic:
 
         """Player takes another card. Returns True if successful, False if busted."""
 
-        data = self.get_data()
-        hand_key = f"hand{hand_number}"
-        score_key = f"score{hand_number}"
-        player_data = data["players_data"][player_name]
+        player = self._state.players[player_name]
 
-        if player_data["bust"] == 1 or player_data["stood"] == 1:
+        if player.bust == 1 or player.stood == 1:
             return False # Player not found, already busted, or already stood
 
-        player_data[hand_key].append(self.deal_card())
-        self._save_data(data) # Save updated hand before recalculating score
-
-        self.calculate_score(player_name, hand_number)
+        card = self.add_card_to_hand(player_name, hand_number) # Updates score and bust flag
+        self._record(EVENT_HIT, player_name, hand_number, card)
 
         return True
 
@@ -234,8 +718,9 @@ class BlackjackLogic:
 
         """Player chooses to stand."""
 
-        data = self.get_data()
-        data["players_data"][player_name]["stood"] = 1
+        data = self._state
+        data.players[player_name].stood = 1
+        self._record(EVENT_STAND, player_name)
         self._save_data(data)
         return True
     
@@ -245,83 +730,61 @@ class BlackjackLogic:
 
         """Checks if a player's specific hand has busted."""
 
-        data = self.get_data()
-        player_data = data["players_data"][player_name]
-
-  
-        if player_data[f"score{hand_number}"] > 21:
-            player_data[f"bust{hand_number}"] = 1
-            data["players_data"][player_name] = player_data
-            self._save_data(data)
-
-        if player_data[f"bust{hand_number}"] == 1:
-            return True or player_data["bust"] == 1
-        
-        return False # Player has not busted for this hand
-            
-        
+        # The bust flag is set as soon as a card takes the hand over 21
+        return self.is_hand_bust(player_name, hand_number)
 
 
     def is_player_stood(self, player_name):
 
         """Checks if a player has stood for all their hands."""
 
-        data = self.get_data()
-        player_data = data["players_data"][player_name]
+        player = self._state.players[player_name]
         # If a player has multiple hands, they 'stood' when all hands are resolved (stood or busted)
         # For simplicity, if 'stood' is marked, assume they've completed their turn.
-        return player_data["stood"] == 1 or player_data["bust"] == 1
+        return player.stood == 1 or player.bust == 1
 
     def dealer_turn(self):
 
         """Dealer hits until their score is 17 or higher, or busts."""
 
-        data = self.get_data()
-        dealer_score = data["dscore"] # Get current score
-
-        while dealer_score < 17:
-            data["dhand"].append(self.deal_card())
-            self._save_data(data) # Save after adding card
-            dealer_score = self.calculate_score("dealer") # Recalculate score
-
-        self.is_dealer_busted() # Check if dealer busted
-        self._save_data(data) # Save final state
+        if self.counter is not None:
+            self.reveal_hole_card()
+        while self.hand_score("dealer") < 17:
+            card = self.add_card_to_hand("dealer") # Updates score and bust flag
+            self._record(EVENT_DEALER_DRAW, card)
 
     def can_split(self, player_name, hand_number=1):
 
         """Checks if a player can split their hand."""
 
-        data = self.get_data()
-        player_data = data["players_data"][player_name]
-        hand_key = f"hand{hand_number}"
-        current_hand = player_data[hand_key]
+        player = self._state.players[player_name]
+        current_hand = player.hands[hand_number - 1].cards
 
         # Can only split if two cards and ranks are the same
-        return (current_hand and
-                len(current_hand) == 2 and
-                player_data["hands"] < 4 and # Max 4 hands after splitting
-                current_hand[0][0] == current_hand[1][0])
+        if len(current_hand) != 2 or len(player.hands) >= MAX_HANDS:
+            return False
+
+        if self._rank_keys is not None:
+            return self._rank_keys[current_hand[0]] == self._rank_keys[current_hand[1]]
+        return current_hand[0][0] == current_hand[1][0]
 
     def split_hand(self, player_name, hand_number):
 
         """Splits the player's hand into two separate hands."""
 
-        data = self.get_data()
-        player_data = data["players_data"][player_name]
+        player = self._state.players[player_name]
 
         # Get the card to move to the new hand
-        card_to_move = player_data[f"hand{hand_number}"][0].pop()
+        card_to_move = self.remove_card_from_hand(player_name, hand_number)
 
-        # Increment the number of hands
-        player_data["hands"] += 1
-        new_hand_number = player_data["hands"]
+        # The new hand goes after the existing ones
+        player.hands.append(Hand())
+        new_hand_number = len(player.hands)
 
-        player_data[f"hand{new_hand_number}"].append(card_to_move)
-
-        self._save_data(data) # Save changes
-        # Recalculate scores for both hands after split
-        self.calculate_score(player_name, hand_number)
-        self.calculate_score(player_name, new_hand_number)
+        # Running totals of both hands are updated as the card moves
+        self.add_card_to_hand(player_name, new_hand_number, card_to_move)
+        self._record(EVENT_SPLIT, player_name, hand_number)
+        return True
 
 
     def get_game_results(self):
@@ -332,25 +795,26 @@ class BlackjackLogic:
         Outcome: 1 (win), 0 (loss), 0.5 (tie).
         """
 
-        data = self.get_data()
-        dealer_score = data["dscore"]
-        dealer_busted = data["dbust"] == 1
+        if self.counter is not None:
+            self.reveal_hole_card() # Shown at settlement even when the dealer didn't play
+        data = self._state
+        dealer_score = data.dealer.score
+        dealer_busted = data.dealer.bust == 1
         results = {}
 
         for player_name in self.players:
             player_results = {}
-            player_data = data["players_data"][player_name]
-            num_hands = player_data["hands"]
+            player = data.players[player_name]
 
-            if player_data["bust"] == 1:
-                for i in range(1, num_hands + 1):
+            if player.bust == 1:
+                for i in range(1, len(player.hands) + 1):
                     player_results[i] = 0
             
             else:
 
-                for i in range(1, num_hands + 1):
-                    player_hand_score = player_data[f"score{i}"]
-                    player_busted = player_data[f"bust{i}"] == 1
+                for i, hand in enumerate(player.hands, 1):
+                    player_hand_score = hand.score
+                    player_busted = hand.bust == 1
 
                     if player_busted:
                         player_results[i] = 0 # Player busted, always a loss for this hand
@@ -365,6 +829,13 @@ class BlackjackLogic:
 
             results[player_name] = player_results
 
+        self._record(EVENT_SETTLE, results)
+        if self.persistence != PERSIST_NONE and self._journal is None:
+            self.store.record_results(results)
+            self._dirty = True # Results go out with the end-of-round write
+        if self._journal is not None and self._journal.snapshot_due():
+            self._journal.write_snapshot({"game": self._state.to_dict(), "players": self.players})
+        self.flush() # End of round
         return results
 
     def get_all_player_names(self):
@@ -377,51 +848,37 @@ class BlackjackLogic:
 
         """Returns the number of active hands a player has."""
 
-        data = self.get_data()
-        player_data = data["players_data"][player_name]
+        return len(self._state.players[player_name].hands)
 
-        return player_data["hands"]
 
+    def set_turn_played(self, player_name, hand_number, stood=False):
 
-    def set_turn_played(self, player_name, hand_number):
+        """Marks a specific hand's turn as played for a player; `stood` if the player chose to stand (not a bust or a 21)."""
 
-        """Marks a specific hand's turn as played for a player."""
-
-        data = self.get_data()
-        player_data = data["players_data"][player_name]
-
-        player_data[f"turn{hand_number}"] = 1
+        data = self._state
+        hand = data.players[player_name].hands[hand_number - 1]
+        hand.turn = 1
+        if stood:
+            hand.stood = 1
+        self._record(EVENT_TURN, player_name, hand_number, stood)
         self._save_data(data)
 
     def is_turn_played(self, player_name, hand_number):
 
         """Checks if a specific hand's turn has been played for a player."""
 
-        data = self.get_data()
-        player_data = data["players_data"][player_name]
-
-        return player_data.get(f"turn{hand_number}") == 1
+        hands = self._state.players[player_name].hands
+        return hand_number <= len(hands) and hands[hand_number - 1].turn == 1
 
     def get_overall_player_status(self, player_name):
 
         """Returns the overall status of a player (e.g., 'bust', 'stood', 'active')."""
 
-        data = self.get_data()
-        player_data = data["players_data"][player_name]
-        hands = player_data["hands"]
-        bust = []
-
-        for x in range(1, hands + 1):
-            if player_data[f"bust{x}"] == 1:
-                bust.append(True)
-            else:
-                bust.append(False)
-        
+        player = self._state.players[player_name]
 
-
-        if player_data["bust"] or False not in bust:
+        if player.bust or all(hand.bust == 1 for hand in player.hands):
             return "busted"
-        if player_data["stood"] == 1:
+        if player.stood == 1:
             return "stood"
         
         return "active"
@@ -430,12 +887,54 @@ class BlackjackLogic:
 
         """Checks if the dealer has busted."""
 
-        data = self.get_data()
+        # The bust flag is set as soon as a card takes the hand over 21
+        return self.is_hand_bust("dealer")
 
-        if data["dscore"] > 21:
-            data["dbust"] = 1
-            self._save_data(data)
-            return True
-        
-        return data["dbust"] == 1
-    
+
+class _BackgroundWriter:
+
+    """
+    Daemon thread that writes serialized game states through a store's write method.
+    Only the most recent pending state is kept; older ones are superseded.
+
+    Every `interval` seconds without a submitted state, the thread calls `poll`,
+    which returns a serialized state to write or None, so changes are written even
+    if nothing calls flush.
+    """
+
+    def __init__(self, write, interval=None, poll=None):
+        self.write = write
+        self.interval = interval
+        self.poll = poll
+        self._pending = None
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="blackjack-state-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, payload):
+        """Queues a serialized state for writing, replacing any older pending one."""
+        with self._condition:
+            self._pending = payload
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._pending is None and not self._stopped:
+                    self._condition.wait(self.interval)
+                if self._pending is None and self._stopped:
+                    return
+                payload, self._pending = self._pending, None
+
+            if payload is None and self.poll is not None:
+                payload = self.poll() # Woke up on the timer
+            if payload is not None:
+                self.write(payload)
+
+    def stop(self):
+        """Writes whatever is still pending, then stops the thread."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
@@ -0,0 +1,104 @@
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from simulator import BlackjackSimulator, mimic_dealer
+
+# Report fields that are plain counts and can be summed across shards
+SUMMED_FIELDS = ["rounds", "hands", "wins", "losses", "pushes", "naturals_won", "splits", "net"]
+
+
+def worker_seeds(seed, workers):
+
+    """
+    Derives one independent seed per worker from the master seed.
+    The same (seed, workers) pair always gives the same list.
+    """
+
+    master = random.Random(seed)
+    return [master.getrandbits(64) for _ in range(workers)]
+
+
+def split_rounds(rounds, workers):
+
+    """Splits `rounds` into `workers` shard sizes that differ by at most one."""
+
+    base, extra = divmod(rounds, workers)
+    return [base + 1 if i < extra else base for i in range(workers)]
+
+
+def _run_shard(shard_rounds, seed, num_players, decide, blackjack_payout, num_decks, penetration):
+
+    """Runs one shard in a worker process and returns its report."""
+
+    simulator = BlackjackSimulator(num_players=num_players, decide=decide, seed=seed, blackjack_payout=blackjack_payout,
+                                   num_decks=num_decks, penetration=penetration)
+    return simulator.run(shard_rounds)
+
+
+def merge_reports(reports):
+
+    """Merges shard reports into a single report (counts, per-hand tallies and EV)."""
+
+    merged = {field: 0 for field in SUMMED_FIELDS}
+    merged["net"] = 0.0
+    hand_outcomes = {}
+
+    for report in reports:
+        for field in SUMMED_FIELDS:
+            merged[field] += report[field]
+
+        for hand_number, tally in report["hand_outcomes"].items():
+            merged_tally = hand_outcomes.setdefault(hand_number, {"wins": 0, "losses": 0, "pushes": 0})
+            for outcome, count in tally.items():
+                merged_tally[outcome] += count
+
+    merged["hand_outcomes"] = dict(sorted(hand_outcomes.items()))
+    merged["ev_per_round"] = merged["net"] / merged["rounds"] if merged["rounds"] else 0.0
+    merged["ev_per_hand"] = merged["net"] / merged["hands"] if merged["hands"] else 0.0
+    return merged
+
+
+def run_parallel(rounds, workers=None, seed=0, num_players=1, decide=mimic_dealer, blackjack_payout=1.5,
+                 num_decks=6, penetration=0.75):
+
+    """
+    Runs `rounds` simulated rounds split across a process pool and returns one merged report.
+
+    Every worker shuffles with its own RNG seeded from `seed`, so the same seed and
+    worker count always give identical results. `decide` must be picklable (a
+    module-level function or simulator.stand_on(...)).
+    """
+
+    workers = workers or os.cpu_count() or 1
+    shards = split_rounds(rounds, workers)
+    seeds = worker_seeds(seed, workers)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_run_shard, shard_rounds, shard_seed, num_players, decide, blackjack_payout, num_decks, penetration)
+            for shard_rounds, shard_seed in zip(shards, seeds)
+        ]
+        # Merge in shard order (not completion order) so float sums are reproducible
+        reports = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    merged = merge_reports(reports)
+    merged["workers"] = workers
+    merged["seed"] = seed
+    merged["seconds"] = elapsed
+    merged["rounds_per_sec"] = rounds / elapsed if elapsed else 0.0
+    return merged
+
+
+# --- To run a sharded simulation: python parallel.py [rounds] [workers] [seed] ---
+if __name__ == "__main__":
+    num_rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    num_workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    master_seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+
+    report = run_parallel(num_rounds, workers=num_workers, seed=master_seed)
+    for key, value in report.items():
+        print(f"{key}: {value}")
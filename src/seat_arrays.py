@@ -0,0 +1,310 @@
+import argparse
+import sys
+import time
+from table_state import MAX_HANDS
+from common import percentile
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; only the array backends need it
+    np = None
+
+DEALER_STANDS_ON = 17
+
+
+class SeatArrays:
+
+    """
+    Struct-of-arrays game state for a population of independent seats: one NumPy
+    column per field, indexed by seat id, instead of one object per seat. Each
+    seat is one player at their own table, with their own dealer and bankroll.
+
+    Per hand, shaped (seats, MAX_HANDS): `hard` (running total with Aces as 1),
+    `aces`, `cards` (how many), `first` / `second` (ranks of the first two cards,
+    which is all splitting needs), `bust` and `stood`. Per seat: `hands` (hands
+    held), `bet`, `bankroll` and the dealer's `dealer_hard`, `dealer_aces` and
+    `dealer_cards`. Cards are ranks as in CARDS_RANKS (1 = Ace, 10 = any ten).
+    Scores and soft flags are derived from the running totals like BlackjackLogic.
+
+    The rules have batched equivalents of BlackjackLogic's methods. They act on a
+    1-based `hand_number`, like the scalar API, and every one of them takes `seats`
+    as its last, optional argument (a boolean mask or an array of seat ids; None for
+    every seat); queries return one value per selected seat. For example, can_split
+    returns a mask, split_hand splits every given seat at once, and game_results
+    settles all seats with the same outcomes (1 / 0 / 0.5) as get_game_results, with
+    player naturals winning outright unless the dealer also has one. Hands a seat
+    doesn't hold come out as NaN.
+    """
+
+    def __init__(self, num_seats, bankroll=0.0):
+        if np is None:
+            raise ImportError("SeatArrays needs NumPy (pip install numpy).")
+        if num_seats <= 0:
+            raise ValueError(f"Number of seats must be positive, got {num_seats}.")
+
+        self.num_seats = num_seats
+        shape = (num_seats, MAX_HANDS)
+        self.hard = np.zeros(shape, dtype=np.int16)
+        self.aces = np.zeros(shape, dtype=np.int8)
+        self.cards = np.zeros(shape, dtype=np.int8)
+        self.first = np.zeros(shape, dtype=np.int8)
+        self.second = np.zeros(shape, dtype=np.int8)
+        self.bust = np.zeros(shape, dtype=bool)
+        self.stood = np.zeros(shape, dtype=bool)
+        self.hands = np.zeros(num_seats, dtype=np.int8)
+        self.bet = np.zeros(num_seats, dtype=np.float64)
+        self.bankroll = np.full(num_seats, bankroll, dtype=np.float64)
+        self.dealer_hard = np.zeros(num_seats, dtype=np.int16)
+        self.dealer_aces = np.zeros(num_seats, dtype=np.int8)
+        self.dealer_cards = np.zeros(num_seats, dtype=np.int8)
+
+    def _ids(self, seats):
+
+        """Turns a seat selection (mask, ids or None) into an array of seat ids."""
+
+        if seats is None:
+            return np.arange(self.num_seats)
+        seats = np.asarray(seats)
+        return np.flatnonzero(seats) if seats.dtype == bool else seats
+
+    def new_round(self, bet=1.0, seats=None):
+
+        """Clears the hands of the given seats (each gets one empty hand) and places their bets."""
+
+        ids = self._ids(seats)
+        for column in (self.hard, self.aces, self.cards, self.first, self.second, self.bust, self.stood):
+            column[ids] = 0
+        self.hands[ids] = 1
+        self.bet[ids] = bet
+        self.dealer_hard[ids] = 0
+        self.dealer_aces[ids] = 0
+        self.dealer_cards[ids] = 0
+
+    def add_cards(self, cards, hand_number=1, seats=None):
+
+        """Adds one card (`cards`, one rank per selected seat) to a hand of every given seat."""
+
+        ids = self._ids(seats)
+        h = hand_number - 1
+        cards = np.asarray(cards, dtype=np.int16)
+        count = self.cards[ids, h]
+        self.first[ids, h] = np.where(count == 0, cards, self.first[ids, h])
+        self.second[ids, h] = np.where(count == 1, cards, self.second[ids, h])
+        self.cards[ids, h] = count + 1
+        self.hard[ids, h] += cards
+        self.aces[ids, h] += cards == 1
+        self.bust[ids, h] = self.hard[ids, h] > 21
+
+    def add_dealer_cards(self, cards, seats=None):
+
+        """Adds one card to the dealer's hand at every given seat."""
+
+        ids = self._ids(seats)
+        cards = np.asarray(cards, dtype=np.int16)
+        self.dealer_hard[ids] += cards
+        self.dealer_aces[ids] += cards == 1
+        self.dealer_cards[ids] += 1
+
+    def scores(self, hand_number=None, seats=None):
+
+        """Returns the score of one hand of the given seats, or of every hand (seats, MAX_HANDS) if `hand_number` is None."""
+
+        ids = self._ids(seats)
+        hard = self.hard[ids] if hand_number is None else self.hard[ids, hand_number - 1]
+        aces = self.aces[ids] if hand_number is None else self.aces[ids, hand_number - 1]
+        return hard + 10 * ((aces > 0) & (hard <= 11))
+
+    def is_soft(self, hand_number=1, seats=None):
+
+        """Mask of the given seats whose hand counts an Ace as 11."""
+
+        ids = self._ids(seats)
+        return (self.aces[ids, hand_number - 1] > 0) & (self.hard[ids, hand_number - 1] <= 11)
+
+    def dealer_scores(self, seats=None):
+        ids = self._ids(seats)
+        return self.dealer_hard[ids] + 10 * ((self.dealer_aces[ids] > 0) & (self.dealer_hard[ids] <= 11))
+
+    def is_player_busted(self, hand_number=1, seats=None):
+
+        """Mask of the given seats whose hand is over 21."""
+
+        return self.bust[self._ids(seats), hand_number - 1]
+
+    def naturals(self, seats=None):
+
+        """Mask of the given seats holding a natural (two-card 21 in an unsplit hand)."""
+
+        ids = self._ids(seats)
+        return (self.hands[ids] == 1) & (self.cards[ids, 0] == 2) & (self.scores(1, ids) == 21)
+
+    def dealer_naturals(self, seats=None):
+        ids = self._ids(seats)
+        return (self.dealer_cards[ids] == 2) & (self.dealer_scores(ids) == 21)
+
+    def can_split(self, hand_number=1, seats=None):
+
+        """Mask of the given seats that may split their hand: a pair of equal ranks, below MAX_HANDS hands."""
+
+        ids = self._ids(seats)
+        h = hand_number - 1
+        return ((self.cards[ids, h] == 2) & (self.first[ids, h] == self.second[ids, h])
+                & (self.hands[ids] < MAX_HANDS) & ~self.stood[ids, h])
+
+    def split_hand(self, hand_number=1, seats=None):
+
+        """Splits a hand of every given seat: its second card starts a new hand after the seat's last one."""
+
+        ids = self._ids(seats)
+        if not self.can_split(hand_number, ids).all():
+            raise ValueError("Every seat passed to split_hand must be able to split that hand.")
+        h = hand_number - 1
+        new = self.hands[ids].astype(np.intp) # Index of each seat's new hand
+        kept, moved = self.first[ids, h].astype(np.int16), self.second[ids, h].astype(np.int16)
+
+        for hand, card in ((np.full(ids.size, h), kept), (new, moved)):
+            self.hard[ids, hand] = card
+            self.aces[ids, hand] = card == 1
+            self.cards[ids, hand] = 1
+            self.first[ids, hand] = card
+            self.second[ids, hand] = 0
+            self.bust[ids, hand] = False
+            self.stood[ids, hand] = False
+        self.hands[ids] += 1
+
+    def stand(self, hand_number=1, seats=None):
+        self.stood[self._ids(seats), hand_number - 1] = True
+
+    def held(self, seats=None):
+
+        """Mask (seats, MAX_HANDS) of the hands each given seat holds."""
+
+        return np.arange(MAX_HANDS) < self.hands[self._ids(seats), None]
+
+    def game_results(self, seats=None):
+
+        """
+        Outcomes (seats, MAX_HANDS) of the given seats' hands: 1 win, 0 loss, 0.5 push,
+        NaN for hands not held. Player naturals win unless the dealer also has one.
+        """
+
+        ids = self._ids(seats)
+        score = self.scores(seats=ids)
+        dealer_score = self.dealer_scores(ids)[:, None]
+        outcomes = np.where(self.bust[ids], 0.0,
+                   np.where(dealer_score > 21, 1.0,
+                   np.where(score > dealer_score, 1.0,
+                   np.where(score < dealer_score, 0.0, 0.5))))
+        natural_wins = self.naturals(ids) & ~self.dealer_naturals(ids)
+        outcomes[natural_wins, 0] = 1.0
+        outcomes[~self.held(ids)] = np.nan
+        return outcomes
+
+    def settle(self, blackjack_payout=1.5, seats=None):
+
+        """Pays the given seats' bets by their game_results and adds the net win to their bankroll. Returns the nets."""
+
+        ids = self._ids(seats)
+        outcomes = self.game_results(ids)
+        units = np.where(outcomes == 1.0, 1.0, np.where(outcomes == 0.0, -1.0, 0.0)) # NaN (not held) pays 0
+        natural_wins = self.naturals(ids) & ~self.dealer_naturals(ids)
+        units[natural_wins, 0] = blackjack_payout
+        net = units.sum(axis=1) * self.bet[ids]
+        self.bankroll[ids] += net
+        return net
+
+
+def play_population(seats, rounds, threshold=17, split=False, bankroll=100.0, bet=1.0, blackjack_payout=1.5,
+                    seed=None):
+
+    """
+    Plays `rounds` rounds at every seat of a SeatArrays population, with cards drawn
+    from an infinite deck. Every seat hits below `threshold` (and splits pairs with
+    `split`); a seat stops playing once its bankroll can't cover the bet. Returns the
+    SeatArrays and a report with the bankroll distribution and the throughput.
+    """
+
+    rng = np.random.default_rng(seed)
+    state = SeatArrays(seats, bankroll)
+
+    def draw(count):
+        return np.minimum(rng.integers(1, 14, size=count), 10) # 11-13 are the face cards
+
+    hands_played = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        active = np.flatnonzero(state.bankroll >= bet)
+        if not active.size:
+            break
+        state.new_round(bet, active)
+        for _ in range(2):
+            state.add_cards(draw(active.size), seats=active)
+        for _ in range(2):
+            state.add_dealer_cards(draw(active.size), active)
+
+        # Nobody plays against a dealer natural; player naturals stand
+        playing = active[~state.dealer_naturals(active) & ~state.naturals(active)]
+        for hand_number in range(1, MAX_HANDS + 1):
+            acting = playing[state.hands[playing] >= hand_number]
+            if split:
+                while True:
+                    splitting = acting[state.can_split(hand_number, acting)]
+                    if not splitting.size:
+                        break
+                    state.split_hand(hand_number, splitting)
+                    state.add_cards(draw(splitting.size), hand_number, splitting)
+            if hand_number > 1: # Split hands start with one card
+                needs_card = acting[state.cards[acting, hand_number - 1] == 1]
+                state.add_cards(draw(needs_card.size), hand_number, needs_card)
+            # Each pass only scores the seats still drawing
+            hitting = acting[state.scores(hand_number, acting) < threshold]
+            while hitting.size:
+                state.add_cards(draw(hitting.size), hand_number, hitting)
+                hitting = hitting[state.scores(hand_number, hitting) < threshold]
+            state.stand(hand_number, acting)
+
+        # The dealer only draws where a hand is still standing
+        standing = playing[(state.held(playing) & ~state.bust[playing]).any(axis=1)]
+        drawing = standing[state.dealer_scores(standing) < DEALER_STANDS_ON]
+        while drawing.size:
+            state.add_dealer_cards(draw(drawing.size), drawing)
+            drawing = drawing[state.dealer_scores(drawing) < DEALER_STANDS_ON]
+
+        state.settle(blackjack_payout, active)
+        hands_played += int(state.hands[active].sum())
+    elapsed = time.perf_counter() - start
+
+    final = np.sort(state.bankroll)
+    return state, {
+        "seats": seats,
+        "rounds": rounds,
+        "hands": hands_played,
+        "mean_bankroll": float(final.mean()),
+        "p5_bankroll": float(percentile(final, 0.05)),
+        "p50_bankroll": float(percentile(final, 0.5)),
+        "p95_bankroll": float(percentile(final, 0.95)),
+        "ruined": float((state.bankroll < bet).mean()),
+        "seconds": elapsed,
+        "hands_per_sec": hands_played / elapsed if elapsed else 0.0
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play a population of independent seats with bankrolls.")
+    parser.add_argument("--seats", type=int, default=1000000)
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--threshold", type=int, default=17)
+    parser.add_argument("--split", action="store_true")
+    parser.add_argument("--bankroll", type=float, default=100.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    _, report = play_population(args.seats, args.rounds, args.threshold, args.split, args.bankroll, seed=args.seed)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+    return 0
+
+
+# --- python seat_arrays.py [--seats 1000000] [--rounds 100] [--threshold 17] [--split] ---
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+import asyncio
+import json
+import logging
+import sys
+from logic import BlackjackLogic, PERSIST_NONE
+from cards import CARDS_IDS, decode
+from state_machine import RoundStateMachine, PHASE_DEALING, PHASE_PLAYER, NEXT, STAND
+
+logger = logging.getLogger("blackjack.server")
+
+HOST = "0.0.0.0"
+PORT = 8765
+MAX_SEATS = 7
+MAX_BUFFERED = 1 << 20 # Bytes waiting to go out to one client before it is dropped as too slow
+
+
+def send(writer, message):
+
+    """
+    Queues one newline-delimited JSON message on a connection. Tables never wait
+    for a client to read: one that lets more than MAX_BUFFERED bytes pile up is
+    disconnected (and so leaves its table) instead.
+    """
+
+    if writer.is_closing():
+        return
+    writer.write(json.dumps(message).encode() + b"\n")
+    if writer.transport.get_write_buffer_size() > MAX_BUFFERED:
+        logger.warning("Dropping a client that stopped reading (%d bytes pending)", writer.transport.get_write_buffer_size())
+        writer.transport.abort()
+
+
+class Seat:
+
+    """A connected player at a table and their pending actions."""
+
+    __slots__ = ("name", "writer", "actions")
+
+    def __init__(self, name, writer):
+        self.name = name
+        self.writer = writer
+        self.actions = asyncio.Queue()
+
+
+class Table:
+
+    """
+    One Blackjack table: its own BlackjackLogic state and a task that plays rounds
+    for as long as anyone is seated. Players who join or leave mid-round are
+    seated / removed between rounds; a player who has left stands on every hand.
+    """
+
+    def __init__(self, server, name):
+        self.server = server
+        self.name = name
+        self.logic = BlackjackLogic(persistence=PERSIST_NONE, card_encoding=CARDS_IDS, num_decks=6, table_id=name)
+        self.machine = RoundStateMachine(self.logic)
+        self.seats = {}    # Seated players, by name
+        self.waiting = {}  # Joined, seated at the start of the next round
+        self.leaving = set()
+        self.rounds = 0
+        self.task = None
+
+    def join(self, name, writer):
+
+        """Adds a player for the next round. Returns the Seat, or None if the name is taken or the table is full."""
+
+        if name in self.seats or name in self.waiting:
+            return None
+        if len(self.seats) + len(self.waiting) - len(self.leaving) >= MAX_SEATS:
+            return None
+
+        seat = Seat(name, writer)
+        self.waiting[name] = seat
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+        return seat
+
+    def leave(self, name):
+
+        """Marks a player as gone; their seat is freed at the end of the round and their pending decision is a stand."""
+
+        if self.waiting.pop(name, None) is None and name in self.seats:
+            self.leaving.add(name)
+            self.seats[name].actions.put_nowait(STAND) # Wakes ask() if it is waiting on this player
+
+    def _update_seats(self):
+
+        """Applies joins and leaves between rounds."""
+
+        for name in self.leaving:
+            del self.seats[name]
+            self.logic.remove_player(name)
+        self.leaving.clear()
+
+        for name, seat in self.waiting.items():
+            self.seats[name] = seat
+            self.logic.add_player(name)
+        self.waiting.clear()
+
+    def broadcast(self, message):
+        for seat in self.seats.values():
+            if seat.name not in self.leaving:
+                send(seat.writer, message)
+
+    def state_message(self, reveal=False):
+
+        """Builds the table state as seen by the players (the hole card stays hidden until `reveal`)."""
+
+        table = self.logic.snapshot()
+        dealer_score = table.dealer.score
+        dealer_cards = [decode(card) for card in table.dealer.cards]
+        if not reveal and len(dealer_cards) == 2:
+            dealer_cards[1] = None
+            dealer_score = None
+
+        players = {}
+        for name, player in table.players.items():
+            players[name] = [{"cards": [decode(card) for card in hand.cards], "score": hand.score, "bust": hand.bust}
+                             for hand in player.hands]
+
+        return {"type": "state", "table": self.name, "round": self.rounds,
+                "dealer": {"cards": dealer_cards, "score": dealer_score}, "players": players}
+
+    async def ask(self, seat, hand_number, legal):
+
+        """Asks a player for an action on one hand. Stands if no valid action arrives in time."""
+
+        while not seat.actions.empty(): # Drop anything sent out of turn
+            seat.actions.get_nowait()
+
+        timeout = self.server.decision_timeout
+        send(seat.writer, {"type": "your_turn", "hand": hand_number, "legal": legal, "timeout": timeout,
+                           "score": self.logic.hand_score(seat.name, hand_number)})
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                action = await asyncio.wait_for(seat.actions.get(), deadline - loop.time())
+            except asyncio.TimeoutError:
+                send(seat.writer, {"type": "timeout", "hand": hand_number})
+                return STAND
+            if seat.name in self.leaving: # Left mid-decision
+                return STAND
+            if action in legal:
+                return action
+            send(seat.writer, {"type": "error", "message": f"Illegal action {action!r}; choose one of: {', '.join(legal)}."})
+
+    async def play_round(self):
+
+        """Plays one full round through the state machine and sends everyone the results."""
+
+        machine = self.machine
+        machine.apply(NEXT) # Deal
+        self.rounds = machine.rounds
+        self.broadcast(self.state_message())
+
+        while machine.phase == PHASE_PLAYER:
+            if machine.player in self.leaving:
+                action = STAND
+            else:
+                action = await self.ask(self.seats[machine.player], machine.hand, machine.legal_actions())
+            machine.apply(action)
+            if action != STAND:
+                self.broadcast(self.state_message())
+
+        while machine.phase != PHASE_DEALING: # Dealer draws, then settle
+            machine.apply(NEXT)
+        self.broadcast(self.state_message(reveal=True))
+        self.broadcast({"type": "results", "table": self.name, "round": self.rounds, "naturals": machine.naturals,
+                        "results": {name: {str(hand): outcome for hand, outcome in outcomes.items()}
+                                    for name, outcomes in machine.results.items()}})
+
+    async def run(self):
+
+        """Plays rounds while anyone is seated, then tears the table down."""
+
+        try:
+            while True:
+                self._update_seats()
+                if not self.seats:
+                    break
+                await self.play_round()
+                await asyncio.sleep(self.server.round_pause)
+        except Exception:
+            logger.exception("Table %s crashed", self.name)
+        finally:
+            self.server.tables.pop(self.name, None)
+            self.logic.delete_table()
+
+
+class TableServer:
+
+    """
+    Asyncio server hosting any number of tables in one process.
+
+    Clients speak newline-delimited JSON over TCP:
+    - {"type": "join", "table": NAME, "name": PLAYER}, then
+      {"type": "action", "action": "h" | "s" | "p"} when sent "your_turn", and
+      {"type": "leave"} to go.
+    - The server sends "joined", "state", "your_turn", "timeout", "results" and "error" messages.
+
+    Tables are created on the first join and removed when the last player leaves.
+    """
+
+    def __init__(self, host=HOST, port=PORT, decision_timeout=10.0, round_pause=1.0):
+        self.host = host
+        self.port = port
+        self.decision_timeout = decision_timeout
+        self.round_pause = round_pause
+        self.tables = {}
+        self._server = None
+
+    async def handle_connection(self, reader, writer):
+        table = None
+        seat = None
+        try:
+            async for line in reader:
+                try:
+                    message = json.loads(line)
+                    kind = message["type"]
+                except (ValueError, KeyError, TypeError):
+                    send(writer, {"type": "error", "message": "Malformed message."})
+                    continue
+
+                if kind == "join" and seat is None:
+                    table_name = str(message.get("table", "main"))
+                    name = str(message.get("name", "")).strip()
+                    if not name:
+                        send(writer, {"type": "error", "message": "Player name cannot be empty."})
+                        continue
+                    table = self.tables.get(table_name)
+                    if table is None:
+                        try:
+                            table = self.tables[table_name] = Table(self, table_name)
+                        except ValueError as error: # Invalid table id
+                            send(writer, {"type": "error", "message": str(error)})
+                            continue
+                    seat = table.join(name, writer)
+                    if seat is None:
+                        send(writer, {"type": "error", "message": "Name taken or table full."})
+                        continue
+                    send(writer, {"type": "joined", "table": table_name, "name": name})
+                elif kind == "action" and seat is not None:
+                    seat.actions.put_nowait(message.get("action"))
+                elif kind == "leave":
+                    break
+                else:
+                    send(writer, {"type": "error", "message": f"Unexpected {kind!r} message."})
+                await writer.drain() # Replies to this client wait for it to read them
+        except ConnectionError:
+            pass
+        finally:
+            if seat is not None:
+                table.leave(seat.name)
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        return self._server
+
+    async def serve_forever(self):
+        server = await self.start()
+        logger.info("Serving Blackjack tables on %s:%s", self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+
+# --- To run the server: python server.py [host] [port] ---
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    server_host = sys.argv[1] if len(sys.argv) > 1 else HOST
+    server_port = int(sys.argv[2]) if len(sys.argv) > 2 else PORT
+    asyncio.run(TableServer(server_host, server_port).serve_forever())
@@ -0,0 +1,102 @@
+import random
+import threading
+import cards
+from cards import CARDS_STRINGS
+
+MIN_DECKS = 1
+MAX_DECKS = 8
+
+
+class Shoe:
+
+    """
+    A dealing shoe of 1-8 decks shuffled together, with a cut card.
+
+    Once the cut card has come out (`penetration` of the shoe dealt), the shoe is
+    due for a reshuffle; call reshuffle_if_due() between rounds, as a dealer would.
+    If the shoe runs completely dry mid-round it reshuffles on the spot.
+
+    With `buffered=True` the next shoe is shuffled ahead of time on a background
+    thread, so a reshuffle is just swapping in the ready shoe.
+    """
+
+    def __init__(self, num_decks=1, penetration=0.75, card_encoding=CARDS_STRINGS, rng=None, buffered=False):
+        if not MIN_DECKS <= num_decks <= MAX_DECKS:
+            raise ValueError(f"Number of decks must be between {MIN_DECKS} and {MAX_DECKS}, got {num_decks}.")
+        if not 0 < penetration <= 1:
+            raise ValueError(f"Penetration must be in (0, 1], got {penetration}.")
+
+        self.num_decks = num_decks
+        self.penetration = penetration
+        self.card_encoding = card_encoding
+        self.rng = rng if rng is not None else random
+        self.size = 52 * num_decks
+        # Cards are dealt from the end, so the cut card sits `cut_remaining` cards from the bottom
+        self.cut_remaining = self.size - int(self.size * penetration)
+        self.shuffles = 0 # Number of shoes started, including the first one
+
+        self._next = None
+        self._next_thread = None
+        self.buffered = buffered
+        self.cards = self._build()
+        self.shuffles += 1
+        if buffered:
+            self._prepare_next()
+
+    def _build(self):
+
+        """Builds and shuffles a full shoe."""
+
+        return cards.new_deck(self.card_encoding, self.rng, self.num_decks)
+
+    def _prepare_next(self):
+
+        """Starts shuffling the next shoe on a background thread."""
+
+        def build():
+            self._next = self._build()
+
+        self._next_thread = threading.Thread(target=build, name="blackjack-shoe-shuffle", daemon=True)
+        self._next_thread.start()
+
+    def reshuffle(self):
+
+        """Replaces the shoe with a freshly shuffled one (the pre-shuffled one if buffered)."""
+
+        if self.buffered:
+            self._next_thread.join() # Normally finished long ago
+            self.cards, self._next = self._next, None
+            self._prepare_next()
+        else:
+            self.cards = self._build()
+        self.shuffles += 1
+
+    @property
+    def cut_card_reached(self):
+
+        """True once the cut card has come out of the shoe."""
+
+        return len(self.cards) <= self.cut_remaining
+
+    def reshuffle_if_due(self):
+
+        """Reshuffles if the cut card has come out. Returns True if it reshuffled."""
+
+        if len(self.cards) <= self.cut_remaining:
+            self.reshuffle()
+            return True
+        return False
+
+    def deal(self):
+
+        """Deals one card, reshuffling first if the shoe is empty."""
+
+        if not self.cards:
+            self.reshuffle()
+        return self.cards.pop()
+
+    def remaining(self):
+
+        """Returns the number of cards left in the shoe."""
+
+        return len(self.cards)
@@ -0,0 +1,277 @@
+import random
+import time
+import sys
+from functools import partial
+from logic import BlackjackLogic, PERSIST_NONE
+from cards import CARDS_IDS
+from common import HIT, STAND, SPLIT # Player actions returned by a decision function
+
+
+def mimic_dealer(hand, score, dealer_upcard, can_split):
+
+    """Decision function that plays like the dealer: hit below 17, never split."""
+
+    return HIT if score < 17 else STAND
+
+
+def _stand_on(threshold, split, hand, score, dealer_upcard, can_split):
+    if split and can_split:
+        return SPLIT
+    return HIT if score < threshold else STAND
+
+
+def stand_on(threshold, split=False):
+
+    """
+    Returns a decision function that hits below `threshold` and optionally always splits pairs.
+    The function is picklable, so it can be sent to worker processes.
+    """
+
+    return partial(_stand_on, threshold, split)
+
+
+class BlackjackSimulator:
+
+    """
+    Headless Blackjack round simulator.
+    Plays rounds through BlackjackLogic with no prompts and no file writes,
+    asking a decision function what to do with every hand.
+
+    A decision function is called as decide(hand, score, dealer_upcard, can_split)
+    and returns HIT, STAND or SPLIT. Cards are compact ids (see cards.py) unless
+    another `card_encoding` is given.
+
+    Each simulator shuffles with its own `random.Random(seed)`, so runs with the
+    same seed are reproducible and never touch the global `random` state. Cards
+    come from a casino-style shoe (six decks, 75% penetration by default); two
+    simulators with the same seed and shoe settings deal the same sequence of
+    shoes whatever their policies.
+
+    If `decide` has observe(cards) / new_shoe() methods (see strategies.Strategy),
+    it is shown every card of each settled round and told when the shoe is reshuffled.
+
+    With a `count_system` (see counting.py) the table keeps a running count as cards
+    are dealt. A `bet_spread(true_count)` then sizes each round's initial bet in units
+    from the true count before the deal; results are scaled by it.
+
+    `history` is an optional history.HandHistory that every round is streamed to.
+    """
+
+    def __init__(self, num_players=1, decide=mimic_dealer, seed=None, blackjack_payout=1.5, card_encoding=CARDS_IDS,
+                 num_decks=6, penetration=0.75, instrumentation=None, count_system=None, bet_spread=None,
+                 history=None):
+        if bet_spread is not None and count_system is None:
+            raise ValueError("A bet spread needs a count_system to read the true count from.")
+        self.rng = random.Random(seed)
+        self.decide = decide
+        self.blackjack_payout = blackjack_payout
+        self.bet_spread = bet_spread
+        self.bet = 1 # Initial bet of the current round, in units
+        self.logic = BlackjackLogic(persistence=PERSIST_NONE, rng=self.rng, card_encoding=card_encoding,
+                                    num_decks=num_decks, penetration=penetration, instrumentation=instrumentation,
+                                    count_system=count_system, history=history)
+        self._observe = getattr(decide, "observe", None)
+        self._new_shoe = getattr(decide, "new_shoe", None)
+        for i in range(1, num_players + 1):
+            self.logic.add_player(f"player{i}")
+        if instrumentation is not None:
+            self._play_hands = instrumentation.timed("player_turn", self._play_hands)
+
+    def play_round(self):
+
+        """
+        Plays a single round and returns (results, naturals, splits).
+        `results` has the same shape as BlackjackLogic.get_game_results; the round's
+        bet is left in `self.bet`.
+        """
+
+        logic = self.logic
+        shuffles = logic.shoe.shuffles
+        logic.new_round() # Also reshuffles the shoe at the cut card
+        if self._new_shoe is not None and logic.shoe.shuffles != shuffles:
+            self._new_shoe()
+        if self.bet_spread is not None:
+            self.bet = self.bet_spread(logic.true_count())
+        logic.initial_deal()
+
+        naturals = logic.check_natural_winners()
+        splits = 0
+
+        # With a dealer natural nobody plays: naturals push, everyone else loses
+        if "dealer" not in naturals:
+            dealer_upcard = logic.get_hand_details("dealer")[0][0]
+            any_standing = False
+
+            for player_name in logic.get_all_player_names():
+                if player_name in naturals:
+                    continue
+                splits += self._play_hands(player_name, dealer_upcard)
+                if logic.get_overall_player_status(player_name) != "busted":
+                    any_standing = True
+
+            # The dealer's draws can't change anything if every hand busted
+            if any_standing:
+                logic.dealer_turn()
+
+        results = logic.get_game_results()
+
+        # A player natural wins outright unless the dealer also has one
+        if "dealer" not in naturals:
+            for player_name in naturals:
+                results[player_name] = {1: 1}
+
+        if self._observe is not None:
+            self._observe(self._round_cards())
+        return results, naturals, splits
+
+    def _round_cards(self):
+
+        """Returns every card dealt this round (all player hands, then the dealer's)."""
+
+        data = self.logic.get_state()
+        dealt = []
+        for player in data.players.values():
+            for hand in player.hands:
+                dealt.extend(hand.cards)
+        dealt.extend(data.dealer.cards)
+        return dealt
+
+    def round_net(self, results, naturals):
+
+        """Returns the net win of a settled round in units of the initial bet, over all players."""
+
+        net = 0.0
+        for player_name, outcomes in results.items():
+            for outcome in outcomes.values():
+                if outcome == 1:
+                    net += self.blackjack_payout if player_name in naturals else 1
+                elif outcome == 0:
+                    net -= 1
+        return net
+
+    def play_shoe(self):
+
+        """
+        Plays rounds until the cut card comes out and returns (rounds, net, sum of
+        squared round nets). The next call starts on a freshly shuffled shoe.
+        """
+
+        rounds = 0
+        net = 0.0
+        squares = 0.0
+        shoe = self.logic.shoe
+        while True:
+            results, naturals, _ = self.play_round()
+            round_net = self.round_net(results, naturals) * self.bet
+            rounds += 1
+            net += round_net
+            squares += round_net * round_net
+            if shoe.cut_card_reached:
+                return rounds, net, squares
+
+    def _play_hands(self, player_name, dealer_upcard):
+
+        """Plays every hand of one player, including hands created by splits. Returns the number of splits."""
+
+        logic = self.logic
+        splits = 0
+        hand_number = 1
+
+        while hand_number <= logic.get_num_hands(player_name):
+            stood = False
+            while True:
+                hand, score = logic.get_hand_details(player_name, hand_number)
+                if logic.is_player_busted(player_name, hand_number):
+                    break
+
+                can_split = bool(logic.can_split(player_name, hand_number))
+                action = self.decide(hand, score, dealer_upcard, can_split)
+
+                if action == SPLIT and can_split:
+                    logic.split_hand(player_name, hand_number)
+                    splits += 1
+                elif action == HIT:
+                    logic.player_hit(player_name, hand_number)
+                else:
+                    stood = True
+                    break
+
+            logic.set_turn_played(player_name, hand_number, stood)
+            hand_number += 1
+
+        return splits
+
+    def run(self, rounds):
+
+        """
+        Plays `rounds` rounds and returns a report dictionary with outcome counts,
+        per-hand-number outcome tallies, EV per round and per hand (in units of
+        the initial bet) and rounds/sec. With a bet spread, net and EV are in bet
+        units and the report adds the units bet and the EV per unit bet.
+        """
+
+        wins = losses = pushes = naturals_won = splits = hands = 0
+        net = 0.0
+        units_bet = 0.0
+        hand_outcomes = {}
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            results, naturals, round_splits = self.play_round()
+            splits += round_splits
+            bet = self.bet
+
+            for player_name, outcomes in results.items():
+                for hand_number, outcome in outcomes.items():
+                    hands += 1
+                    units_bet += bet
+                    tally = hand_outcomes.get(hand_number)
+                    if tally is None:
+                        tally = hand_outcomes[hand_number] = {"wins": 0, "losses": 0, "pushes": 0}
+
+                    if outcome == 1:
+                        tally["wins"] += 1
+                        wins += 1
+                        if player_name in naturals:
+                            naturals_won += 1
+                            net += self.blackjack_payout * bet
+                        else:
+                            net += bet
+                    elif outcome == 0:
+                        tally["losses"] += 1
+                        losses += 1
+                        net -= bet
+                    else: # 0.5
+                        tally["pushes"] += 1
+                        pushes += 1
+        elapsed = time.perf_counter() - start
+
+        report = {
+            "rounds": rounds,
+            "hands": hands,
+            "wins": wins,
+            "losses": losses,
+            "pushes": pushes,
+            "naturals_won": naturals_won,
+            "splits": splits,
+            "hand_outcomes": hand_outcomes,
+            "net": net,
+            "ev_per_round": net / rounds if rounds else 0.0,
+            "ev_per_hand": net / hands if hands else 0.0,
+            "seconds": elapsed,
+            "rounds_per_sec": rounds / elapsed if elapsed else 0.0
+        }
+        if self.bet_spread is not None:
+            report["units_bet"] = units_bet
+            report["ev_per_unit"] = net / units_bet if units_bet else 0.0
+        return report
+
+
+# --- To run a quick simulation: python simulator.py [rounds] [players] ---
+if __name__ == "__main__":
+    num_rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    num_players = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    report = BlackjackSimulator(num_players=num_players).run(num_rounds)
+    for key, value in report.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,128 @@
+from logic import BlackjackLogic
+from common import HIT, STAND, SPLIT
+
+# Phases of a round
+PHASE_DEALING = "dealing"  # Waiting to deal the next round
+PHASE_PLAYER = "player"    # Waiting for `player` to act on hand `hand`
+PHASE_DEALER = "dealer"    # Every player is done; the dealer draws next
+PHASE_SETTLE = "settle"    # The dealer is done; the round is settled next
+
+# Actions: NEXT, plus a player's HIT / STAND / SPLIT
+NEXT = "next"  # Advances the non-decision phases (deal, dealer draws, settle)
+
+
+class RoundStateMachine:
+
+    """
+    Resumable, non-blocking driver for rounds of Blackjack on top of BlackjackLogic.
+
+    The machine is always in one phase (see `phase`, and `player` / `hand` while
+    a player acts) and `legal_actions()` lists what may be done next. apply(action)
+    performs one step and returns the new phase right away; nothing here waits for
+    input, so any number of games can be stepped from one event loop or worker.
+
+    A round goes: PHASE_DEALING --next--> PHASE_PLAYER (each hand of each player in
+    turn: hit / stand / split) --> PHASE_DEALER --next--> PHASE_SETTLE --next-->
+    PHASE_DEALING, with the results in `results` and the naturals in `naturals`.
+    Hands that reach 21 or bust end on their own, players with a natural skip their
+    turn, and a dealer natural skips every turn.
+    """
+
+    def __init__(self, logic=None):
+        self.logic = logic if logic is not None else BlackjackLogic()
+        self.phase = PHASE_DEALING
+        self.player = None # Player acting in PHASE_PLAYER
+        self.hand = None   # Hand number acting in PHASE_PLAYER
+        self.rounds = 0
+        self.naturals = []
+        self.results = None # Results of the last settled round
+
+    def legal_actions(self):
+
+        """Returns the actions apply() accepts in the current phase."""
+
+        if self.phase != PHASE_PLAYER:
+            return [NEXT]
+        if self.logic.can_split(self.player, self.hand):
+            return [HIT, STAND, SPLIT]
+        return [HIT, STAND]
+
+    def apply(self, action):
+
+        """Performs one action and returns the new phase. Raises ValueError for an action that isn't legal now."""
+
+        if action not in self.legal_actions():
+            raise ValueError(f"Illegal action {action!r} in phase {self.phase!r}. Use one of: {', '.join(self.legal_actions())}.")
+
+        logic = self.logic
+        if self.phase == PHASE_DEALING:
+            self._deal()
+        elif self.phase == PHASE_PLAYER:
+            if action == SPLIT:
+                logic.split_hand(self.player, self.hand)
+            elif action == HIT:
+                logic.player_hit(self.player, self.hand)
+                if logic.hand_score(self.player, self.hand) >= 21: # Bust or 21: nothing left to decide
+                    self._end_hand()
+            else:
+                self._end_hand(stood=True)
+        elif self.phase == PHASE_DEALER:
+            # The dealer's draws can't change anything if every hand busted
+            if any(logic.get_overall_player_status(name) != "busted"
+                   for name in logic.get_all_player_names() if name not in self.naturals):
+                logic.dealer_turn()
+            self.phase = PHASE_SETTLE
+        else:
+            self._settle()
+        return self.phase
+
+    def _deal(self):
+        logic = self.logic
+        self.rounds += 1
+        self.results = None
+        logic.new_round()
+        logic.initial_deal()
+        self.naturals = logic.check_natural_winners()
+
+        if "dealer" in self.naturals:
+            self.phase = PHASE_SETTLE # Nobody plays: naturals push, everyone else loses
+            return
+        self.player = None
+        self._next_hand()
+
+    def _end_hand(self, stood=False):
+        self.logic.set_turn_played(self.player, self.hand, stood)
+        self._next_hand()
+
+    def _next_hand(self):
+
+        """Moves to the next hand that needs a decision, or to the dealer if there is none."""
+
+        logic = self.logic
+        players = logic.get_all_player_names()
+        if self.player is None:
+            index, hand = 0, 1
+        else:
+            index, hand = players.index(self.player), self.hand + 1
+
+        while index < len(players):
+            name = players[index]
+            if name not in self.naturals:
+                while hand <= logic.get_num_hands(name):
+                    if logic.hand_score(name, hand) < 21:
+                        self.phase, self.player, self.hand = PHASE_PLAYER, name, hand
+                        return
+                    logic.set_turn_played(name, hand) # Already 21 after a split; nothing to decide
+                    hand += 1
+            index, hand = index + 1, 1
+
+        self.phase, self.player, self.hand = PHASE_DEALER, None, None
+
+    def _settle(self):
+        results = self.logic.get_game_results()
+        # A player natural wins outright unless the dealer also has one
+        if "dealer" not in self.naturals:
+            for name in self.naturals:
+                results[name] = {1: 1}
+        self.results = results
+        self.phase = PHASE_DEALING
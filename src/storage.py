@@ -0,0 +1,532 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+
+class StateConflictError(RuntimeError):
+
+    """Raised when a compare-and-swap change still conflicts after every retry."""
+
+
+class StateStore:
+
+    """
+    Where BlackjackLogic persists its game state.
+
+    BlackjackLogic's persistence policy decides when to write; the store decides where
+    and how. Writing is split in two so it can happen off the game thread:
+    serialize(state) runs on the game thread and returns an immutable payload,
+    write(payload) may then run on a background writer.
+
+    Every stored state carries a version number, bumped by each write. write is
+    last-writer-wins; compare_and_write only writes if the stored version is still
+    the one the change was based on, which is how several processes can safely
+    share one state (see BlackjackLogic's PERSIST_SHARED policy).
+
+    Subclasses implement load_versioned, serialize, write and compare_and_write;
+    record_results, delete and close are optional.
+    `bytes_read` counts what load read from the backing storage, `version` is the
+    version last loaded or written through this store, and `contention` counts
+    compare-and-swap commits and conflicts and waits for the store's lock.
+    """
+
+    def __init__(self):
+        self.bytes_read = 0
+        self.version = 0
+        self.contention = {
+            "commits": 0,
+            "conflicts": 0,
+            "aborts": 0, # Changes given up after every retry conflicted
+            "lock_waits": 0,
+            "lock_wait_seconds": 0.0,
+            "max_lock_wait_seconds": 0.0
+        }
+
+    def load(self):
+        """Returns the stored state, or None if nothing has been stored yet."""
+        return self.load_versioned()[0]
+
+    def load_versioned(self):
+        """Returns (stored state or None, its version; 0 if nothing has been stored yet)."""
+        raise NotImplementedError
+
+    def serialize(self, state):
+        """Turns the live state into a payload that is safe to hand to another thread."""
+        raise NotImplementedError
+
+    def write(self, payload):
+        """Writes a payload produced by serialize, whatever the stored version. Returns the new version."""
+        raise NotImplementedError
+
+    def compare_and_write(self, payload, expected_version):
+        """Writes a payload only if the stored version is still `expected_version`. Returns the new version, or None on a conflict."""
+        raise NotImplementedError
+
+    def payload_size(self, payload):
+        """Returns the number of bytes a payload will write."""
+        return len(payload)
+
+    def save(self, state):
+        """Serializes and writes the state in one go."""
+        self.write(self.serialize(state))
+
+    def record_results(self, results):
+        """Records the outcomes of a settled round (player -> {hand number -> outcome})."""
+
+    def delete(self):
+        """Deletes the stored state (the table is being torn down)."""
+
+    def close(self):
+        """Releases any resources held by the store."""
+
+
+class MemoryStore(StateStore):
+
+    """Keeps the last saved state in memory (as compact JSON, so it's a snapshot, not a live reference)."""
+
+    def __init__(self):
+        super().__init__()
+        self._payload = None
+        self._stored_version = 0
+        self._lock = threading.Lock()
+        self.results = [] # Every recorded round, oldest first
+
+    def load_versioned(self):
+        with self._lock:
+            payload, version = self._payload, self._stored_version
+        self.version = version
+        if payload is None:
+            return None, version
+        self.bytes_read += len(payload)
+        return json.loads(payload), version
+
+    def serialize(self, state):
+        return json.dumps(state, separators=(",", ":"))
+
+    def write(self, payload):
+        with self._lock:
+            self._payload = payload
+            self._stored_version += 1
+            self.version = self._stored_version
+        return self.version
+
+    def compare_and_write(self, payload, expected_version):
+        with self._lock:
+            if self._stored_version != expected_version:
+                self.contention["conflicts"] += 1
+                return None
+            self._payload = payload
+            self._stored_version += 1
+            self.version = self._stored_version
+            self.contention["commits"] += 1
+        return self.version
+
+    def record_results(self, results):
+        self.results.append(results)
+
+    def delete(self):
+        with self._lock:
+            self._payload = None
+            self._stored_version = 0
+
+
+def replace_file(path, text, durable=False):
+
+    """
+    Writes `text` to `path` atomically: to a temp file next to it, then renamed
+    over it, so readers see the old file or the new one, never partial text. The
+    temp file is per process and removed if the write fails. With `durable`, the
+    data is fsynced before the rename.
+    """
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w") as file:
+            file.write(text)
+            if durable:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class FileLock:
+
+    """
+    Exclusive advisory lock shared by every process using the same lock file
+    (flock, or msvcrt.locking on Windows), and by every thread using this object.
+    Waits for the lock are counted in `contention` (see StateStore).
+    The lock file is opened on first use.
+    """
+
+    def __init__(self, path, contention):
+        self.path = path
+        self.contention = contention
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def _try_lock(self):
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                return False
+        try:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def __enter__(self):
+        start = time.perf_counter()
+        waited = not self._thread_lock.acquire(blocking=False)
+        if waited:
+            self._thread_lock.acquire()
+        if self._file is None:
+            self._file = open(self.path, "a+b")
+
+        if not self._try_lock():
+            waited = True
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                while not self._try_lock():
+                    time.sleep(0.001)
+
+        if waited:
+            seconds = time.perf_counter() - start
+            contention = self.contention
+            contention["lock_waits"] += 1
+            contention["lock_wait_seconds"] += seconds
+            if seconds > contention["max_lock_wait_seconds"]:
+                contention["max_lock_wait_seconds"] = seconds
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._thread_lock.release()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# A versioned JSON file starts with its version, so it can be checked without parsing the whole state
+VERSION_HEADER = re.compile(rb'\{"version": (\d+), "state": ')
+VERSION_HEADER_SIZE = 48
+
+
+class JsonFileStore(StateStore):
+
+    """
+    The original storage: the whole state in one indented JSON file, stored as
+    {"version": N, "state": {...}} (files without a version are read as version 0).
+
+    Writes go to a temp file that is renamed over the data file, so readers never
+    see partial JSON and need no lock. Writers take an advisory lock on
+    `<path>.lock`, which makes compare_and_write safe across processes.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._lock = FileLock(path + ".lock", self.contention)
+
+    def load_versioned(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            self.version = 0
+            return None, 0
+        with open(self.path, "r") as file:
+            text = file.read()
+        self.bytes_read += len(text)
+
+        data = json.loads(text)
+        if "version" in data and "state" in data:
+            state, version = data["state"], data["version"]
+        else:
+            state, version = data, 0 # Written before states were versioned
+        self.version = version
+        return state, version
+
+    def serialize(self, state):
+        return json.dumps(state, indent=4)
+
+    def payload_size(self, payload):
+        return len(payload) + VERSION_HEADER_SIZE
+
+    def _stored_version(self):
+        try:
+            with open(self.path, "rb") as file:
+                header = file.read(VERSION_HEADER_SIZE)
+        except FileNotFoundError:
+            return 0
+        match = VERSION_HEADER.match(header)
+        return int(match.group(1)) if match else 0
+
+    def _replace(self, payload, version):
+        replace_file(self.path, f'{{"version": {version}, "state": {payload}}}')
+        self.version = version
+
+    def write(self, payload):
+        with self._lock:
+            version = max(self._stored_version(), self.version) + 1
+            self._replace(payload, version)
+        return version
+
+    def compare_and_write(self, payload, expected_version):
+        with self._lock:
+            if self._stored_version() != expected_version:
+                self.contention["conflicts"] += 1
+                return None
+            self._replace(payload, expected_version + 1)
+            self.contention["commits"] += 1
+        return expected_version + 1
+
+    def delete(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        self._lock.close()
+        if os.path.exists(self._lock.path):
+            os.remove(self._lock.path)
+
+    def close(self):
+        self._lock.close()
+
+
+# SQL statements, reused verbatim so sqlite3's statement cache keeps them prepared
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dealer (
+    table_id TEXT PRIMARY KEY,
+    num_players INTEGER NOT NULL,
+    cards TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    bust INTEGER NOT NULL,
+    hard INTEGER NOT NULL,
+    aces INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS players (
+    table_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    seat INTEGER NOT NULL,
+    hands INTEGER NOT NULL,
+    bust INTEGER NOT NULL,
+    stood INTEGER NOT NULL,
+    PRIMARY KEY (table_id, name)
+);
+CREATE TABLE IF NOT EXISTS hands (
+    table_id TEXT NOT NULL,
+    player TEXT NOT NULL,
+    hand_number INTEGER NOT NULL,
+    cards TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    bust INTEGER NOT NULL,
+    hard INTEGER NOT NULL,
+    aces INTEGER NOT NULL,
+    turn INTEGER NOT NULL,
+    stood INTEGER NOT NULL,
+    PRIMARY KEY (table_id, player, hand_number)
+);
+CREATE TABLE IF NOT EXISTS round_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_id TEXT NOT NULL,
+    settled_at REAL NOT NULL,
+    player TEXT NOT NULL,
+    hand_number INTEGER NOT NULL,
+    outcome REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS round_results_table ON round_results (table_id, settled_at);
+"""
+SELECT_DEALER = "SELECT num_players, cards, score, bust, hard, aces, version FROM dealer WHERE table_id = ?"
+SELECT_VERSION = "SELECT version FROM dealer WHERE table_id = ?"
+SELECT_PLAYERS = "SELECT name, hands, bust, stood FROM players WHERE table_id = ? ORDER BY seat"
+SELECT_HANDS = "SELECT player, hand_number, cards, score, bust, hard, aces, turn, stood FROM hands WHERE table_id = ?"
+DELETE_DEALER = "DELETE FROM dealer WHERE table_id = ?"
+UPSERT_DEALER = "INSERT OR REPLACE INTO dealer (table_id, num_players, cards, score, bust, hard, aces, version) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+DELETE_PLAYERS = "DELETE FROM players WHERE table_id = ?"
+DELETE_HANDS = "DELETE FROM hands WHERE table_id = ?"
+INSERT_PLAYER = "INSERT INTO players (table_id, name, seat, hands, bust, stood) VALUES (?, ?, ?, ?, ?, ?)"
+INSERT_HAND = "INSERT INTO hands (table_id, player, hand_number, cards, score, bust, hard, aces, turn, stood) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+INSERT_RESULT = "INSERT INTO round_results (table_id, settled_at, player, hand_number, outcome) VALUES (?, ?, ?, ?, ?)"
+
+
+
+class SqliteStore(StateStore):
+
+    """
+    SQLite storage in WAL mode, so many tables (each with its own `table_id`) and
+    reporting readers can share one database file without blocking each other.
+
+    The state is normalized into dealer, players and hands rows, and settled rounds
+    are appended to round_results. Each write (one per round under the default
+    persistence policy) is a single transaction, including any round results
+    recorded since the last write.
+
+    The version lives in the dealer row; compare_and_write checks it inside the
+    write transaction (BEGIN IMMEDIATE takes SQLite's write lock).
+    """
+
+    def __init__(self, path, table_id="main"):
+        super().__init__()
+        self.path = path
+        self.table_id = table_id
+        self._lock = threading.Lock()
+        self._pending_results = []
+        # The connection may be used by BlackjackLogic's background writer thread; _lock serializes access
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def load_versioned(self):
+        with self._lock:
+            connection = self._connection
+            # One read transaction, so the three selects see the same write
+            connection.execute("BEGIN")
+            try:
+                dealer = connection.execute(SELECT_DEALER, (self.table_id,)).fetchone()
+                if dealer is not None:
+                    players = connection.execute(SELECT_PLAYERS, (self.table_id,)).fetchall()
+                    hands = connection.execute(SELECT_HANDS, (self.table_id,)).fetchall()
+            finally:
+                connection.execute("COMMIT")
+        if dealer is None:
+            self.version = 0
+            return None, 0
+
+        num_players, dealer_cards, score, bust, hard, aces, version = dealer
+        state = {
+            "num_players": num_players,
+            "dhand": json.loads(dealer_cards),
+            "dscore": score,
+            "dbust": bust,
+            "dhard": hard,
+            "daces": aces,
+            "players_data": {}
+        }
+        self.bytes_read += len(dealer_cards)
+
+        for name, hand_count, player_bust, player_stood in players:
+            state["players_data"][name] = {"hands": hand_count, "bust": player_bust, "stood": player_stood}
+
+        for player, n, hand_cards, score, bust, hard, aces, turn, stood in hands:
+            player_data = state["players_data"][player]
+            player_data.update({f"hand{n}": json.loads(hand_cards), f"score{n}": score, f"bust{n}": bust,
+                                f"hard{n}": hard, f"aces{n}": aces, f"turn{n}": turn, f"stood{n}": stood})
+            self.bytes_read += len(hand_cards)
+        self.version = version
+        return state, version
+
+    def serialize(self, state):
+        table_id = self.table_id
+        dealer = (table_id, state["num_players"], json.dumps(state["dhand"]), state["dscore"], state["dbust"],
+                  state["dhard"], state["daces"])
+        players = []
+        hands = []
+        for seat, (name, player_data) in enumerate(state["players_data"].items()):
+            players.append((table_id, name, seat, player_data["hands"], player_data["bust"], player_data["stood"]))
+            for n in range(1, player_data["hands"] + 1):
+                hands.append((table_id, name, n, json.dumps(player_data[f"hand{n}"]), player_data[f"score{n}"],
+                              player_data[f"bust{n}"], player_data[f"hard{n}"], player_data[f"aces{n}"],
+                              player_data[f"turn{n}"], player_data[f"stood{n}"]))
+        return dealer, tuple(players), tuple(hands)
+
+    def _write(self, payload, expected_version):
+
+        """Writes a payload in one transaction; with an `expected_version`, only if it is still stored."""
+
+        dealer, players, hands = payload
+        with self._lock:
+            connection = self._connection
+            start = time.perf_counter()
+            connection.execute("BEGIN IMMEDIATE") # Waits up to the connection timeout for other writers
+            seconds = time.perf_counter() - start
+            if seconds > 0.001:
+                contention = self.contention
+                contention["lock_waits"] += 1
+                contention["lock_wait_seconds"] += seconds
+                contention["max_lock_wait_seconds"] = max(contention["max_lock_wait_seconds"], seconds)
+
+            results, self._pending_results = self._pending_results, []
+            try:
+                row = connection.execute(SELECT_VERSION, (self.table_id,)).fetchone()
+                stored_version = row[0] if row else 0
+                if expected_version is not None and stored_version != expected_version:
+                    connection.execute("ROLLBACK")
+                    self.contention["conflicts"] += 1
+                    return None # The retried change records its results again
+                version = max(stored_version, self.version) + 1
+
+                connection.execute(UPSERT_DEALER, dealer + (version,))
+                connection.execute(DELETE_PLAYERS, (self.table_id,))
+                connection.execute(DELETE_HANDS, (self.table_id,))
+                connection.executemany(INSERT_PLAYER, players)
+                connection.executemany(INSERT_HAND, hands)
+                connection.executemany(INSERT_RESULT, results)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                self._pending_results = results + self._pending_results # Keep them for the next write
+                raise
+            self.version = version
+            if expected_version is not None:
+                self.contention["commits"] += 1
+            return version
+
+    def write(self, payload):
+        return self._write(payload, None)
+
+    def compare_and_write(self, payload, expected_version):
+        return self._write(payload, expected_version)
+
+    def delete(self):
+        """Deletes the table's state rows; its round_results history is kept for reporting."""
+        with self._lock:
+            results, self._pending_results = self._pending_results, []
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(DELETE_DEALER, (self.table_id,))
+                connection.execute(DELETE_PLAYERS, (self.table_id,))
+                connection.execute(DELETE_HANDS, (self.table_id,))
+                connection.executemany(INSERT_RESULT, results)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def payload_size(self, payload):
+        """Approximate: card text plus 8 bytes per numeric column."""
+        dealer, players, hands = payload
+        return len(dealer[2]) + sum(len(hand[3]) for hand in hands) + 8 * (len(players) * 4 + len(hands) * 7)
+
+    def record_results(self, results):
+        settled_at = time.time()
+        rows = [(self.table_id, settled_at, player, hand_number, outcome)
+                for player, outcomes in results.items() for hand_number, outcome in outcomes.items()]
+        with self._lock:
+            self._pending_results.extend(rows)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
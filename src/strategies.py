@@ -0,0 +1,175 @@
+from dealer_odds import card_rank
+from ev_solver import EVSolver
+from cards import CARDS_IDS
+from counting import CardCounter, SYSTEM_HI_LO
+from common import HIT, STAND, SPLIT
+
+
+class Strategy:
+
+    """
+    Base class for decision policies.
+
+    A strategy is called like any simulator decision function,
+    strategy(hand, score, dealer_upcard, can_split) -> HIT, STAND or SPLIT, with
+    cards in `card_encoding`. Strategies that track the shoe also get:
+    - observe(cards): every card that came out in a round, once it is settled
+    - new_shoe(): the shoe was reshuffled
+    BlackjackSimulator calls both when the strategy defines them.
+
+    Subclasses implement decide; they must be picklable to run in worker processes.
+    """
+
+    name = "strategy"
+
+    def __init__(self, card_encoding=CARDS_IDS):
+        self.card_encoding = card_encoding
+
+    def __call__(self, hand, score, dealer_upcard, can_split):
+        return self.decide(hand, score, dealer_upcard, can_split)
+
+    def decide(self, hand, score, dealer_upcard, can_split):
+        raise NotImplementedError
+
+    def hard_total(self, hand):
+
+        """Returns (hard total with Aces as 1, number of Aces) of a hand."""
+
+        total = 0
+        aces = 0
+        for card in hand:
+            rank = card_rank(card, self.card_encoding)
+            total += rank
+            if rank == 1:
+                aces += 1
+        return total, aces
+
+
+class MimicDealer(Strategy):
+
+    """Plays like the dealer: hit below 17, never split."""
+
+    name = "mimic_dealer"
+
+    def decide(self, hand, score, dealer_upcard, can_split):
+        return HIT if score < 17 else STAND
+
+
+class NeverBust(Strategy):
+
+    """Hits only while no card can bust the hand (hard total of 11 or less), never splits."""
+
+    name = "never_bust"
+
+    def decide(self, hand, score, dealer_upcard, can_split):
+        hard, _ = self.hard_total(hand)
+        return HIT if hard <= 11 else STAND
+
+
+class TableStrategy(Strategy):
+
+    """
+    Looks decisions up in a chart shaped like EVSolver.basic_strategy_chart:
+    {"hard": {total: {upcard rank: action}}, "soft": ..., "pairs": {rank: ...}},
+    with actions "H", "S" or "P". A pair whose row doesn't say "P" is played as a
+    hard or soft total; totals missing from the chart hit below 12 and stand otherwise.
+    """
+
+    name = "table"
+
+    def __init__(self, chart, card_encoding=CARDS_IDS):
+        super().__init__(card_encoding)
+        self.chart = chart
+
+    def decide(self, hand, score, dealer_upcard, can_split):
+        upcard = card_rank(dealer_upcard, self.card_encoding)
+        if can_split:
+            pair_row = self.chart["pairs"].get(card_rank(hand[0], self.card_encoding))
+            if pair_row is not None and pair_row[upcard] == "P":
+                return SPLIT
+
+        hard, aces = self.hard_total(hand)
+        if aces and hard <= 11:
+            row = self.chart["soft"].get(hard + 10)
+        else:
+            row = self.chart["hard"].get(hard)
+
+        if row is None:
+            return HIT if score < 12 else STAND
+        return HIT if row[upcard] == "H" else STAND
+
+
+class BasicStrategy(TableStrategy):
+
+    """Hit / stand / split basic strategy for this engine's rules, solved by EVSolver for `num_decks` (None: infinite deck)."""
+
+    name = "basic"
+
+    def __init__(self, num_decks=None, card_encoding=CARDS_IDS):
+        super().__init__(EVSolver().basic_strategy_chart(num_decks), card_encoding)
+
+
+# Count-based deviations from basic strategy (the hit / stand / split subset of the "Illustrious 18"):
+# (hand kind, total or pair rank, dealer upcard) -> (true count index, action at or above it, action below it)
+DEVIATIONS = {
+    ("hard", 16, 10): (0, STAND, HIT),
+    ("hard", 15, 10): (4, STAND, HIT),
+    ("hard", 16, 9): (5, STAND, HIT),
+    ("hard", 13, 2): (-1, STAND, HIT),
+    ("hard", 13, 3): (-2, STAND, HIT),
+    ("hard", 12, 2): (3, STAND, HIT),
+    ("hard", 12, 3): (2, STAND, HIT),
+    ("hard", 12, 4): (0, STAND, HIT),
+    ("hard", 12, 5): (-2, STAND, HIT),
+    ("hard", 12, 6): (-1, STAND, HIT),
+    ("pairs", 10, 5): (5, SPLIT, STAND),
+    ("pairs", 10, 6): (4, SPLIT, STAND)
+}
+
+
+class CountingStrategy(Strategy):
+
+    """
+    Basic strategy with Hi-Lo count deviations (see DEVIATIONS).
+
+    The count is a counting.CardCounter fed the cards seen in earlier rounds of the
+    current shoe (through observe / new_shoe), for a `num_decks` shoe.
+    """
+
+    name = "counting"
+
+    def __init__(self, num_decks=6, base=None, deviations=DEVIATIONS, card_encoding=CARDS_IDS):
+        super().__init__(card_encoding)
+        self.num_decks = num_decks
+        self.base = base if base is not None else BasicStrategy(num_decks, card_encoding)
+        self.deviations = deviations
+        self.counter = CardCounter(system=SYSTEM_HI_LO, num_decks=num_decks, card_encoding=card_encoding)
+
+    def new_shoe(self):
+        self.counter.reset()
+
+    def observe(self, cards):
+        for card in cards:
+            self.counter.count(card)
+
+    def true_count(self):
+
+        """Hi-Lo running count per deck left in the shoe (at least half a deck)."""
+
+        return self.counter.true_count()
+
+    def decide(self, hand, score, dealer_upcard, can_split):
+        upcard = card_rank(dealer_upcard, self.card_encoding)
+        hard, aces = self.hard_total(hand)
+        if can_split:
+            key = ("pairs", card_rank(hand[0], self.card_encoding), upcard)
+        elif not (aces and hard <= 11):
+            key = ("hard", hard, upcard)
+        else:
+            key = None
+
+        deviation = self.deviations.get(key)
+        if deviation is None:
+            return self.base.decide(hand, score, dealer_upcard, can_split)
+        index, above, below = deviation
+        return above if self.true_count() >= index else below
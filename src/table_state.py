@@ -0,0 +1,186 @@
+from types import MappingProxyType
+
+# Hands a player can hold after splitting
+MAX_HANDS = 4
+
+
+class Hand:
+
+    """
+    One hand: its cards and the running totals BlackjackLogic keeps up to date as
+    cards come and go (hard total with Aces as 1, Ace count, score, bust flag),
+    plus whether its turn was played.
+    """
+
+    __slots__ = ("cards", "score", "bust", "hard", "aces", "turn", "stood")
+
+    def __init__(self):
+        self.cards = []
+        self.score = 0
+        self.bust = 0
+        self.hard = 0 # Running hard total (Aces as 1)
+        self.aces = 0 # Number of Aces
+        self.turn = 0 # 1 once the hand's turn is played
+        self.stood = 0
+
+
+class PlayerState:
+
+    """A seated player: their hands (one, plus one per split) and whether they stood or busted."""
+
+    __slots__ = ("hands", "bust", "stood")
+
+    def __init__(self):
+        self.hands = [Hand()]
+        self.bust = 0  # 1 if busted, 0 otherwise
+        self.stood = 0 # 1 if stood, 0 otherwise
+
+
+class TableState:
+
+    """
+    The in-memory game state of a table: the dealer's hand and the seated players
+    by name, in seat order.
+
+    Stores keep the flat dict layout data.json has always used ("dhand",
+    "players_data" -> {"hand1", "score1", ..., "hands"}); to_dict / from_dict
+    convert at that boundary only, and only the hands a player holds are written.
+    """
+
+    __slots__ = ("dealer", "players")
+
+    def __init__(self):
+        self.dealer = Hand()
+        self.players = {} # name -> PlayerState
+
+    @property
+    def num_players(self):
+        return len(self.players)
+
+    def to_dict(self):
+
+        """Returns the state in the storage layout (sharing the card lists, so serialize it right away)."""
+
+        dealer = self.dealer
+        players_data = {}
+        for name, player in self.players.items():
+            player_data = {"hands": len(player.hands), "bust": player.bust, "stood": player.stood}
+            for n, hand in enumerate(player.hands, 1):
+                player_data[f"hand{n}"] = hand.cards
+                player_data[f"score{n}"] = hand.score
+                player_data[f"turn{n}"] = hand.turn
+                player_data[f"stood{n}"] = hand.stood
+                player_data[f"bust{n}"] = hand.bust
+                player_data[f"hard{n}"] = hand.hard
+                player_data[f"aces{n}"] = hand.aces
+            players_data[name] = player_data
+
+        return {
+            "num_players": len(self.players),
+            "dhand": dealer.cards,
+            "dscore": dealer.score,
+            "dbust": dealer.bust,
+            "dhard": dealer.hard,
+            "daces": dealer.aces,
+            "players_data": players_data
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+
+        """Builds a state from the storage layout written by to_dict."""
+
+        state = cls()
+        dealer = state.dealer
+        dealer.cards = list(data["dhand"])
+        dealer.score = data["dscore"]
+        dealer.bust = data["dbust"]
+        dealer.hard = data["dhard"]
+        dealer.aces = data["daces"]
+
+        for name, player_data in data["players_data"].items():
+            player = PlayerState()
+            player.bust = player_data["bust"]
+            player.stood = player_data["stood"]
+            player.hands = []
+            for n in range(1, player_data["hands"] + 1):
+                hand = Hand()
+                hand.cards = list(player_data[f"hand{n}"])
+                hand.score = player_data[f"score{n}"]
+                hand.turn = player_data[f"turn{n}"]
+                hand.stood = player_data[f"stood{n}"]
+                hand.bust = player_data[f"bust{n}"]
+                hand.hard = player_data[f"hard{n}"]
+                hand.aces = player_data[f"aces{n}"]
+                player.hands.append(hand)
+            state.players[name] = player
+        return state
+
+
+class _ReadOnly:
+
+    """Base of the snapshot classes: attributes are set once, by the constructor."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only.")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only.")
+
+    def _set(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+
+class HandSnapshot(_ReadOnly):
+
+    """
+    Read-only copy of a hand: its cards (a tuple; [rank, suit] cards become
+    (rank, suit) tuples), score, soft / bust / stood flags and whether its turn
+    was played.
+    """
+
+    __slots__ = ("cards", "score", "soft", "bust", "stood", "turn")
+
+    def __init__(self, hand):
+        cards = tuple(tuple(card) if type(card) is list else card for card in hand.cards)
+        self._set(cards=cards, score=hand.score, soft=hand.aces > 0 and hand.hard <= 11,
+                  bust=hand.bust == 1, stood=hand.stood == 1, turn=hand.turn == 1)
+
+
+class PlayerSnapshot(_ReadOnly):
+
+    """Read-only copy of a seated player: their hands (a tuple of HandSnapshot) and overall bust / stood flags."""
+
+    __slots__ = ("hands", "bust", "stood")
+
+    def __init__(self, player):
+        self._set(hands=tuple(HandSnapshot(hand) for hand in player.hands), bust=player.bust == 1,
+                  stood=player.stood == 1)
+
+
+class TableSnapshot(_ReadOnly):
+
+    """
+    Immutable copy of a TableState, as served by BlackjackLogic.snapshot(). It
+    shares nothing with the live state, so it can be read (or handed to another
+    thread) for as long as needed. `revision` identifies the state it was taken
+    from: two snapshots with the same revision show the same table.
+    """
+
+    __slots__ = ("revision", "dealer", "players", "player_names")
+
+    def __init__(self, state, revision=0):
+        players = {name: PlayerSnapshot(player) for name, player in state.players.items()}
+        self._set(revision=revision, dealer=HandSnapshot(state.dealer), players=MappingProxyType(players),
+                  player_names=tuple(players))
+
+    def hand(self, name, hand_number=1):
+
+        """Returns the HandSnapshot of the dealer ("dealer") or of one of a player's hands."""
+
+        if name == "dealer":
+            return self.dealer
+        return self.players[name].hands[hand_number - 1]
@@ -0,0 +1,308 @@
+import argparse
+import os
+import sys
+import time
+from assets import CardAtlas
+from cards import CARDS_IDS
+from common import percentile
+from logic import BlackjackLogic, PERSIST_NONE
+from simulator import stand_on
+from state_machine import RoundStateMachine, PHASE_DEALING, PHASE_PLAYER, NEXT, HIT, STAND, SPLIT
+
+try:
+    import pygame
+except ImportError: # pygame is only needed by the graphic client
+    pygame = None
+
+FELT = (20, 90, 50)
+TEXT = (240, 240, 240)
+BADGE = (10, 45, 25)
+OUTCOME_TEXT = {1: "win", 0: "lose", 0.5: "push"}
+KEY_ACTIONS = {"h": HIT, "s": STAND, "p": SPLIT}
+
+
+class TableView:
+
+    """
+    pygame view of one table, driven by a RoundStateMachine.
+
+    Every frame the view lays the table out as a scene of keyed elements (cards,
+    score and result badges, names) and compares it with the last frame's: only
+    elements that appeared, moved, changed or went away are redrawn, over the
+    pre-rendered felt, and only those rectangles are pushed to the display. The
+    dealer's hole card is drawn face down until the dealer plays, so turning it
+    over redraws one card.
+
+    Animations are counted in frames, not seconds: each new card slides from the
+    shoe for `deal_frames` frames, one card after the other, and the table pauses
+    `pause_frames` frames between steps. Interactively the frame rate is capped
+    at `fps`, which sets the real duration; nothing ever sleeps mid-round.
+
+    `decide` plays every hand like a simulator decision function; without it the
+    acting player uses the keyboard (H / S / P). Card sprites come from a
+    CardAtlas pre-scaled to `card_width`.
+
+    Render times (scene, blits and display update, excluding the frame cap) are
+    kept per frame; frame_report() returns their percentiles.
+    """
+
+    def __init__(self, machine, size=(1280, 720), card_width=64, fps=60, deal_frames=12, pause_frames=30, decide=None):
+        if pygame is None:
+            raise ImportError("The table view needs pygame (pip install pygame).")
+        self.machine = machine
+        self.logic = machine.logic
+        self.size = size
+        self.fps = fps
+        self.deal_frames = deal_frames
+        self.pause_frames = pause_frames
+        self.decide = decide
+
+        pygame.display.init()
+        pygame.font.init()
+        self.screen = pygame.display.set_mode(size)
+        pygame.display.set_caption("Blackjack")
+        self.atlas = CardAtlas(self.logic.card_encoding)
+        self.card_size = self.atlas.scaled_size(card_width)
+        self.atlas.prepare(self.card_size)
+        self.font = pygame.font.Font(None, 24)
+        self.background = pygame.Surface(size).convert()
+        self.background.fill(FELT)
+        self.shoe_position = (size[0] - self.card_size[0] - 20, 20)
+
+        self._texts = {} # Rendered text surfaces by (text, color)
+        self._drawn = {} # key -> (content, rect) of the last frame
+        self._landed = set() # Cards that finished their deal animation
+        self._flight = None  # (key, frames done) of the card being dealt
+        self._queued = False # True while cards wait for the one in flight
+        self._wait = 0       # Frames left before the table moves on
+        self.frame_times = []
+        self.dirty_pixels = 0
+        self.frames = 0
+        self.screen.blit(self.background, (0, 0))
+        pygame.display.flip()
+
+    def _text(self, text, color=TEXT):
+        surface = self._texts.get((text, color))
+        if surface is None:
+            surface = self._texts[(text, color)] = self.font.render(text, True, color, BADGE)
+        return surface
+
+    def _hand_cards(self):
+
+        """Yields (owner, hand number, HandSnapshot, top-left of the first card) for every hand, the dealer's last."""
+
+        card_height = self.card_size[1]
+        table = self.logic.snapshot()
+        seat_width = self.size[0] // max(1, len(table.players))
+        for seat, (name, player) in enumerate(table.players.items()):
+            x = seat * seat_width + 12
+            for hand_number, hand in enumerate(player.hands, 1):
+                y = 320 + (hand_number - 1) * (card_height // 2 + 26)
+                yield name, hand_number, hand, (x, y)
+        yield "dealer", 1, table.dealer, (self.size[0] // 2 - self.card_size[0], 60)
+
+    def scene(self):
+
+        """
+        Lays out the current state as {key: (content, surface, rect)} in drawing
+        order. Cards not yet dealt on screen are queued for the deal animation.
+        """
+
+        machine = self.machine
+        width, height = self.card_size
+        step = width * 3 // 10
+        hole_hidden = machine.phase == PHASE_PLAYER
+        results = machine.results if machine.phase == PHASE_DEALING else None
+        elements = {}
+        self._queued = False
+
+        for owner, hand_number, hand, (x, y) in self._hand_cards():
+            pending = False
+            for i, card in enumerate(hand.cards):
+                key = ("card", owner, hand_number, i)
+                target = pygame.Rect(x + i * step, y, width, height)
+                if key not in self._landed:
+                    if self._flight is None:
+                        self._flight = (key, 0)
+                    pending = True
+                    if self._flight[0] != key:
+                        self._queued = True
+                        break # Dealt after the card in flight
+                    done = self._flight[1] / self.deal_frames
+                    target.topleft = (round(self.shoe_position[0] + (target.x - self.shoe_position[0]) * done),
+                                      round(self.shoe_position[1] + (target.y - self.shoe_position[1]) * done))
+                hidden = owner == "dealer" and i == 1 and hole_hidden
+                surface = self.atlas.back(self.card_size) if hidden else self.atlas.sprite(card, self.card_size)
+                elements[key] = ("back" if hidden else card, surface, target)
+
+            # Badges show once every card of the hand is down
+            if not pending and hand.cards:
+                if owner == "dealer":
+                    label = "?" if hole_hidden else str(hand.score)
+                else:
+                    label = str(hand.score)
+                    if results is not None and owner in results:
+                        label += f" {OUTCOME_TEXT[results[owner][hand_number]]}"
+                surface = self._text(label)
+                elements[("badge", owner, hand_number)] = (label, surface, surface.get_rect(bottomleft=(x, y - 2)))
+
+        names = self.logic.snapshot().player_names
+        for seat, name in enumerate(names):
+            color = (255, 215, 0) if machine.phase == PHASE_PLAYER and machine.player == name else TEXT
+            surface = self._text(name, color)
+            seat_width = self.size[0] // len(names)
+            elements[("name", name)] = ((name, color), surface, surface.get_rect(topleft=(seat * seat_width + 12, 280)))
+        return elements
+
+    def render(self):
+
+        """Draws one frame, updating only the regions that changed. Returns the number of dirty rectangles."""
+
+        start = time.perf_counter()
+        scene = self.scene()
+        dirty = []
+        for key, (content, _, rect) in scene.items():
+            drawn = self._drawn.get(key)
+            if drawn is None:
+                dirty.append(rect)
+            elif drawn != (content, rect):
+                dirty.append(drawn[1])
+                dirty.append(rect)
+        for key, (_, rect) in self._drawn.items():
+            if key not in scene:
+                dirty.append(rect)
+
+        if dirty:
+            screen = self.screen
+            for area in dirty:
+                screen.set_clip(area)
+                screen.blit(self.background, area, area)
+                for _, surface, rect in scene.values():
+                    if rect.colliderect(area):
+                        screen.blit(surface, rect)
+            screen.set_clip(None)
+            pygame.display.update(dirty)
+            self.dirty_pixels += sum(area.width * area.height for area in dirty)
+        self._drawn = {key: (content, rect) for key, (content, _, rect) in scene.items()}
+
+        # Advance the deal animation by one frame
+        if self._flight is not None:
+            key, done = self._flight
+            if done >= self.deal_frames:
+                self._landed.add(key)
+                self._flight = None
+            else:
+                self._flight = (key, done + 1)
+
+        self.frame_times.append(time.perf_counter() - start)
+        self.frames += 1
+        return len(dirty)
+
+    def busy(self):
+
+        """True while cards are being dealt or the table is pausing."""
+
+        return self._flight is not None or self._queued or self._wait > 0
+
+    def step(self, key=None):
+
+        """Moves the game on by at most one action once the animations are done. `key` is a pressed key name."""
+
+        if self._wait > 0:
+            self._wait -= 1
+            return
+        if self._flight is not None or self._queued:
+            return
+        machine = self.machine
+        if machine.phase == PHASE_PLAYER:
+            if self.decide is not None:
+                table = self.logic.snapshot()
+                hand = table.hand(machine.player, machine.hand)
+                action = self.decide(list(hand.cards), hand.score, table.dealer.cards[0], SPLIT in machine.legal_actions())
+            else:
+                action = KEY_ACTIONS.get(key)
+            if action in machine.legal_actions():
+                machine.apply(action)
+        else:
+            if machine.phase == PHASE_DEALING:
+                self._landed = set() # New round: the table is cleared and every card is dealt again
+            machine.apply(NEXT)
+            self._wait = self.pause_frames
+
+    def run(self, rounds=None, frames=None, cap=True):
+
+        """
+        Runs the table until `rounds` rounds are settled, `frames` frames were
+        drawn or the window is closed. Returns frame_report(). With `cap` off,
+        frames are drawn back to back (for benchmarks).
+        """
+
+        clock = pygame.time.Clock()
+        while (rounds is None or self.machine.rounds < rounds or self.machine.phase != PHASE_DEALING) and \
+                (frames is None or self.frames < frames):
+            key = None
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    return self.frame_report()
+                if event.type == pygame.KEYDOWN:
+                    key = pygame.key.name(event.key)
+            self.step(key)
+            self.render()
+            if cap:
+                clock.tick(self.fps)
+        return self.frame_report()
+
+    def frame_report(self):
+
+        """Returns render-time percentiles in ms, frames over the `fps` budget and the average share of the screen redrawn."""
+
+        times = sorted(self.frame_times)
+        if not times:
+            return {"frames": 0}
+        budget = 1 / self.fps
+        return {
+            "frames": len(times),
+            "rounds": self.machine.rounds,
+            "mean_ms": sum(times) / len(times) * 1000,
+            "p50_ms": percentile(times, 0.5) * 1000,
+            "p95_ms": percentile(times, 0.95) * 1000,
+            "p99_ms": percentile(times, 0.99) * 1000,
+            "max_ms": times[-1] * 1000,
+            "over_budget": sum(1 for t in times if t > budget),
+            "dirty_fraction": self.dirty_pixels / (len(times) * self.size[0] * self.size[1])
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Graphic Blackjack table.")
+    parser.add_argument("--players", type=int, default=3)
+    parser.add_argument("--bots", action="store_true", help="let every player play basic 'stand on 17' (implied by --headless)")
+    parser.add_argument("--headless", action="store_true", help="render with SDL's dummy driver and report frame times")
+    parser.add_argument("--rounds", type=int, default=None)
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    args = parser.parse_args(argv)
+
+    if args.headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        rounds = args.rounds or 200
+    else:
+        rounds = args.rounds
+
+    logic = BlackjackLogic(persistence=PERSIST_NONE, card_encoding=CARDS_IDS, num_decks=6)
+    for i in range(1, args.players + 1):
+        logic.add_player(f"player{i}")
+    view = TableView(RoundStateMachine(logic), size=(args.width, args.height), fps=args.fps,
+                     decide=stand_on(17) if args.bots or args.headless else None)
+    report = view.run(rounds, cap=not args.headless)
+    pygame.quit()
+    if args.headless:
+        for key, value in report.items():
+            print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
+    return 0
+
+
+# --- python table_view.py [--players 3] [--bots] | python table_view.py --headless [--rounds 200] ---
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from simulator import BlackjackSimulator
+from parallel import worker_seeds, split_rounds
+from strategies import BasicStrategy, CountingStrategy, MimicDealer, NeverBust
+
+# z-score of a two-sided 95% confidence interval
+Z_95 = 1.959964
+
+
+def _run_policy_shard(strategy, seed, num_shoes, num_players, blackjack_payout, num_decks, penetration):
+
+    """Plays `num_shoes` shoes with one policy in a worker process. Returns [(rounds, net, squared nets)] per shoe."""
+
+    simulator = BlackjackSimulator(num_players=num_players, decide=strategy, seed=seed, blackjack_payout=blackjack_payout,
+                                   num_decks=num_decks, penetration=penetration)
+    return [simulator.play_shoe() for _ in range(num_shoes)]
+
+
+def policy_stats(shoes):
+
+    """
+    Summarizes one policy's per-shoe results: EV and variance per round, and a 95%
+    confidence interval for the EV. Rounds from the same shoe are correlated, so the
+    standard error uses the shoes as the independent samples (ratio estimator).
+    """
+
+    n = len(shoes)
+    rounds = sum(shoe[0] for shoe in shoes)
+    net = sum(shoe[1] for shoe in shoes)
+    squares = sum(shoe[2] for shoe in shoes)
+    ev = net / rounds
+    mean_rounds = rounds / n
+    residuals = sum((shoe_net - ev * shoe_rounds) ** 2 for shoe_rounds, shoe_net, _ in shoes)
+    standard_error = math.sqrt(residuals / (n * (n - 1))) / mean_rounds if n > 1 else float("inf")
+
+    return {
+        "shoes": n,
+        "rounds": rounds,
+        "net": net,
+        "ev_per_round": ev,
+        "variance_per_round": squares / rounds - ev * ev,
+        "standard_error": standard_error,
+        "ci95": (ev - Z_95 * standard_error, ev + Z_95 * standard_error)
+    }
+
+
+def paired_stats(shoes, baseline_shoes, stats, baseline_stats):
+
+    """
+    Compares a policy with the baseline over the same shoes. Returns the EV difference,
+    its paired 95% confidence interval, and how many times fewer rounds the pairing
+    needs than independent runs for the same precision (variance reduction).
+    """
+
+    n = len(shoes)
+    mean_rounds = stats["rounds"] / n
+    baseline_mean_rounds = baseline_stats["rounds"] / n
+    squares = 0.0
+    for (rounds, net, _), (baseline_rounds, baseline_net, _) in zip(shoes, baseline_shoes):
+        residual = (net - stats["ev_per_round"] * rounds) / mean_rounds
+        baseline_residual = (baseline_net - baseline_stats["ev_per_round"] * baseline_rounds) / baseline_mean_rounds
+        squares += (residual - baseline_residual) ** 2
+
+    difference = stats["ev_per_round"] - baseline_stats["ev_per_round"]
+    standard_error = math.sqrt(squares / (n * (n - 1))) if n > 1 else float("inf")
+    unpaired_variance = stats["standard_error"] ** 2 + baseline_stats["standard_error"] ** 2
+    return {
+        "difference": difference,
+        "standard_error": standard_error,
+        "ci95": (difference - Z_95 * standard_error, difference + Z_95 * standard_error),
+        "variance_reduction": unpaired_variance / standard_error ** 2 if standard_error else float("inf")
+    }
+
+
+def run_tournament(strategies, shoes=2000, workers=None, seed=0, num_players=1, blackjack_payout=1.5,
+                   num_decks=6, penetration=0.75, baseline=None):
+
+    """
+    Plays every policy in `strategies` (name -> strategy or decision function) over the
+    same `shoes` shoes (common random numbers) across a process pool.
+
+    The shoes are split into one shard per worker, each with its own seed (see
+    parallel.worker_seeds), and every policy plays every shard with that seed, so
+    shoe i is dealt identically for all policies. Returns {"policies": name -> stats,
+    "versus": name -> paired comparison with `baseline` (default: the first policy), ...}.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    shards = split_rounds(shoes, workers)
+    seeds = worker_seeds(seed, workers)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            name: [executor.submit(_run_policy_shard, strategy, shard_seed, shard_shoes, num_players, blackjack_payout,
+                                   num_decks, penetration)
+                   for shard_shoes, shard_seed in zip(shards, seeds) if shard_shoes]
+            for name, strategy in strategies.items()
+        }
+        # Concatenate in shard order, so shoe i is the same shoe for every policy
+        results = {name: [shoe for future in shard_futures for shoe in future.result()]
+                   for name, shard_futures in futures.items()}
+    elapsed = time.perf_counter() - start
+
+    baseline = baseline or next(iter(strategies))
+    policies = {name: policy_stats(policy_shoes) for name, policy_shoes in results.items()}
+    versus = {name: paired_stats(results[name], results[baseline], policies[name], policies[baseline])
+              for name in strategies if name != baseline}
+
+    return {
+        "policies": policies,
+        "baseline": baseline,
+        "versus": versus,
+        "shoes": shoes,
+        "workers": workers,
+        "seed": seed,
+        "seconds": elapsed
+    }
+
+
+def default_strategies(num_decks=6):
+
+    """The built-in policies, basic strategy first (the default baseline)."""
+
+    basic = BasicStrategy(num_decks)
+    return {
+        "basic": basic,
+        "counting": CountingStrategy(num_decks, base=basic),
+        "never_bust": NeverBust(),
+        "mimic_dealer": MimicDealer()
+    }
+
+
+def format_report(report):
+
+    """Formats a tournament report as a text table."""
+
+    lines = [f"{'policy':<14}{'rounds':>10}{'EV/round':>11}{'var/round':>11}{'95% CI':>22}"
+             f"{'vs ' + report['baseline']:>14}{'paired 95% CI':>22}{'VR':>7}"]
+    for name, stats in report["policies"].items():
+        low, high = stats["ci95"]
+        line = (f"{name:<14}{stats['rounds']:>10}{stats['ev_per_round']:>+11.4f}{stats['variance_per_round']:>11.3f}"
+                f"{f'[{low:+.4f}, {high:+.4f}]':>22}")
+        versus = report["versus"].get(name)
+        if versus is not None:
+            low, high = versus["ci95"]
+            line += (f"{versus['difference']:>+14.4f}{f'[{low:+.4f}, {high:+.4f}]':>22}"
+                     f"{versus['variance_reduction']:>7.1f}")
+        lines.append(line)
+    lines.append(f"{report['shoes']} shoes on {report['workers']} workers in {report['seconds']:.1f}s "
+                 f"(VR: rounds saved by pairing, as a factor)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank decision policies over common shoes.")
+    parser.add_argument("--shoes", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--players", type=int, default=1)
+    parser.add_argument("--decks", type=int, default=6)
+    parser.add_argument("--penetration", type=float, default=0.75)
+    args = parser.parse_args(argv)
+
+    report = run_tournament(default_strategies(args.decks), shoes=args.shoes, workers=args.workers, seed=args.seed,
+                            num_players=args.players, num_decks=args.decks, penetration=args.penetration)
+    print(format_report(report))
+    return 0
+
+
+# --- python tournament.py [--shoes 2000] [--workers N] [--seed 0] [--players 1] [--decks 6] ---
+if __name__ == "__main__":
+    sys.exit(main())
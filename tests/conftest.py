@@ -0,0 +1,15 @@
+import os
+import sys
+import pytest
+
+# The modules live side by side in src/ and import each other by name
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src"))
+
+
+@pytest.fixture(autouse=True)
+def in_tmp_path(tmp_path, monkeypatch):
+
+    """Runs every test in its own directory, so data.json, journals and locks never land in the tree."""
+
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
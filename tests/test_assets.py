@@ -0,0 +1,47 @@
+import os
+import pytest
+
+pygame = pytest.importorskip("pygame")
+
+from assets import PHOTOS_DIR, CardAtlas, build_atlas, card_from_photo_name, find_photos
+from cards import CARDS_IDS, CARDS_RANKS, CARDS_STRINGS, encode
+
+
+@pytest.fixture
+def atlas_files(tmp_path):
+    return str(tmp_path / "atlas.png"), str(tmp_path / "atlas.json")
+
+
+def test_photo_names_map_to_cards():
+    assert card_from_photo_name("ace_spades.png") == ["Ace", "Spades"]
+    assert card_from_photo_name("ace_club.png") == ["Ace", "Clubs"]
+    assert card_from_photo_name("Ten_Hearts.PNG") == ["10", "Hearts"]
+    assert card_from_photo_name("cards_atlas.png") is None
+    assert sorted(find_photos()) == list(range(52))
+
+
+def test_the_atlas_is_built_once_and_sprites_are_prescaled(atlas_files):
+    atlas_file, index_file = atlas_files
+    index = build_atlas(PHOTOS_DIR, atlas_file, index_file)
+    width, height = index["card_size"]
+    assert len(index["sprites"]) == 52
+    assert index["sprites"]["14"] == [width, height, width, height] # Column id % 13, row id // 13
+
+    built = os.path.getmtime(atlas_file)
+    atlas = CardAtlas(CARDS_IDS, sizes=[(64, 90)], atlas_file=atlas_file, index_file=index_file)
+    assert os.path.getmtime(atlas_file) == built # Up to date: loaded, not rebuilt
+    assert atlas.sprite(51).get_size() == (width, height)
+    assert atlas.sprite(51, (64, 90)).get_size() == atlas.back((64, 90)).get_size() == (64, 90)
+    assert atlas.sprite(51, (64, 90)) is atlas.sprite(51, (64, 90)) # Scaled once, then looked up
+    with pytest.raises(KeyError):
+        atlas.sprite(51, (32, 45)) # Never scaled mid-frame
+
+
+def test_every_encoding_finds_the_same_sprite(atlas_files):
+    atlas_file, index_file = atlas_files
+    atlases = {encoding: CardAtlas(encoding, atlas_file=atlas_file, index_file=index_file)
+               for encoding in (CARDS_IDS, CARDS_STRINGS, CARDS_RANKS)}
+    assert os.path.exists(atlas_file) # Built on first use
+    assert atlases[CARDS_STRINGS].card_id(["Queen", "Hearts"]) == atlases[CARDS_IDS].card_id(10) == 10
+    assert atlases[CARDS_RANKS].card_id(1) == encode(["Ace", "Spades"])
+    assert atlases[CARDS_RANKS].card_id(10) == encode(["10", "Spades"])
@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from batch_engine import BatchEngine
+
+
+@pytest.mark.parametrize("threshold, num_players, num_decks, penetration", [
+    (17, 1, 6, 0.75),
+    (12, 3, 2, 0.5),
+    (15, 7, 1, 1.0), # Rounds run past the end of the shoe into the spare positions
+])
+def test_batch_outcomes_match_the_scalar_simulator(threshold, num_players, num_decks, penetration):
+    engine = BatchEngine(threshold, num_players, num_decks, penetration, seed=7)
+    shoes = engine.new_shoes(150)
+    assert engine.cross_check(shoes) > 150 * num_players
+
+
+def test_totals_add_up_and_repeat_with_the_seed():
+    report = BatchEngine(num_players=2, seed=1).run(500, batch=128)
+    assert report["hands"] == 2 * report["rounds"]
+    assert report["wins"] + report["losses"] + report["pushes"] == report["hands"]
+    assert BatchEngine(num_players=2, seed=1).run(500, batch=128)["net"] == report["net"]
@@ -0,0 +1,34 @@
+import itertools
+from benchmark import DEFAULT_THRESHOLD, MIN_THRESHOLD, NOISE_FACTOR, compare, regression_threshold, repeated
+
+
+def _metric(value, better, spread=None):
+    metric = {"value": value, "better": better}
+    if spread is not None:
+        metric["spread"] = spread
+    return metric
+
+
+def test_repeated_reports_the_median_and_spread_after_a_warmup():
+    values = itertools.count(100, 10) # The warmup measures 100, the runs 110 to 150
+    metric = repeated(lambda: {"value": next(values), "p95": 0, "better": "lower"}, repeats=5)
+    assert metric["runs"] == [110, 120, 130, 140, 150]
+    assert metric["value"] == 130
+    assert metric["spread"] == 40 / 130
+
+
+def test_regressions_depend_on_direction_and_noise():
+    assert regression_threshold({}, {}) == DEFAULT_THRESHOLD
+    assert regression_threshold({"spread": 0.0}, {"spread": 0.001}) == MIN_THRESHOLD
+    assert regression_threshold({"spread": 0.05}, {"spread": 0.1}) == NOISE_FACTOR * 0.1
+
+    baseline = {"metrics": {"latency": _metric(100, "lower", 0.01), "rounds": _metric(1000, "higher", 0.01),
+                            "noisy": _metric(100, "lower", 0.2), "gone": _metric(1, "lower")}}
+    current = {"metrics": {"latency": _metric(110, "lower", 0.01), "rounds": _metric(1100, "higher", 0.01),
+                           "noisy": _metric(130, "lower", 0.2)}}
+    rows = {row[0]: row for row in compare(baseline, current)}
+    assert set(rows) == {"latency", "rounds", "noisy"}
+    assert rows["latency"][5] # 10% slower, beyond 3% noise
+    assert not rows["rounds"][5] # 10% more rounds/s is an improvement
+    assert not rows["noisy"][5] # 30% slower, within 2 x 20% noise
+    assert compare(baseline, current, threshold=0.5)[0][5] is False
@@ -0,0 +1,29 @@
+from cards import (CARDS_IDS, CARDS_RANKS, CARDS_STRINGS, ID_HARD_VALUES, RANK_HARD_VALUES, RANKS, STRING_HARD_VALUES,
+                   SUITS, decode, encode, new_cards)
+from simulator import BlackjackSimulator, stand_on
+
+TIMING_KEYS = ("seconds", "rounds_per_sec")
+
+
+def test_ids_round_trip_and_keep_the_deck_order():
+    strings = new_cards(CARDS_STRINGS)
+    assert [encode(card) for card in strings] == list(new_cards(CARDS_IDS)) == list(range(52))
+    assert [decode(card) for card in range(52)] == strings
+    assert encode(["Ace", "Spades"]) == 51 and decode(0) == ["2", "Hearts"]
+    assert len({tuple(card) for card in strings}) == len(SUITS) * len(RANKS)
+
+
+def test_every_encoding_holds_the_same_values():
+    for num_decks in (1, 6):
+        by_strings = sorted(STRING_HARD_VALUES[card[0]] for card in new_cards(CARDS_STRINGS, num_decks))
+        assert sorted(ID_HARD_VALUES[card] for card in new_cards(CARDS_IDS, num_decks)) == by_strings
+        assert sorted(RANK_HARD_VALUES[card] for card in new_cards(CARDS_RANKS, num_decks)) == by_strings
+
+
+def test_encodings_play_the_same_game():
+    reports = []
+    for encoding in (CARDS_STRINGS, CARDS_IDS):
+        report = BlackjackSimulator(num_players=2, decide=stand_on(16, split=True), seed=8, card_encoding=encoding).run(400)
+        reports.append({key: value for key, value in report.items() if key not in TIMING_KEYS})
+    assert reports[0] == reports[1]
+    assert reports[0]["splits"]
@@ -0,0 +1,48 @@
+import array
+import random
+import pytest
+from cards import CARDS_RANKS, CARDS_STRINGS
+from counting import CardCounter, SYSTEM_HI_LO, SYSTEM_KO, SYSTEM_OMEGA_II
+from shoe import Shoe
+
+# 17 cards from a two-deck shoe; Hi-Lo counts them +6, KO +7 and Omega II +10
+SEQUENCE = [2, 3, 4, 5, 6, 10, 10, 1, 7, 8, 9, 5, 6, 2, 10, 3, 4]
+DECKS_LEFT = (2 * 52 - len(SEQUENCE)) / 52
+
+
+def _counted(system, encoding):
+    counter = CardCounter(system=system, num_decks=2, card_encoding=encoding)
+    for rank in SEQUENCE:
+        counter.count(["Ace" if rank == 1 else str(rank), "Clubs"] if encoding == CARDS_STRINGS else rank)
+    return counter
+
+
+@pytest.mark.parametrize("encoding", [CARDS_RANKS, CARDS_STRINGS])
+@pytest.mark.parametrize("system, running_count, true_count", [
+    (SYSTEM_HI_LO, 6, 6 / DECKS_LEFT),
+    (SYSTEM_OMEGA_II, 10, 10 / DECKS_LEFT),
+    (SYSTEM_KO, 3, 3) # Starts at 4 - 4 * 2 and isn't divided by the decks left
+])
+def test_true_count_of_a_known_sequence(system, running_count, true_count, encoding):
+    counter = _counted(system, encoding)
+    assert counter.running_count == running_count
+    assert counter.true_count() == pytest.approx(true_count)
+
+
+def test_hidden_cards_count_as_unseen():
+    counter = _counted(SYSTEM_HI_LO, CARDS_RANKS)
+    counter.count(10)
+    counter.hide(10) # The hole card
+    assert counter.true_count() == pytest.approx(6 / DECKS_LEFT)
+    counter.reveal()
+    assert counter.true_count() == pytest.approx(5 / ((2 * 52 - len(SEQUENCE) - 1) / 52))
+
+
+def test_a_shoe_counter_uses_the_cards_left_in_the_shoe():
+    shoe = Shoe(2, 0.75, CARDS_RANKS, random.Random(3))
+    shoe.cards = array.array("b", [9] * (2 * 52 - len(SEQUENCE)) + SEQUENCE[::-1]) # Dealt from the end
+    counter = CardCounter(shoe, SYSTEM_OMEGA_II)
+    for _ in SEQUENCE:
+        counter.count(shoe.deal())
+    assert counter.running_count == 10
+    assert counter.true_count() == pytest.approx(10 / DECKS_LEFT)
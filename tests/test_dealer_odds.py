@@ -0,0 +1,36 @@
+import json
+import os
+import dealer_odds
+from common import HIT
+from dealer_odds import DealerOutcomeEngine, compute_dealer_outcomes
+from ev_solver import EVSolver
+from strategies import BasicStrategy
+
+
+def test_truncated_table_file_is_rebuilt_atomically(tmp_path):
+    table_file = tmp_path / "dealer_tables.json"
+    table_file.write_text('{"S17": {"infinite": ') # As left by a write that was cut short
+
+    engine = DealerOutcomeEngine(table_file=str(table_file))
+    assert engine.outcome_probabilities(6) == compute_dealer_outcomes(6)
+    assert "S17" in json.loads(table_file.read_text())
+    assert os.listdir(tmp_path) == ["dealer_tables.json"] # No temp file left behind
+
+    # The next engine loads the saved tables
+    assert DealerOutcomeEngine(table_file=str(table_file)).bust_probability(6) == engine.bust_probability(6)
+
+
+def test_tables_stay_in_memory_when_the_cache_cannot_be_written(tmp_path, monkeypatch, caplog):
+    def read_only(path, text, durable=False):
+        raise PermissionError(13, "Permission denied", path)
+    monkeypatch.setattr(dealer_odds, "replace_file", read_only)
+    monkeypatch.setattr(dealer_odds, "TABLE_FILE", str(tmp_path / "cache" / "dealer_tables.json"))
+
+    engine = DealerOutcomeEngine()
+    assert engine.outcome_probabilities(6) == compute_dealer_outcomes(6)
+    assert "keeping them in memory" in caplog.text
+    assert not os.path.exists(dealer_odds.TABLE_FILE)
+
+    # Nothing built on the engine fails either
+    assert EVSolver().best_action([10, 6], 10)[0] == HIT
+    assert BasicStrategy().chart["hard"][16][10] == "H"
@@ -0,0 +1,47 @@
+import pytest
+from dealer_odds import DealerOutcomeEngine, fresh_composition, remove_card
+from ev_solver import EVSolver
+from common import HIT, STAND, SPLIT
+from table_state import MAX_HANDS
+
+
+@pytest.fixture
+def solver(tmp_path):
+    return EVSolver(DealerOutcomeEngine(table_file=str(tmp_path / "dealer_tables.json")))
+
+
+def _shoe(num_decks, *dealt):
+    composition = fresh_composition(num_decks)
+    for rank in dealt:
+        composition = remove_card(composition, rank)
+    return composition
+
+
+@pytest.mark.parametrize("num_decks", [None, 6])
+def test_hard_16_hits_against_a_10(solver, num_decks):
+    composition = _shoe(num_decks, 10, 6, 10) if num_decks else None
+    evs = solver.action_evs([10, 6], 10, composition)
+    assert set(evs) == {HIT, STAND}
+    assert solver.best_action([10, 6], 10, composition)[0] == HIT
+
+
+@pytest.mark.parametrize("num_decks", [None, 6])
+def test_8s_split_against_a_6(solver, num_decks):
+    composition = _shoe(num_decks, 8, 8, 6) if num_decks else None
+    evs = solver.action_evs([8, 8], 6, composition)
+    assert solver.best_action([8, 8], 6, composition)[0] == SPLIT
+    assert evs[SPLIT] > 0 > evs[STAND] > evs[HIT]
+
+
+def test_splitting_never_lowers_the_ev(solver):
+    for rank in range(1, 11):
+        for upcard in range(1, 11):
+            with_split = solver.action_evs([rank, rank], upcard)
+            assert SPLIT in with_split
+            # With MAX_HANDS already in play, neither this split nor any resplit is legal
+            without_split = solver.action_evs([rank, rank], upcard, hands=MAX_HANDS)
+            assert SPLIT not in without_split
+            assert max(with_split.values()) >= max(without_split.values()) - 1e-12
+            # Being allowed to resplit can only help the split hands
+            no_resplit = solver.action_evs([rank, rank], upcard, hands=MAX_HANDS - 1)
+            assert with_split[SPLIT] >= no_resplit[SPLIT] - 1e-12
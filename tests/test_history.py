@@ -0,0 +1,56 @@
+import random
+import pytest
+from cards import CARDS_IDS, CARDS_STRINGS
+from history import HandHistory, FORMAT_BINARY, FORMAT_JSONL, read_history
+from logic import BlackjackLogic, PERSIST_NONE
+from simulator import BlackjackSimulator, HIT, STAND, stand_on
+from state_machine import RoundStateMachine, PHASE_PLAYER, NEXT
+
+
+def _record(name, cards):
+    return {"round": 1, "table": name, "shoe": 0, "position": 0, "dealer": cards[:2], "dealer_natural": False,
+            "players": [{"name": name, "natural": False, "hands": [{"cards": cards[2:], "actions": "hs", "outcome": 0.5}]}]}
+
+
+def test_binary_and_jsonl_read_back_the_same_rounds():
+    for fmt in (FORMAT_BINARY, FORMAT_JSONL):
+        with HandHistory(f"hands_{fmt}", fmt) as history:
+            BlackjackSimulator(num_players=3, decide=stand_on(17, split=True), seed=4, history=history).run(500)
+
+    binary = list(read_history(f"hands_{FORMAT_BINARY}", FORMAT_BINARY))
+    assert len(binary) == 500
+    assert any(len(player["hands"]) > 1 for record in binary for player in record["players"])
+    assert binary == list(read_history(f"hands_{FORMAT_JSONL}", FORMAT_JSONL))
+
+
+@pytest.mark.parametrize("fmt", [FORMAT_BINARY, FORMAT_JSONL])
+@pytest.mark.parametrize("encoding, cards", [(CARDS_IDS, [0, 13, 51, 7, 20]),
+                                             (CARDS_STRINGS, [["Ace", "Hearts"], ["10", "Spades"], ["King", "Clubs"]])])
+def test_long_names_round_trip(fmt, encoding, cards):
+    name = "é" * 300 # 600 UTF-8 bytes
+    with HandHistory("hands", fmt) as history:
+        history.write(_record(name, cards), encoding)
+
+    assert list(read_history("hands", fmt)) == [_record(name, cards)]
+
+
+@pytest.mark.parametrize("decision", [HIT, STAND])
+def test_actions_record_only_explicit_stands(decision):
+    with HandHistory("hands") as history:
+        logic = BlackjackLogic(persistence=PERSIST_NONE, rng=random.Random(2), history=history)
+        logic.add_player("ann")
+        machine = RoundStateMachine(logic)
+        for _ in range(300):
+            machine.apply(NEXT)
+            while machine.phase == PHASE_PLAYER:
+                machine.apply(decision)
+            while machine.results is None:
+                machine.apply(NEXT)
+
+    hands = [hand for record in read_history("hands") for player in record["players"]
+             if not player["natural"] and not record["dealer_natural"] for hand in player["hands"]]
+    assert hands
+    if decision == HIT: # Every hand ends on a bust or a 21, never on a stand
+        assert all(set(hand["actions"]) == {"h"} for hand in hands)
+    else:
+        assert all(hand["actions"] == "s" for hand in hands)
@@ -0,0 +1,63 @@
+import logging
+import random
+from instrumentation import Instrumentation
+from logic import BlackjackLogic, PERSIST_ROUND
+from storage import JsonFileStore
+
+
+class _WriteSizes(JsonFileStore):
+
+    """Remembers the size of every payload written."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.sizes = []
+
+    def write(self, payload):
+        self.sizes.append(self.payload_size(payload))
+        return super().write(payload)
+
+
+def _play_rounds(logic, rounds):
+    for _ in range(rounds):
+        logic.new_round()
+        logic.initial_deal()
+        logic.player_stand("ann")
+        logic.dealer_turn()
+        logic.get_game_results()
+
+
+def test_counters_and_timers_track_each_round(caplog):
+    store = _WriteSizes("data.json")
+    instrumentation = Instrumentation(log_every=2)
+    logic = BlackjackLogic(persistence=PERSIST_ROUND, store=store, rng=random.Random(1), instrumentation=instrumentation)
+    logic.add_player("ann")
+    with caplog.at_level(logging.INFO, logger="blackjack.instrumentation"):
+        _play_rounds(logic, 30)
+
+    snapshot = instrumentation.snapshot()
+    assert snapshot["rounds"] == 30
+    assert snapshot["counters"]["bytes_written"] == sum(store.sizes) > 0
+    assert snapshot["counters"]["save_data_calls"] > 30 * 4 # At least one per card dealt
+    assert snapshot["counters"]["get_data_calls"] == 0 # The logic itself works on the live state
+    logic.get_data()
+    assert instrumentation.counters["get_data_calls"] == 1
+    for name in ("initial_deal", "dealer_turn", "get_game_results"):
+        assert snapshot["timers"][name]["count"] == 30
+    assert snapshot["timers"]["shuffle"]["count"] == logic.shoe.shuffles - 1 > 0
+    assert [record.getMessage().split()[0] for record in caplog.records] == [f"rounds={n}" for n in range(2, 31, 2)]
+
+    # A second table reading the same file counts exactly what it read
+    reader = Instrumentation()
+    BlackjackLogic(persistence=PERSIST_ROUND, store=JsonFileStore("data.json"), instrumentation=reader)
+    with open("data.json") as file:
+        assert reader.counters["bytes_read"] == len(file.read())
+
+    instrumentation.reset()
+    assert instrumentation.rounds == 0 and not any(instrumentation.counters.values()) and not instrumentation.timers
+
+
+def test_uninstrumented_tables_run_the_original_methods():
+    logic = BlackjackLogic(persistence=PERSIST_ROUND, store=JsonFileStore("data.json"))
+    assert not {"get_data", "_save_data", "initial_deal", "dealer_turn", "get_game_results"} & set(vars(logic))
+    assert "reshuffle" not in vars(logic.shoe)
@@ -0,0 +1,70 @@
+import random
+from logic import BlackjackLogic, PERSIST_JOURNAL
+from simulator import HIT, STAND, SPLIT
+from state_machine import RoundStateMachine, PHASE_PLAYER, NEXT
+
+
+def _decide(machine):
+    actions = machine.legal_actions()
+    if SPLIT in actions:
+        return SPLIT
+    return HIT if machine.logic.hand_score(machine.player, machine.hand) < 15 else STAND
+
+
+def _crash_mid_round(snapshot_every):
+
+    """Plays journaled rounds, stops mid-round without closing and returns (logic, machine)."""
+
+    logic = BlackjackLogic("data.json", persistence=PERSIST_JOURNAL, rng=random.Random(3), num_decks=6,
+                           journal_fsync_every=1, journal_snapshot_every=snapshot_every)
+    for name in ("ann", "bob", "cy"):
+        logic.add_player(name)
+    machine = RoundStateMachine(logic)
+    for _ in range(40):
+        machine.apply(NEXT)
+        while machine.phase == PHASE_PLAYER:
+            machine.apply(_decide(machine))
+        while machine.results is None:
+            machine.apply(NEXT)
+
+    # Deal the next round and play into it until someone has hit
+    while True:
+        machine.apply(NEXT)
+        if machine.phase == PHASE_PLAYER:
+            break
+        while machine.results is None:
+            machine.apply(NEXT)
+    machine.apply(HIT)
+    return logic, machine
+
+
+def test_recovery_mid_round_restores_the_state():
+    for snapshot_every in (10000, 50): # Journal only, and snapshots plus a journal tail
+        logic, _ = _crash_mid_round(snapshot_every)
+        expected = logic.get_data()
+
+        recovered = BlackjackLogic("data.json", persistence=PERSIST_JOURNAL)
+        assert recovered.get_data() == expected
+        assert recovered.get_all_player_names() == ["ann", "bob", "cy"]
+
+        # The recovered table finishes the round and keeps going
+        recovered.dealer_turn()
+        assert set(recovered.get_game_results()) == {"ann", "bob", "cy"}
+        recovered.new_round()
+        recovered.initial_deal()
+        recovered.delete_table()
+        logic.close()
+
+
+def test_recovery_drops_a_partial_last_line():
+    logic, _ = _crash_mid_round(10000)
+    expected = logic.get_data()
+    with open("data.json.journal", "a") as file:
+        file.write('[999999,"hit","ann",1,') # Crash mid-append
+
+    recovered = BlackjackLogic("data.json", persistence=PERSIST_JOURNAL)
+    assert recovered.get_data() == expected
+    recovered.player_hit("ann", 1) # Appends after the cut-off line
+    recovered.close()
+    assert BlackjackLogic("data.json", persistence=PERSIST_JOURNAL).get_data() == recovered.get_data()
+    logic.close()
@@ -0,0 +1,168 @@
+import random
+import pytest
+import time
+from cards import CARDS_IDS, CARDS_RANKS, CARDS_STRINGS, encode
+from history import HandHistory, read_history
+from logic import BlackjackLogic, PERSIST_INTERVAL, PERSIST_NONE, PERSIST_ROUND, PERSIST_SHARED
+from storage import JsonFileStore
+
+
+def test_interval_persistence_writes_while_idle(tmp_path):
+    data_file = str(tmp_path / "data.json")
+    logic = BlackjackLogic(data_file, persistence=PERSIST_INTERVAL, flush_interval_ms=50)
+    try:
+        logic.add_player("ann")
+        logic.new_round()
+        logic.initial_deal()
+        dealt = list(logic.get_hand_details("ann")[0])
+
+        # Nothing else happens (as when the game waits for input), yet the deal reaches the store
+        deadline = time.monotonic() + 2
+        stored = None
+        while time.monotonic() < deadline:
+            stored = JsonFileStore(logic.data_file).load()
+            if stored is not None and stored["players_data"].get("ann", {}).get("hand1"):
+                break
+            time.sleep(0.02)
+    finally:
+        logic.close()
+    assert stored["players_data"]["ann"]["hand1"] == dealt
+
+
+def test_delete_table_without_persistence_touches_no_files(tmp_path):
+    stored = BlackjackLogic(table_id="main") # Another process's persistent table of the same name
+    stored.add_player("bob")
+    stored.close()
+    files = sorted(path.name for path in tmp_path.iterdir())
+
+    logic = BlackjackLogic(persistence=PERSIST_NONE, table_id="main")
+    logic.add_player("ann")
+    logic.new_round()
+    logic.initial_deal()
+    logic.get_game_results()
+    logic.delete_table()
+    assert sorted(path.name for path in tmp_path.iterdir()) == files
+    assert BlackjackLogic(persistence=PERSIST_ROUND, table_id="main").get_all_player_names() == ["bob"]
+
+
+class _InterleavingStore(JsonFileStore):
+
+    """Runs `before_write` (once) right before the next compare_and_write, like another process getting in first."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.before_write = None
+
+    def compare_and_write(self, payload, expected_version):
+        if self.before_write is not None:
+            before_write, self.before_write = self.before_write, None
+            before_write()
+        return super().compare_and_write(payload, expected_version)
+
+
+def test_shared_persistence_loses_no_update():
+    store = _InterleavingStore("data.json")
+    first = BlackjackLogic(persistence=PERSIST_SHARED, store=store)
+    second = BlackjackLogic(persistence=PERSIST_SHARED, store=JsonFileStore("data.json"))
+
+    store.before_write = lambda: second.add_player("bob")
+    first.add_player("ann") # Conflicts with bob's write and is retried on top of it
+    assert store.contention["conflicts"] == 1
+    for i in range(10):
+        (first if i % 2 else second).add_player(f"player{i}")
+
+    expected = ["bob", "ann"] + [f"player{i}" for i in range(10)]
+    first.refresh()
+    assert first.get_all_player_names() == expected
+    assert BlackjackLogic(persistence=PERSIST_SHARED, store=JsonFileStore("data.json")).get_all_player_names() == expected
+
+
+def test_retried_transactions_record_each_event_once():
+    store = _InterleavingStore("data.json")
+    with HandHistory("hands") as history:
+        logic = BlackjackLogic(persistence=PERSIST_SHARED, store=store, rng=random.Random(1), history=history)
+        other = BlackjackLogic(persistence=PERSIST_SHARED, store=JsonFileStore("data.json"))
+        logic.add_player("ann")
+        logic.new_round()
+        logic.initial_deal()
+        store.before_write = lambda: other.add_player("bob")
+        logic.player_hit("ann", 1) # Retried once
+        logic.set_turn_played("ann", 1, stood=True)
+        logic.dealer_turn()
+        logic.get_game_results()
+
+    assert store.contention["conflicts"] == 1
+    [record] = read_history("hands")
+    assert record["players"][0]["name"] == "ann"
+    assert record["players"][0]["hands"][0]["actions"] == "hs" # One hit, though it was applied twice
+    assert len(record["players"][0]["hands"][0]["cards"]) == 3
+
+
+def test_an_unreadable_state_is_logged_before_the_table_starts_empty(caplog):
+    for text in ('{"version": 3, "state": {"num_pl', '{"num_players": 1}'):
+        with open("data.json", "w") as file:
+            file.write(text)
+        logic = BlackjackLogic(store=JsonFileStore("data.json"))
+        assert logic.get_all_player_names() == []
+        logic.close()
+    assert [record.levelname for record in caplog.records] == ["WARNING", "WARNING"]
+
+
+def test_store_failures_other_than_bad_data_are_raised():
+    class FailingStore(JsonFileStore):
+        def load_versioned(self):
+            raise OSError("disk gone")
+
+    with pytest.raises(OSError):
+        BlackjackLogic(store=FailingStore("data.json"))
+
+
+def _card(rank, encoding):
+    card = ["Ace" if rank == "A" else rank, "Spades"]
+    if encoding == CARDS_IDS:
+        return encode(card)
+    if encoding == CARDS_RANKS:
+        return 1 if rank == "A" else int(rank) if rank.isdigit() else 10
+    return card
+
+
+def _score_steps(logic, name, hand_number, steps):
+
+    """Adds each card, checking the running score, soft and bust flags against a rescore from the cards."""
+
+    for rank, score, soft, bust in steps:
+        logic.add_card_to_hand(name, hand_number, _card(rank, logic.card_encoding))
+        observed = (logic.hand_score(name, hand_number), logic.is_hand_soft(name, hand_number),
+                    logic.is_player_busted(name, hand_number))
+        assert observed == (score, soft, bust), rank
+        assert logic.calculate_score(name, hand_number) == score
+
+
+@pytest.mark.parametrize("encoding", [CARDS_STRINGS, CARDS_IDS, CARDS_RANKS])
+def test_scores_follow_soft_and_hard_totals_with_several_aces(encoding):
+    logic = BlackjackLogic(persistence=PERSIST_NONE, card_encoding=encoding)
+    logic.add_player("ann")
+    logic.add_player("bob")
+    _score_steps(logic, "ann", 1, [("A", 11, True, False), ("A", 12, True, False), ("9", 21, True, False),
+                                   ("5", 16, False, False), ("5", 21, False, False), ("A", 22, False, True)])
+    _score_steps(logic, "bob", 1, [("A", 11, True, False), ("6", 17, True, False), ("A", 18, True, False),
+                                   ("A", 19, True, False), ("King", 19, False, False), ("2", 21, False, False)])
+    _score_steps(logic, "dealer", 1, [("A", 11, True, False), ("A", 12, True, False), ("A", 13, True, False),
+                                      ("A", 14, True, False), ("7", 21, True, False), ("Queen", 21, False, False)])
+
+
+@pytest.mark.parametrize("encoding", [CARDS_STRINGS, CARDS_IDS, CARDS_RANKS])
+def test_split_hands_are_rescored(encoding):
+    logic = BlackjackLogic(persistence=PERSIST_NONE, card_encoding=encoding)
+    logic.add_player("ann")
+    _score_steps(logic, "ann", 1, [("A", 11, True, False), ("A", 12, True, False)])
+    logic.split_hand("ann", 1)
+    for hand_number in (1, 2):
+        assert (logic.hand_score("ann", hand_number), logic.is_hand_soft("ann", hand_number)) == (11, True)
+    _score_steps(logic, "ann", 1, [("Jack", 21, True, False)])
+    _score_steps(logic, "ann", 2, [("A", 12, True, False)])
+
+    logic.split_hand("ann", 2) # Resplit the Aces: two soft 11s again
+    assert [logic.hand_score("ann", n) for n in (1, 2, 3)] == [21, 11, 11]
+    _score_steps(logic, "ann", 3, [("10", 21, True, False), ("5", 16, False, False), ("9", 25, False, True)])
+    assert logic.hand_score("ann", 2) == 11 and not logic.is_player_busted("ann", 2)
@@ -0,0 +1,28 @@
+from parallel import merge_reports, run_parallel, split_rounds, worker_seeds
+from simulator import BlackjackSimulator, stand_on
+
+TIMING_KEYS = ("seconds", "rounds_per_sec")
+
+
+def _without_timings(report):
+    return {key: value for key, value in report.items() if key not in TIMING_KEYS}
+
+
+def test_parallel_runs_repeat_with_the_seed_and_match_the_shards():
+    decide = stand_on(16, split=True)
+    report = _without_timings(run_parallel(601, workers=3, seed=9, num_players=2, decide=decide))
+    assert _without_timings(run_parallel(601, workers=3, seed=9, num_players=2, decide=decide)) == report
+    assert report["rounds"] == 601 and report["splits"]
+
+    # Each worker plays its shard like a seeded simulator would on its own
+    shards = [BlackjackSimulator(num_players=2, decide=decide, seed=seed).run(rounds)
+              for rounds, seed in zip(split_rounds(601, 3), worker_seeds(9, 3))]
+    assert {**merge_reports(shards), "workers": 3, "seed": 9} == report
+
+
+def test_worker_seeds_are_distinct_and_stable():
+    seeds = worker_seeds(0, 8)
+    assert len(set(seeds)) == 8
+    assert worker_seeds(0, 8) == seeds
+    assert worker_seeds(1, 8) != seeds
+    assert split_rounds(10, 4) == [3, 3, 2, 2]
@@ -0,0 +1,103 @@
+import math
+import random
+import pytest
+
+pytest.importorskip("numpy")
+
+from cards import CARDS_RANKS
+from logic import BlackjackLogic, PERSIST_NONE
+from seat_arrays import SeatArrays, play_population
+
+
+def _draw(rng):
+    return min(rng.randint(1, 13), 10) # 11-13 are the face cards
+
+
+def _play_hand(rng, logic, seats, seat, name, hand_number, threshold):
+
+    """Plays one hand the same way on both, checking that they agree after every step."""
+
+    while True:
+        can_split = logic.can_split(name, hand_number)
+        assert seats.can_split(hand_number, [seat])[0] == can_split
+        if can_split and rng.random() < 0.7:
+            logic.split_hand(name, hand_number)
+            seats.split_hand(hand_number, [seat])
+        elif logic.hand_score(name, hand_number) < threshold:
+            card = _draw(rng)
+            logic.add_card_to_hand(name, hand_number, card)
+            seats.add_cards([card], hand_number, [seat])
+        else:
+            break
+        assert seats.scores(hand_number, [seat])[0] == logic.hand_score(name, hand_number)
+        assert seats.is_player_busted(hand_number, [seat])[0] == logic.is_player_busted(name, hand_number)
+    seats.stand(hand_number, [seat])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_rules_match_blackjack_logic_on_the_same_cards(seed):
+    rng = random.Random(seed)
+    names = [f"p{n}" for n in range(7)]
+    logic = BlackjackLogic(persistence=PERSIST_NONE, card_encoding=CARDS_RANKS)
+    for name in names:
+        logic.add_player(name)
+    seats = SeatArrays(len(names))
+    split_hands = 0
+
+    for _ in range(40):
+        logic.new_round()
+        seats.new_round()
+        for seat, name in enumerate(names):
+            for _ in range(2):
+                card = _draw(rng)
+                logic.add_card_to_hand(name, 1, card)
+                seats.add_cards([card], 1, [seat])
+        for _ in range(2): # Every seat plays against the same dealer cards
+            card = _draw(rng)
+            logic.add_card_to_hand("dealer", card=card)
+            seats.add_dealer_cards([card] * len(names))
+
+        for seat, name in enumerate(names):
+            hand_number = 1
+            while hand_number <= logic.get_num_hands(name):
+                _play_hand(rng, logic, seats, seat, name, hand_number, rng.randint(12, 18))
+                hand_number += 1
+            assert seats.hands[seat] == logic.get_num_hands(name)
+            split_hands += logic.get_num_hands(name) - 1
+
+        while logic.hand_score("dealer") < 17:
+            card = _draw(rng)
+            logic.add_card_to_hand("dealer", card=card)
+            seats.add_dealer_cards([card] * len(names))
+        assert (seats.dealer_scores() == logic.hand_score("dealer")).all()
+
+        naturals = seats.naturals() & ~seats.dealer_naturals()
+        outcomes = seats.game_results()
+        results = logic.get_game_results()
+        for seat, name in enumerate(names):
+            expected = results[name]
+            if naturals[seat]: # BlackjackLogic's drivers pay these through check_natural_winners
+                expected[1] = 1
+            assert {n: outcomes[seat, n - 1] for n in expected} == expected
+            assert all(math.isnan(outcome) for outcome in outcomes[seat, len(expected):])
+    assert split_hands
+
+
+def test_split_hand_rejects_seats_that_cannot_split():
+    seats = SeatArrays(2)
+    seats.new_round()
+    seats.add_cards([8, 8])
+    seats.add_cards([8, 9])
+    assert list(seats.can_split()) == [True, False]
+    with pytest.raises(ValueError):
+        seats.split_hand(1, [0, 1])
+    seats.split_hand(seats=[0])
+    assert list(seats.hands) == [2, 1]
+    assert list(seats.scores(2)) == [8, 0]
+
+
+def test_populations_repeat_with_the_seed():
+    _, first = play_population(500, 20, split=True, seed=3)
+    _, second = play_population(500, 20, split=True, seed=3)
+    assert first["hands"] == second["hands"] > 500 * 20
+    assert first["mean_bankroll"] == second["mean_bankroll"]
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import server
+from client import BlackjackClient, print_message
+from server import TableServer, send
+
+
+async def _serve(decision_timeout=5.0):
+    server = TableServer("127.0.0.1", 0, decision_timeout=decision_timeout, round_pause=0)
+    listener = await server.start()
+    return server, listener, listener.sockets[0].getsockname()[1]
+
+
+def test_bot_clients_play_rounds_and_print_every_message(capsys):
+
+    async def play():
+        _, listener, port = await _serve()
+        clients = [BlackjackClient("127.0.0.1", port, "main", name, on_message=print_message) for name in ("ann", "bob")]
+        try:
+            await asyncio.wait_for(asyncio.gather(*(client.play(3) for client in clients)), 30)
+        finally:
+            listener.close()
+            await listener.wait_closed()
+        return clients
+
+    clients = asyncio.run(play())
+    assert all(client.rounds == 3 for client in clients)
+    output = capsys.readouterr().out
+    assert "Dealer: " in output and " of " in output
+    assert "ann hand 1" in output and "bob hand 1" in output
+
+
+def test_player_leaving_on_their_turn_does_not_stall_the_table():
+
+    async def play():
+        _, listener, port = await _serve(decision_timeout=30.0)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(json.dumps({"type": "join", "table": "main", "name": "ann"}).encode() + b"\n")
+        async for line in reader:
+            if json.loads(line)["type"] == "your_turn":
+                break
+        bob = BlackjackClient("127.0.0.1", port, "main", "bob")
+        bob_task = asyncio.create_task(bob.play(2))
+        writer.close() # Leaves while the table waits for a decision
+        try:
+            await asyncio.wait_for(bob_task, 5) # Far less than the decision timeout
+        finally:
+            listener.close()
+            await listener.wait_closed()
+        return bob
+
+    assert asyncio.run(play()).rounds == 2
+
+
+class _Transport:
+
+    def __init__(self):
+        self.buffered = 0
+        self.aborted = False
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+    def abort(self):
+        self.aborted = True
+
+
+class _Writer:
+
+    def __init__(self):
+        self.transport = _Transport()
+
+    def is_closing(self):
+        return self.transport.aborted
+
+    def write(self, data):
+        self.transport.buffered += len(data) # Nothing is ever read
+
+
+def test_client_that_stops_reading_is_dropped():
+    writer = _Writer()
+    message = {"type": "state", "padding": "x" * 1000}
+    while not writer.transport.aborted:
+        send(writer, message)
+    assert server.MAX_BUFFERED < writer.transport.buffered <= server.MAX_BUFFERED + 2000
+    send(writer, message) # Nothing more is queued once the client is dropped
+    assert writer.transport.buffered <= server.MAX_BUFFERED + 2000
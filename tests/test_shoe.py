@@ -0,0 +1,30 @@
+from collections import Counter
+from cards import CARDS_IDS
+from simulator import BlackjackSimulator, stand_on
+
+
+def test_seven_players_with_splits_reshuffle_between_rounds_or_when_dry():
+    simulator = BlackjackSimulator(num_players=7, decide=stand_on(17, split=True), seed=2, card_encoding=CARDS_IDS,
+                                   num_decks=1, penetration=0.75)
+    shoe = simulator.logic.shoe
+    dealt = [] # (shoe number, card)
+    deal = shoe.deal
+    def recording_deal():
+        card = deal()
+        dealt.append((shoe.shuffles, card))
+        return card
+    shoe.deal = recording_deal
+
+    report = simulator.run(300)
+    assert report["hands"] > 7 * 300 and report["splits"]
+
+    by_shoe = {}
+    for number, card in dealt:
+        by_shoe.setdefault(number, []).append(card)
+    finished = [by_shoe[number] for number in sorted(by_shoe)[:-1]]
+    assert len(finished) > 50
+    for cards in finished:
+        assert max(Counter(cards).values()) == 1 # No card comes out of a one-deck shoe twice
+        assert 52 - shoe.cut_remaining <= len(cards) <= 52 # Kept until the cut card came out
+    assert any(len(cards) == 52 for cards in finished) # Some rounds ran the shoe dry and reshuffled mid-round
+    assert any(len(cards) < 52 for cards in finished)
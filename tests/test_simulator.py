@@ -0,0 +1,22 @@
+from simulator import BlackjackSimulator, stand_on
+
+TIMING_KEYS = ("seconds", "rounds_per_sec")
+
+
+def _report(seed, rounds=300):
+    report = BlackjackSimulator(num_players=3, decide=stand_on(16, split=True), seed=seed).run(rounds)
+    return {key: value for key, value in report.items() if key not in TIMING_KEYS}
+
+
+def test_the_same_seed_replays_the_same_rounds():
+    report = _report(11)
+    assert report["hands"] > report["rounds"] * 3 and report["splits"]
+    assert _report(11) == report
+    assert _report(12) != report
+
+
+def test_seeded_simulators_deal_the_same_shoe_whatever_the_policy():
+    shoes = [list(BlackjackSimulator(decide=decide, seed=5).logic.shoe.cards)
+             for decide in (stand_on(12), stand_on(17, split=True))]
+    assert shoes[0] == shoes[1]
+    assert shoes[0] != list(BlackjackSimulator(seed=6).logic.shoe.cards)
@@ -0,0 +1,103 @@
+import array
+import pytest
+from cards import CARDS_RANKS
+from logic import BlackjackLogic, PERSIST_NONE
+from state_machine import (RoundStateMachine, PHASE_DEALING, PHASE_PLAYER, PHASE_DEALER, PHASE_SETTLE, NEXT,
+                           HIT, STAND, SPLIT)
+
+
+def _machine(*players):
+    logic = BlackjackLogic(persistence=PERSIST_NONE, card_encoding=CARDS_RANKS)
+    for name in players:
+        logic.add_player(name)
+    return RoundStateMachine(logic)
+
+
+def _stack(machine, *ranks):
+
+    """Makes the next cards dealt `ranks`, in order (each player two, then the dealer two, then hits)."""
+
+    filler = [2] * 40 # Keeps the shoe above the cut card, so new_round doesn't reshuffle
+    machine.logic.shoe.cards = array.array("b", filler + list(reversed(ranks)))
+
+
+def test_a_round_goes_through_every_phase():
+    machine = _machine("ann")
+    assert machine.phase == PHASE_DEALING and machine.legal_actions() == [NEXT]
+
+    _stack(machine, 10, 6, 10, 7)
+    assert machine.apply(NEXT) == PHASE_PLAYER
+    assert (machine.player, machine.hand) == ("ann", 1)
+    assert machine.legal_actions() == [HIT, STAND]
+    assert machine.apply(STAND) == PHASE_DEALER
+    assert machine.apply(NEXT) == PHASE_SETTLE
+    assert machine.apply(NEXT) == PHASE_DEALING
+    assert machine.results == {"ann": {1: 0}} # 16 against 17
+    assert machine.rounds == 1
+
+
+def test_hands_that_reach_21_end_on_their_own():
+    machine = _machine("ann", "bob")
+    _stack(machine, 10, 6, 9, 9, 10, 7, 5)
+    machine.apply(NEXT)
+    assert machine.apply(HIT) == PHASE_PLAYER # ann has 21: bob's turn
+    assert (machine.player, machine.hand) == ("bob", 1)
+    machine.apply(STAND)
+    machine.apply(NEXT)
+    machine.apply(NEXT)
+    assert machine.results == {"ann": {1: 1}, "bob": {1: 1}}
+
+
+def test_split_is_only_legal_on_a_pair():
+    machine = _machine("ann", "bob")
+    _stack(machine, 8, 8, 10, 9, 10, 7, 3, 10)
+    machine.apply(NEXT)
+    assert machine.legal_actions() == [HIT, STAND, SPLIT]
+    machine.apply(SPLIT)
+    assert machine.logic.get_num_hands("ann") == 2
+    assert machine.legal_actions() == [HIT, STAND] # One card left in hand 1
+    machine.apply(HIT) # 8 + 3
+    machine.apply(STAND)
+    assert (machine.player, machine.hand) == ("ann", 2)
+    machine.apply(HIT) # 8 + 10
+    machine.apply(STAND)
+
+    assert (machine.player, machine.hand) == ("bob", 1)
+    assert machine.legal_actions() == [HIT, STAND] # 10 and 9
+    with pytest.raises(ValueError):
+        machine.apply(SPLIT)
+    machine.apply(STAND)
+    machine.apply(NEXT)
+    machine.apply(NEXT)
+    assert machine.results == {"ann": {1: 0, 2: 1}, "bob": {1: 1}}
+
+
+def test_illegal_actions_are_rejected_without_changing_the_phase():
+    machine = _machine("ann")
+    for action in (HIT, STAND, SPLIT, "fold"):
+        with pytest.raises(ValueError):
+            machine.apply(action)
+    assert machine.phase == PHASE_DEALING and machine.rounds == 0
+
+    _stack(machine, 10, 6, 10, 7)
+    machine.apply(NEXT)
+    with pytest.raises(ValueError):
+        machine.apply(NEXT)
+    assert machine.phase == PHASE_PLAYER and machine.player == "ann"
+
+
+def test_naturals_skip_turns():
+    machine = _machine("ann", "bob")
+    _stack(machine, 1, 10, 10, 6, 10, 7)
+    machine.apply(NEXT)
+    assert machine.naturals == ["ann"]
+    assert machine.player == "bob" # ann's natural skips her turn
+    machine.apply(STAND)
+    machine.apply(NEXT)
+    machine.apply(NEXT)
+    assert machine.results == {"ann": {1: 1}, "bob": {1: 0}}
+
+    _stack(machine, 10, 6, 9, 9, 1, 10)
+    assert machine.apply(NEXT) == PHASE_SETTLE # Dealer natural: nobody plays
+    machine.apply(NEXT)
+    assert machine.results == {"ann": {1: 0}, "bob": {1: 0}}
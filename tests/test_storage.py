@@ -0,0 +1,58 @@
+import random
+import sqlite3
+from logic import BlackjackLogic, PERSIST_SHARED
+from storage import SqliteStore
+
+
+def _play_round(logic):
+    logic.new_round()
+    logic.initial_deal()
+    for name in logic.get_all_player_names():
+        if logic.can_split(name, 1):
+            logic.split_hand(name, 1)
+        logic.player_hit(name, 1)
+        logic.set_turn_played(name, 1, stood=True)
+    logic.dealer_turn()
+    return logic.get_game_results()
+
+
+def test_sqlite_state_round_trips_through_blackjack_logic():
+    logic = BlackjackLogic(store=SqliteStore("tables.db"), rng=random.Random(8), num_decks=6)
+    for name in ("ann", "bob", "cy"):
+        logic.add_player(name)
+    for _ in range(30):
+        _play_round(logic)
+    logic.new_round()
+    logic.initial_deal()
+    logic.split_hand("ann", 1) # Stored hands are variable-length
+    logic.dealer_turn()
+    results = logic.get_game_results()
+    logic.close()
+
+    reloaded = BlackjackLogic(store=SqliteStore("tables.db"))
+    assert reloaded.get_data() == logic.get_data()
+    assert reloaded.get_all_player_names() == ["ann", "bob", "cy"] # Seat order
+    assert reloaded.get_num_hands("ann") == 2
+    assert reloaded.store.version == logic.store.version
+
+    rows = sqlite3.connect("tables.db").execute("SELECT COUNT(*) FROM round_results WHERE table_id = 'main'").fetchone()
+    assert rows[0] >= 31 * 3
+    assert set(results) == {"ann", "bob", "cy"}
+
+
+def test_concurrent_sqlite_instances_see_committed_updates():
+    first = BlackjackLogic(store=SqliteStore("tables.db"), persistence=PERSIST_SHARED, rng=random.Random(1))
+    second = BlackjackLogic(store=SqliteStore("tables.db"), persistence=PERSIST_SHARED, rng=random.Random(2))
+
+    first.add_player("ann")
+    second.add_player("bob") # Applied on top of ann's committed write
+    second.refresh()
+    assert second.get_all_player_names() == ["ann", "bob"]
+    first.refresh()
+    assert first.get_all_player_names() == ["ann", "bob"]
+
+    first.new_round()
+    first.initial_deal()
+    second.refresh()
+    assert second.get_data() == first.get_data()
+    assert second.store.version == first.store.version
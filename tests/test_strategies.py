@@ -0,0 +1,17 @@
+from cards import CARDS_IDS, encode
+from strategies import CountingStrategy, MimicDealer, STAND, HIT
+
+
+def test_counting_strategy_counts_hi_lo_per_deck_left():
+    strategy = CountingStrategy(num_decks=1, base=MimicDealer(), card_encoding=CARDS_IDS)
+    low_cards = [encode([rank, "Hearts"]) for rank in ("2", "3", "4", "5", "6")] * 2 # +10, 10 cards seen
+    strategy.observe(low_cards)
+    assert strategy.true_count() == 10 / (42 / 52)
+
+    # 16 against a ten stands from a true count of 0, and hits again once the shoe is reshuffled below it
+    hand = [encode(["10", "Clubs"]), encode(["6", "Clubs"])]
+    ten = encode(["King", "Spades"])
+    assert strategy(hand, 16, ten, False) == STAND
+    strategy.new_shoe()
+    strategy.observe([encode(["Ace", "Clubs"])])
+    assert strategy(hand, 16, ten, False) == HIT
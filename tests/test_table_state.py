@@ -0,0 +1,76 @@
+import random
+import pytest
+from logic import BlackjackLogic, PERSIST_NONE
+from table_state import TableState
+
+
+def _dealt_table(**options):
+    logic = BlackjackLogic(persistence=PERSIST_NONE, rng=random.Random(5), **options)
+    for name in ("ann", "bob"):
+        logic.add_player(name)
+    logic.new_round()
+    logic.initial_deal()
+    return logic
+
+
+def test_get_data_returns_a_detached_copy_in_the_stored_layout():
+    logic = _dealt_table()
+    data = logic.get_data()
+    assert set(data) == {"num_players", "dhand", "dscore", "dbust", "dhard", "daces", "players_data"}
+    assert data["players_data"]["ann"]["hands"] == 1
+    assert data["players_data"]["ann"]["hand1"] == logic.get_hand_details("ann")[0]
+
+    data["dhand"].append(["Ace", "Spades"])
+    data["players_data"]["ann"]["hand1"][0][0] = "Ace"
+    data["players_data"]["bob"]["score1"] = 99
+    assert logic.get_data() != data
+    assert TableState.from_dict(logic.get_data()).to_dict() == logic.get_data()
+
+
+def test_state_round_trips_through_the_stored_layout():
+    logic = _dealt_table()
+    logic.split_hand("ann", 1) # Any two cards will do for the layout
+    state = logic.get_state()
+    assert TableState.from_dict(state.to_dict()).to_dict() == state.to_dict()
+    assert logic.get_data()["players_data"]["ann"]["hands"] == 2
+
+
+def test_snapshot_shares_nothing_with_the_live_state():
+    logic = _dealt_table() # [rank, suit] cards
+    snapshot = logic.snapshot()
+    live = logic.get_hand_details("ann")[0]
+    card = snapshot.hand("ann").cards[0]
+    assert card == tuple(live[0])
+
+    with pytest.raises(TypeError):
+        card[0] = "Ace"
+    with pytest.raises(AttributeError):
+        snapshot.hand("ann").score = 21
+    live[0][0] = "Ace" # Even a change behind BlackjackLogic's back doesn't reach the snapshot
+    assert snapshot.hand("ann").cards[0] == card
+
+
+def test_snapshot_is_cached_until_the_state_changes():
+    logic = _dealt_table()
+    snapshot = logic.snapshot()
+    assert logic.snapshot() is snapshot
+
+    changes = [lambda: logic.player_hit("ann", 1), lambda: logic.set_turn_played("ann", 1, stood=True),
+               logic.dealer_turn, lambda: logic.add_player("cy"), logic.new_round, logic.initial_deal,
+               logic.check_natural_winners, lambda: logic.remove_player("cy"), logic.reset_game_data]
+    for change in changes:
+        change()
+        new = logic.snapshot()
+        assert new is not snapshot and new.revision > snapshot.revision
+        assert logic.snapshot() is new
+        snapshot = new
+
+    logic.get_game_results() # Settling reads the state without changing it
+    assert logic.snapshot() is snapshot
+
+
+def test_get_state_invalidates_the_snapshot():
+    logic = _dealt_table()
+    snapshot = logic.snapshot()
+    logic.get_state().dealer.cards.append(["Ace", "Spades"])
+    assert len(logic.snapshot().dealer.cards) == len(snapshot.dealer.cards) + 1
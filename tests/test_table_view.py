@@ -0,0 +1,71 @@
+import array
+import os
+import pytest
+
+pygame = pytest.importorskip("pygame")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # Headless
+
+from cards import CARDS_IDS
+from logic import BlackjackLogic, PERSIST_NONE
+from state_machine import RoundStateMachine, PHASE_DEALER, STAND
+from table_view import TableView
+
+
+@pytest.fixture
+def view():
+    logic = BlackjackLogic(persistence=PERSIST_NONE, card_encoding=CARDS_IDS)
+    logic.add_player("ann")
+    # ann: 10 and 7 of Hearts, dealer: 10 and 7 of Diamonds; the rest keeps the shoe above the cut card
+    logic.shoe.cards = array.array("b", list(range(22, 52)) + [18, 21, 5, 8])
+    view = TableView(RoundStateMachine(logic), size=(640, 480), deal_frames=3, pause_frames=2)
+    yield view
+    pygame.display.quit()
+
+
+def _settle(view):
+
+    """Renders until every card is down and the table waits for the player."""
+
+    view.step() # Deal
+    while view.busy():
+        view.render()
+        view.step()
+    view.render()
+
+
+def test_unchanged_frames_draw_nothing(view, monkeypatch):
+    assert view.render() == 1 # The player's name, before any card is dealt
+    updates = []
+    monkeypatch.setattr(pygame.display, "update", updates.append)
+    assert view.render() == 0
+    assert updates == []
+
+    _settle(view)
+    updates.clear()
+    assert view.render() == 0
+    assert updates == []
+
+
+def test_only_the_regions_that_changed_are_redrawn(view, monkeypatch):
+    _settle(view)
+    before = view.screen.copy()
+    drawn = dict(view._drawn)
+    updates = []
+    monkeypatch.setattr(pygame.display, "update", updates.append)
+
+    view.machine.apply(STAND) # The hole card turns over, the dealer's badge shows 17 and ann's name loses its highlight
+    assert view.machine.phase == PHASE_DEALER
+    view.render()
+
+    changed = {key for key, value in view._drawn.items() if drawn.get(key) != value}
+    assert changed == {("card", "dealer", 1, 1), ("badge", "dealer", 1), ("name", "ann")}
+    [dirty] = updates
+    assert {tuple(rect) for rect in dirty} == {tuple(rect) for key in changed for rect in (drawn[key][1], view._drawn[key][1])}
+    assert sum(rect.width * rect.height for rect in dirty) < 0.05 * 640 * 480
+
+    # Outside the dirty rectangles the screen is untouched
+    patched = before.copy()
+    for rect in dirty:
+        patched.blit(view.screen, rect, rect)
+    assert pygame.image.tobytes(patched, "RGB") == pygame.image.tobytes(view.screen, "RGB")
+    assert pygame.image.tobytes(before, "RGB") != pygame.image.tobytes(view.screen, "RGB")
@@ -0,0 +1,53 @@
+import pytest
+from game import BlackjackGame
+from logic import BlackjackLogic, DEFAULT_TABLE_ID, PERSIST_JOURNAL
+from storage import SqliteStore
+
+
+def _seat(logic, *names):
+    for name in names:
+        logic.add_player(name)
+    logic.new_round()
+    logic.initial_deal()
+    logic.dealer_turn()
+    logic.get_game_results() # End of round: written out
+
+
+def test_tables_in_one_directory_keep_their_own_state():
+    default, other = BlackjackLogic(), BlackjackLogic(table_id="other")
+    assert default.table_id == DEFAULT_TABLE_ID
+    assert default.data_file != other.data_file != "data.json"
+    _seat(default, "ann")
+    _seat(other, "bob")
+
+    assert BlackjackLogic().get_all_player_names() == ["ann"]
+    assert BlackjackLogic(table_id="other").get_all_player_names() == ["bob"]
+    assert BlackjackGame().logic.data_file not in (default.data_file, other.data_file)
+
+
+def test_journaled_tables_keep_their_own_journal():
+    first = BlackjackLogic(persistence=PERSIST_JOURNAL, table_id="first")
+    second = BlackjackLogic(persistence=PERSIST_JOURNAL, table_id="second")
+    _seat(first, "ann")
+    _seat(second, "bob", "cy")
+    first.close()
+    second.close()
+    assert BlackjackLogic(persistence=PERSIST_JOURNAL, table_id="first").get_all_player_names() == ["ann"]
+    assert BlackjackLogic(persistence=PERSIST_JOURNAL, table_id="second").get_all_player_names() == ["bob", "cy"]
+
+
+def test_tables_in_one_sqlite_database_keep_their_own_rows():
+    first = BlackjackLogic(store=SqliteStore("tables.db", "first"))
+    second = BlackjackLogic(store=SqliteStore("tables.db", "second"))
+    assert (first.table_id, second.table_id) == ("first", "second")
+    _seat(first, "ann")
+    _seat(second, "bob")
+    second.delete_table()
+
+    assert BlackjackLogic(store=SqliteStore("tables.db", "first")).get_all_player_names() == ["ann"]
+    assert BlackjackLogic(store=SqliteStore("tables.db", "second")).get_all_player_names() == []
+
+
+def test_a_store_for_another_table_is_rejected():
+    with pytest.raises(ValueError):
+        BlackjackLogic(store=SqliteStore("tables.db", "first"), table_id="second")